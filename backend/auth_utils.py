@@ -4,10 +4,14 @@ JWT 인증 및 비밀번호 해싱 유틸리티
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
+from bson import ObjectId
 import bcrypt
+import calendar
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import settings
+from database import Collections, db_instance
+from services.token_cache import get_token_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,8 +37,8 @@ def hash_password(password: str) -> str:
     if len(password_bytes) > 72:
         password_bytes = password_bytes[:72]
 
-    # salt 생성 및 해싱
-    salt = bcrypt.gensalt()
+    # salt 생성 및 해싱 (비용은 BCRYPT_ROUNDS)
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
 
     # bytes를 string으로 변환
@@ -67,6 +71,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    저장된 해시의 bcrypt 비용이 현재 설정(BCRYPT_ROUNDS)과 다른지 확인
+
+    Args:
+        hashed_password: "$2b$<cost>$..." 형식의 해시
+
+    Returns:
+        재해싱이 필요하면 True
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     JWT Access Token 생성
@@ -85,7 +105,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
 
     encoded_jwt = jwt.encode(
         to_encode,
@@ -118,6 +138,21 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+async def _load_tokens_valid_after(user_id: str) -> Optional[float]:
+    """
+    사용자 문서의 tokens_valid_after (이 시각 이전에 발급된 토큰 거부) 조회
+
+    Returns:
+        epoch 초 (기록이 없으면 None)
+    """
+    users_collection = db_instance.get_collection(Collections.USERS)
+    user = await users_collection.find_one({"_id": ObjectId(user_id)}, {"tokens_valid_after": 1})
+    valid_after = (user or {}).get("tokens_valid_after")
+    if valid_after is None:
+        return None
+    return calendar.timegm(valid_after.utctimetuple())
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> str:
@@ -134,9 +169,23 @@ async def get_current_user(
         HTTPException: 토큰이 유효하지 않거나 만료된 경우
     """
     token = credentials.credentials
-    payload = decode_access_token(token)
 
-    if not payload:
+    # 검증된 토큰 캐시 (만료 전까지 jwt.decode 생략)
+    token_cache = get_token_cache()
+    payload = token_cache.get(token) if token_cache else None
+    if payload is None:
+        payload = decode_access_token(token)
+        if payload and token_cache:
+            token_cache.put(token, payload)
+
+    # 다른 워커에서 폐기된 토큰 반영 (사용자마다 JWT_REVOCATION_CHECK_SECONDS 주기로 확인)
+    if payload and token_cache and payload.get("sub") and token_cache.needs_revocation_check(payload["sub"]):
+        try:
+            token_cache.observe_revocation(payload["sub"], await _load_tokens_valid_after(payload["sub"]))
+        except Exception as e:
+            logger.warning(f"토큰 폐기 기록 조회 실패 - 이 워커의 폐기 기록만 사용: {e}")
+
+    if not payload or (token_cache and token_cache.is_revoked(payload)):
         raise HTTPException(
             status_code=401,
             detail="유효하지 않거나 만료된 토큰입니다"
@@ -150,3 +199,16 @@ async def get_current_user(
         )
 
     return user_id
+
+
+def revoke_user_tokens(user_id: str) -> None:
+    """
+    사용자의 기존 토큰 폐기 (비밀번호 변경 등)
+
+    이 워커의 검증된 JWT 캐시에서 제거하고, 이 시점 이전에 발급된 토큰을 거부합니다.
+    다른 워커에 반영하려면 호출자가 사용자 문서의 tokens_valid_after도 같은 시각으로 갱신해야 합니다.
+    (다른 워커는 JWT_REVOCATION_CHECK_SECONDS 이내에 반영)
+    """
+    token_cache = get_token_cache()
+    if token_cache:
+        token_cache.revoke_user(user_id)
@@ -72,24 +72,151 @@ class Settings:
    # MongoDB Atlas 설정
     MONGODB_URI: str = os.getenv("MONGODB_URI", "")
     MONGODB_DATABASE: str = os.getenv("MONGODB_DATABASE", "chatbot_db")
+    # 앱 시작 시 인덱스 적용 + 대기 중인 마이그레이션 실행 (migrations/runner.py)
+    DB_BOOTSTRAP_ON_STARTUP: bool = os.getenv("DB_BOOTSTRAP_ON_STARTUP", "true").lower() == "true"
+    # email_verifications TTL: expires_at 이후 삭제까지의 유예 시간 (인증 완료 후 회원가입까지)
+    EMAIL_VERIFICATION_TTL_GRACE_SECONDS: int = int(os.getenv("EMAIL_VERIFICATION_TTL_GRACE_SECONDS", "86400"))
 
     # JWT 인증 설정
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this-in-production")
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))  # 24시간
+    # 비밀번호 해싱 (bcrypt 비용, 전용 스레드 풀 크기)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))  # 변경 시 다음 로그인에서 재해싱
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    # 인증 엔드포인트 요청 제한 (토큰 버킷, "용량/초", 빈 값이면 해당 범위 제한 없음)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | mongo (워커 간 공유)
+    RATE_LIMIT_PROXY_HOPS: int = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))  # 앞단의 신뢰하는 프록시 수 (0이면 X-Forwarded-For 무시)
+    RATE_LIMIT_LOGIN_IP: str = os.getenv("RATE_LIMIT_LOGIN_IP", "20/60")
+    RATE_LIMIT_LOGIN_EMAIL: str = os.getenv("RATE_LIMIT_LOGIN_EMAIL", "5/60")
+    RATE_LIMIT_EMAIL_SEND_IP: str = os.getenv("RATE_LIMIT_EMAIL_SEND_IP", "10/600")  # 인증 메일 / 비밀번호 재설정 메일
+    RATE_LIMIT_EMAIL_SEND_EMAIL: str = os.getenv("RATE_LIMIT_EMAIL_SEND_EMAIL", "3/600")
+    # 검증된 JWT 캐시 (요청마다 jwt.decode 생략)
+    JWT_CACHE_ENABLED: bool = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+    JWT_CACHE_MAX_ENTRIES: int = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+    JWT_REVOCATION_CHECK_SECONDS: float = float(os.getenv("JWT_REVOCATION_CHECK_SECONDS", "30"))  # 사용자별 tokens_valid_after 재확인 주기 (다른 워커의 폐기 반영 지연 상한)
 
     # SMTP 이메일 설정
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+    # 메일 발송 큐 (SMTP 연결 재사용, 실패 시 재시도)
+    MAIL_BACKEND: str = os.getenv("MAIL_BACKEND", "smtp")  # smtp | memory (보내지 않고 기록, 테스트용)
+    MAIL_QUEUE_MAX_RETRIES: int = int(os.getenv("MAIL_QUEUE_MAX_RETRIES", "3"))
+    MAIL_QUEUE_MAX_SIZE: int = int(os.getenv("MAIL_QUEUE_MAX_SIZE", "1000"))
+    MAIL_SMTP_IDLE_SECONDS: float = float(os.getenv("MAIL_SMTP_IDLE_SECONDS", "60"))  # 이보다 오래 쉰 연결은 새로 연결
     
     # 외부 API 설정 - HyperCLOVA X
     HYPERCLOVA_API_KEY: str = os.getenv("HYPERCLOVA_API_KEY", "")
     HYPERCLOVA_API_GATEWAY_KEY: Optional[str] = os.getenv("HYPERCLOVA_API_GATEWAY_KEY")
     HYPERCLOVA_REQUEST_ID: Optional[str] = os.getenv("HYPERCLOVA_REQUEST_ID")
     
+    # 벡터 스토어 백엔드: pinecone | faiss (faiss는 FAISS_INDEX_DIR의 로컬 인덱스를 프로세스 내에서 검색)
+    VECTORSTORE_BACKEND: str = os.getenv("VECTORSTORE_BACKEND", "pinecone")
+    FAISS_INDEX_DIR: str = os.getenv(
+        "FAISS_INDEX_DIR",
+        str(Path(__file__).parent.parent / "vectorstore" / "faiss")
+    )
+
     # PINECONE 벡터 스토어 설정
     PINECONE_API_KEY: str = os.getenv("PINECONE_API_KEY", "")
     PINECONE_INDEX_NAME: str = os.getenv("PINECONE_INDEX_NAME", "chatbot-courses")
+    # 검색을 REST API로 직접 비동기 호출 (false면 SDK를 스레드 풀에서 실행)
+    PINECONE_ASYNC_HTTP: bool = os.getenv("PINECONE_ASYNC_HTTP", "true").lower() == "true"
+    PINECONE_INDEX_HOST: str = os.getenv("PINECONE_INDEX_HOST", "")  # 비우면 시작 시 describe_index로 조회
+    PINECONE_API_VERSION: str = os.getenv("PINECONE_API_VERSION", "2024-07")
+    PINECONE_MAX_CONNECTIONS: int = int(os.getenv("PINECONE_MAX_CONNECTIONS", "50"))
+    PINECONE_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("PINECONE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    PINECONE_TIMEOUT_SECONDS: float = float(os.getenv("PINECONE_TIMEOUT_SECONDS", "5.0"))
+    PINECONE_MAX_RETRIES: int = int(os.getenv("PINECONE_MAX_RETRIES", "2"))
+    # 쿼리 임베딩 LRU 캐시 크기 (0이면 비활성화)
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    # 동시 임베딩 요청 마이크로 배칭 (최대 배치 크기 / 배치 수집 대기 시간)
+    EMBEDDING_BATCH_ENABLED: bool = os.getenv("EMBEDDING_BATCH_ENABLED", "true").lower() == "true"
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "16"))
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+    # 하이브리드 검색 (BM25 + 밀집 검색을 RRF로 융합, 문서 파일이 없으면 밀집 검색만 사용)
+    HYBRID_SEARCH_ENABLED: bool = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    LEXICAL_CORPUS_PATH: str = os.getenv(
+        "LEXICAL_CORPUS_PATH",
+        str(Path(__file__).parent.parent / "vectorstore" / "documents.jsonl")
+    )
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "10"))  # 검색기별 후보 수
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    # 질문의 교수명/과목명을 사전(metadata_stats.json)에서 찾아 메타데이터 필터로 적용
+    GAZETTEER_ENABLED: bool = os.getenv("GAZETTEER_ENABLED", "true").lower() == "true"
+    # 벡터화 스크립트가 저장하는 메타데이터 통계 파일 (index_version으로 인덱스 재구축 감지)
+    VECTORSTORE_STATS_PATH: str = os.getenv(
+        "VECTORSTORE_STATS_PATH",
+        str(Path(__file__).parent.parent / "vectorstore" / "metadata_stats.json")
+    )
+
+    # 채팅 파이프라인 설정
+    # 의도 분류와 벡터 검색을 동시에 시작 (일상 대화로 분류되면 검색 결과는 폐기)
+    SPECULATIVE_RETRIEVAL: bool = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+    # 의도 분류 방식: local(임베딩 기반, 확신도 낮으면 LLM으로 대체) | llm(항상 HyperCLOVA 호출)
+    INTENT_CLASSIFIER: str = os.getenv("INTENT_CLASSIFIER", "local")
+    # 로컬 분류 시 1, 2위 의도 유사도 차이가 이 값보다 작으면 LLM으로 대체
+    INTENT_CONFIDENCE_MARGIN: float = float(os.getenv("INTENT_CONFIDENCE_MARGIN", "0.05"))
+
+    # 의미(semantic) 답변 캐시 설정
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_DISTANCE: float = float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.05"))  # 코사인 거리
+    ANSWER_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    ANSWER_CACHE_MAX_MB: int = int(os.getenv("ANSWER_CACHE_MAX_MB", "64"))
+    ANSWER_CACHE_INDEX_POLL_SECONDS: int = int(os.getenv("ANSWER_CACHE_INDEX_POLL_SECONDS", "30"))  # 인덱스 버전 확인 주기 (metadata_stats.json / MongoDB)
+
+    # 답변 생성 컨텍스트 패킹 (같은 과목/항목 청크 병합, 토큰 예산까지만 포함)
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    # HCX 계열 tokenizer.json 경로 (없으면 문자 수 기반 추정 + API usage로 보정)
+    HCX_TOKENIZER_PATH: str = os.getenv("HCX_TOKENIZER_PATH", "")
+
+    # 대화 / 메시지 목록 페이지 크기 (커서 기반 페이지네이션)
+    CONVERSATIONS_PAGE_SIZE: int = int(os.getenv("CONVERSATIONS_PAGE_SIZE", "50"))
+    CONVERSATIONS_MAX_PAGE_SIZE: int = int(os.getenv("CONVERSATIONS_MAX_PAGE_SIZE", "100"))
+    MESSAGES_PAGE_SIZE: int = int(os.getenv("MESSAGES_PAGE_SIZE", "100"))
+    MESSAGES_MAX_PAGE_SIZE: int = int(os.getenv("MESSAGES_MAX_PAGE_SIZE", "200"))
+    MESSAGE_PREVIEW_CHARS: int = int(os.getenv("MESSAGE_PREVIEW_CHARS", "120"))  # view=summary 메시지 내용 길이
+
+    # 대화 메모리 (누적 요약 + 최근 메시지)
+    MEMORY_RECENT_MESSAGES: int = int(os.getenv("MEMORY_RECENT_MESSAGES", "4"))  # 원문으로 보낼 최근 메시지 수
+    MEMORY_SUMMARY_EVERY_TURNS: int = int(os.getenv("MEMORY_SUMMARY_EVERY_TURNS", "3"))  # 요약 갱신 주기 (턴)
+    MEMORY_SUMMARY_MAX_CHARS: int = int(os.getenv("MEMORY_SUMMARY_MAX_CHARS", "500"))
+    MEMORY_TOKEN_BUDGET: int = int(os.getenv("MEMORY_TOKEN_BUDGET", "600"))  # 요약 + 최근 메시지 토큰 상한
+    SUMMARY_QUEUE_CONCURRENCY: int = int(os.getenv("SUMMARY_QUEUE_CONCURRENCY", "2"))  # 요약 갱신 백그라운드 큐
+    SUMMARY_QUEUE_MAX_SIZE: int = int(os.getenv("SUMMARY_QUEUE_MAX_SIZE", "1000"))
+    # 최근 메시지 캐시 (프로세스 내, 대화별 링 버퍼)
+    HISTORY_CACHE_ENABLED: bool = os.getenv("HISTORY_CACHE_ENABLED", "true").lower() == "true"
+    HISTORY_CACHE_MAX_CONVERSATIONS: int = int(os.getenv("HISTORY_CACHE_MAX_CONVERSATIONS", "2000"))
+    HISTORY_CACHE_MESSAGES: int = int(os.getenv("HISTORY_CACHE_MESSAGES", "8"))
+
+    # 쓰기 지연(write-behind): 봇 메시지를 저널에 기록 후 주기적으로 일괄 반영
+    WRITE_BEHIND_ENABLED: bool = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    WRITE_BEHIND_FLUSH_INTERVAL_MS: float = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "200"))
+    WRITE_BEHIND_MAX_BATCH: int = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+    WRITE_BEHIND_JOURNAL_DIR: str = os.getenv(
+        "WRITE_BEHIND_JOURNAL_DIR",
+        str(Path(__file__).parent / "data" / "write_behind")
+    )
+    WRITE_BEHIND_FSYNC: bool = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() == "true"
+
+    # 대화 제목 생성 백그라운드 큐
+    TITLE_QUEUE_CONCURRENCY: int = int(os.getenv("TITLE_QUEUE_CONCURRENCY", "2"))
+    TITLE_QUEUE_MAX_RETRIES: int = int(os.getenv("TITLE_QUEUE_MAX_RETRIES", "2"))
+    TITLE_QUEUE_MAX_SIZE: int = int(os.getenv("TITLE_QUEUE_MAX_SIZE", "1000"))
+    BACKGROUND_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT_SECONDS", "10"))
+
+    # 크로스 인코더 재순위화 설정 (sentence-transformers CrossEncoder, CPU)
+    RERANK_ENABLED: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL: str = os.getenv("RERANK_MODEL", "Dongjin-kr/ko-reranker")
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "20"))  # 재순위화 전 검색 후보 수
+    RERANK_BUDGET_MS: float = float(os.getenv("RERANK_BUDGET_MS", "300"))  # 초과 시 밀집 검색 순서 사용
+    RERANK_MAX_LENGTH: int = int(os.getenv("RERANK_MAX_LENGTH", "512"))
     
     def __init__(self):
         """설정 초기화"""
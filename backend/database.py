@@ -87,3 +87,6 @@ class Collections:
     EMAIL_VERIFICATIONS = "email_verifications"
     CONVERSATIONS = "conversations"  # 대화방
     MESSAGES = "messages"  # 메시지
+    SCHEMA_MIGRATIONS = "schema_migrations"  # 실행한 마이그레이션 기록
+    RATE_LIMITS = "rate_limits"  # 요청 제한 토큰 버킷 (RATE_LIMIT_BACKEND=mongo)
+    INDEX_VERSIONS = "index_versions"  # 벡터 인덱스 버전 (재구축 시 답변 캐시 무효화)
@@ -1,139 +1,210 @@
 """
 백엔드용 PINECONE 벡터 스토어 서비스 (비동기 버전)
 LangChain 호환성 문제를 우회하여 PINECONE API v5를 직접 사용
+
+검색은 인덱스 호스트의 REST /query를 httpx 비동기 클라이언트(keep-alive 연결 풀)로 직접 호출합니다.
+(동기 SDK를 임베딩용 스레드 풀에서 실행하면 느린 Pinecone 호출과 임베딩이 서로를 막음)
+PINECONE_ASYNC_HTTP=false이면 기존 SDK + 스레드 풀 경로를 사용합니다.
+
+get_vectorstore_service()는 settings.VECTORSTORE_BACKEND에 따라
+Pinecone 또는 FAISS(faiss_vector_service) 백엔드를 반환합니다.
 """
 
-import os
 import logging
 import asyncio
 from typing import List, Dict, Any, Optional
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 
-# HuggingFace 임베딩 모델 사용 (한국어 특화)
-try:
-    from langchain_huggingface import HuggingFaceEmbeddings
-except ImportError:
-    from langchain_community.embeddings import HuggingFaceEmbeddings
+import httpx
 
 # PINECONE API v5 사용 (동기 클라이언트를 비동기로 래핑)
 from pinecone import Pinecone
-import json
 
 from config import settings
+from vectorstore_base import BaseVectorStoreService
+from services.gazetteer import MetadataFilter, to_pinecone_filter
 
 logger = logging.getLogger(__name__)
 
 
-class DirectPineconeVectorStoreService:
+class DirectPineconeVectorStoreService(BaseVectorStoreService):
     """PINECONE API 직접 사용 벡터 스토어 서비스 (비동기)"""
     
+    backend_name = "pinecone"
+    
     def __init__(self):
         """서비스 초기화"""
-        self.embeddings = None
         self.pc = None
         self.index = None
-        self._executor = ThreadPoolExecutor(max_workers=4)  # I/O 및 CPU 바운드 작업을 위한 스레드 풀
-        self._initialize()
+        self.index_host: Optional[str] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.http_retries = 0
+        super().__init__()
     
-    def _initialize(self):
-        """벡터 스토어 초기화"""
-        try:
-            # 임베딩 모델 초기화
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="jhgan/ko-sroberta-multitask",
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
+    def _initialize_backend(self):
+        """PINECONE 클라이언트 초기화"""
+        if settings.PINECONE_API_KEY:
+            self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+            self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
+            if settings.PINECONE_ASYNC_HTTP:
+                host = settings.PINECONE_INDEX_HOST or self.pc.describe_index(settings.PINECONE_INDEX_NAME).host
+                self.index_host = host if host.startswith("http") else f"https://{host}"
+            logger.info(
+                f"PINECONE 벡터 스토어 로딩 완료: {settings.PINECONE_INDEX_NAME} "
+                f"(비동기 HTTP: {self.index_host or '사용 안 함'})"
             )
-            logger.info("임베딩 모델 초기화 완료")
-            
-            # PINECONE 클라이언트 초기화
-            if settings.PINECONE_API_KEY:
-                self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-                self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
-                logger.info(f"PINECONE 벡터 스토어 로딩 완료: {settings.PINECONE_INDEX_NAME}")
-            else:
-                logger.error("PINECONE API 키가 설정되지 않았습니다.")
-                raise ValueError("PINECONE_API_KEY가 필요합니다.")
-                
-        except Exception as e:
-            logger.error(f"벡터 스토어 초기화 실패: {e}")
-            raise
+        else:
+            logger.error("PINECONE API 키가 설정되지 않았습니다.")
+            raise ValueError("PINECONE_API_KEY가 필요합니다.")
     
-    async def _embed_query_async(self, query: str) -> List[float]:
-        """임베딩 생성 (CPU 바운드 작업을 스레드 풀에서 실행)"""
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(
-            self._executor,
-            self.embeddings.embed_query,
-            query
-        )
-        return embedding
+    def is_ready(self) -> bool:
+        return self.index is not None
+    
+    def describe(self) -> Dict[str, Any]:
+        return {"index_name": settings.PINECONE_INDEX_NAME, "async_http": self.index_host is not None}
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Pinecone 데이터 플레인용 비동기 HTTP 클라이언트 반환 (연결 풀 공유)"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                base_url=self.index_host,
+                headers={
+                    "Api-Key": settings.PINECONE_API_KEY,
+                    "X-Pinecone-API-Version": settings.PINECONE_API_VERSION,
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(settings.PINECONE_TIMEOUT_SECONDS, connect=min(settings.PINECONE_TIMEOUT_SECONDS, 3.0)),
+                limits=httpx.Limits(
+                    max_connections=settings.PINECONE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.PINECONE_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        return self._http_client
     
-    def _query_pinecone(self, query_embedding: List[float], k: int):
+    async def close(self):
+        """HTTP 클라이언트 종료"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
+    def metrics(self) -> Dict[str, Any]:
+        return {**super().metrics(), "http_retries": self.http_retries}
+    
+    async def _query_http(
+        self,
+        query_embedding: List[float],
+        k: int,
+        pinecone_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pinecone REST /query 비동기 호출 (타임아웃, 429/5xx/네트워크 오류 시 지수 백오프 재시도)
+        
+        Returns:
+            matches 리스트 [{"id", "score", "metadata"}, ...]
+        """
+        payload = {
+            "vector": list(query_embedding),
+            "topK": k,
+            "includeMetadata": True
+        }
+        if pinecone_filter:
+            payload["filter"] = pinecone_filter
+        
+        client = self._get_http_client()
+        max_retries = settings.PINECONE_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            try:
+                response = await client.post("/query", json=payload)
+                response.raise_for_status()
+                return response.json().get("matches", [])
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or (
+                    e.response.status_code == 429 or e.response.status_code >= 500
+                )
+                if not retryable or attempt == max_retries:
+                    raise
+                self.http_retries += 1
+                wait_time = 0.1 * (2 ** attempt)
+                logger.warning(f"PINECONE 쿼리 재시도 {attempt + 1}/{max_retries} ({wait_time:.1f}초 후): {e}")
+                await asyncio.sleep(wait_time)
+        return []
+    
+    def _query_pinecone(self, query_embedding: List[float], k: int, pinecone_filter: Optional[Dict[str, Any]] = None):
         """Pinecone 쿼리 헬퍼 메서드 (스레드 풀에서 실행)"""
         return self.index.query(
             vector=query_embedding,
             top_k=k,
-            include_metadata=True
+            include_metadata=True,
+            filter=pinecone_filter
         )
     
-    async def similarity_search(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
-        """
-        유사도 검색 수행 (비동기)
+    async def _search_vectors(
+        self,
+        query_embedding: List[float],
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """PINECONE에서 비동기 검색 (메타데이터 필터는 서버 측에서 적용)"""
+        pinecone_filter = to_pinecone_filter(metadata_filter) if metadata_filter else None
         
-        Args:
-            query: 검색 쿼리
-            k: 반환할 결과 수
-            
-        Returns:
-            검색 결과 리스트
-        """
-        try:
-            if not self.index:
-                raise ValueError("PINECONE이 초기화되지 않았습니다.")
-            
-            # 쿼리를 벡터로 변환 (비동기 - 스레드 풀 사용)
-            query_embedding = await self._embed_query_async(query)
-            
-            # PINECONE에서 비동기 검색 (동기 호출을 스레드 풀에서 실행)
+        if self.index_host:
+            matches = await self._query_http(query_embedding, k, pinecone_filter)
+        else:
+            # SDK 경로: 동기 호출을 스레드 풀에서 실행
             loop = asyncio.get_event_loop()
             results = await loop.run_in_executor(
                 self._executor,
                 self._query_pinecone,
                 query_embedding,
-                k
+                k,
+                pinecone_filter
             )
-            
-            # 결과를 LangChain 형식으로 변환
-            documents = []
-            for match in results.matches:
-                # 실제 본문 텍스트 반환
-                doc = {
-                    "page_content": match.metadata.get("text", ""),  # 실제 본문
-                    "metadata": match.metadata
-                }
-                documents.append(doc)
-            
-            logger.info(f"검색 완료: {len(documents)}개 결과")
-            return documents
-            
-        except Exception as e:
-            logger.error(f"검색 실패: {e}")
-            return []
-    
-    async def get_relevant_documents(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
-        """LangChain 호환 메서드 (비동기)"""
-        return await self.similarity_search(query, k)
+            matches = [
+                {"id": match.id, "score": match.score, "metadata": match.metadata}
+                for match in results.matches
+            ]
+        
+        # 결과를 LangChain 형식으로 변환
+        documents = []
+        for match in matches:
+            metadata = match.get("metadata") or {}
+            # 실제 본문 텍스트 반환
+            doc = {
+                "id": match["id"],
+                "page_content": metadata.get("text", ""),  # 실제 본문
+                "metadata": metadata,
+                "score": match.get("score")
+            }
+            documents.append(doc)
+        return documents
 
 
 # 싱글톤 인스턴스
 _vectorstore_service = None
 
 
-def get_vectorstore_service() -> DirectPineconeVectorStoreService:
-    """벡터 스토어 서비스 싱글톤 인스턴스 반환"""
+def get_vectorstore_service() -> BaseVectorStoreService:
+    """벡터 스토어 서비스 싱글톤 인스턴스 반환 (VECTORSTORE_BACKEND: pinecone | faiss)"""
     global _vectorstore_service
     if _vectorstore_service is None:
-        _vectorstore_service = DirectPineconeVectorStoreService()
+        backend = settings.VECTORSTORE_BACKEND.lower()
+        if backend == "faiss":
+            from faiss_vector_service import FaissVectorStoreService
+            _vectorstore_service = FaissVectorStoreService()
+        elif backend == "pinecone":
+            _vectorstore_service = DirectPineconeVectorStoreService()
+        else:
+            raise ValueError(f"지원하지 않는 VECTORSTORE_BACKEND입니다: {settings.VECTORSTORE_BACKEND}")
     return _vectorstore_service
+
+
+def get_vectorstore_metrics() -> Optional[Dict[str, Any]]:
+    """벡터 스토어 서비스 통계 반환 (초기화 전이면 None, 초기화를 유발하지 않음)"""
+    if _vectorstore_service is None:
+        return None
+    return _vectorstore_service.metrics()
+
+
+async def close_vectorstore_service():
+    """벡터 스토어 서비스 리소스 정리 (초기화 전이면 아무것도 하지 않음)"""
+    if _vectorstore_service is not None:
+        await _vectorstore_service.close()
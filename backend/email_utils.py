@@ -1,7 +1,6 @@
 """
 이메일 발송 유틸리티
 """
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
@@ -10,6 +9,7 @@ import logging
 from typing import Optional
 from config import settings
 from database import Collections, db_instance
+from services.mail_dispatcher import enqueue_mail
 
 logger = logging.getLogger(__name__)
 
@@ -118,7 +118,9 @@ async def verify_token(token: str) -> Optional[str]:
 
 async def send_verification_email(email: str, token: str, frontend_url: str = "http://localhost:3000", is_password_reset: bool = False):
     """
-    이메일 인증 메일 발송
+    이메일 인증 메일 발송 예약
+
+    메일을 만들어 발송 큐에 넣고 바로 반환합니다 (SMTP 발송과 재시도는 services/mail_dispatcher.py 워커가 처리).
 
     Args:
         email: 수신자 이메일
@@ -130,23 +132,14 @@ async def send_verification_email(email: str, token: str, frontend_url: str = "h
     if settings.ENVIRONMENT == "production" and frontend_url == "http://localhost:3000":
         frontend_url = "http://bu-chatbot.co.kr"
     
-    # SMTP 설정
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
     smtp_user = settings.SMTP_USER
-    smtp_password = settings.SMTP_PASSWORD
 
-    # SMTP 설정 확인
-    if not smtp_user or not smtp_password:
+    # SMTP 설정 확인 (memory 백엔드는 실제로 보내지 않으므로 불필요)
+    if settings.MAIL_BACKEND.lower() == "smtp" and (not smtp_user or not settings.SMTP_PASSWORD):
         error_msg = "SMTP 설정이 없습니다. .env 파일의 SMTP_USER와 SMTP_PASSWORD를 확인하세요."
         logger.error(error_msg)
         raise ValueError(error_msg)
 
-    logger.info(f"{email}로 이메일 인증 메일을 발송합니다...")
-    logger.info(f"SMTP Server: {smtp_server}:{smtp_port}")
-    logger.info(f"SMTP User: {smtp_user}")
-    logger.info(f"Password Length: {len(smtp_password)} characters")
-
     try:
 
         # 이메일 메시지 생성
@@ -231,23 +224,12 @@ async def send_verification_email(email: str, token: str, frontend_url: str = "h
         msg.attach(part1)
         msg.attach(part2)
 
-        # SMTP 서버 연결 및 이메일 발송
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-
-        logger.info(f"✓ 이메일 인증 메일 발송 완료: {email}")
-
-    except smtplib.SMTPAuthenticationError as e:
-        logger.error(f"SMTP 인증 실패: {e}")
-        logger.error("Gmail 앱 비밀번호를 확인하세요. 일반 비밀번호가 아닌 앱 비밀번호를 사용해야 합니다.")
-        raise ValueError("이메일 발송 실패: SMTP 인증 오류")
-
-    except smtplib.SMTPException as e:
-        logger.error(f"SMTP 오류: {e}")
-        raise ValueError(f"이메일 발송 실패: {str(e)}")
-
     except Exception as e:
-        logger.error(f"이메일 발송 중 예상치 못한 오류: {e}", exc_info=True)
+        logger.error(f"이메일 생성 중 예상치 못한 오류: {e}", exc_info=True)
         raise ValueError(f"이메일 발송 실패: {str(e)}")
+
+    # 발송 큐에 추가 (SMTP 연결 재사용, 실패 시 백오프 재시도)
+    if not enqueue_mail(msg):
+        raise ValueError("이메일 발송 실패: 발송 대기열이 가득 찼습니다")
+
+    logger.info(f"✓ 이메일 인증 메일 발송 예약: {email}")
@@ -0,0 +1,117 @@
+"""
+백엔드용 FAISS 벡터 스토어 서비스 (프로세스 내 검색)
+
+vectorize_courses_pinecone_direct.py --backend faiss 로 생성한 로컬 인덱스를 읽어
+외부 벡터 서비스 없이 similarity_search를 수행합니다.
+
+인덱스 디렉터리 구성 (settings.FAISS_INDEX_DIR):
+    index.faiss      - 정규화된 임베딩의 IndexFlatIP (코사인 유사도)
+    documents.jsonl  - 인덱스 행 순서와 같은 순서의 {"id", "text", "metadata"}
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import faiss
+
+from config import settings
+from vectorstore_base import BaseVectorStoreService
+from services.gazetteer import MetadataFilter, matches_filter
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.faiss"
+DOCUMENTS_FILENAME = "documents.jsonl"
+
+
+class FaissVectorStoreService(BaseVectorStoreService):
+    """FAISS 로컬 인덱스 벡터 스토어 서비스 (비동기 인터페이스)"""
+
+    backend_name = "faiss"
+
+    def __init__(self):
+        """서비스 초기화"""
+        self.index_dir = Path(settings.FAISS_INDEX_DIR)
+        self.index = None
+        self.documents: List[Dict[str, Any]] = []
+        self.memory_mapped = False
+        super().__init__()
+
+    def _read_index(self, index_path: Path):
+        """인덱스 로딩 (가능하면 메모리 매핑, 지원하지 않는 인덱스 형식이면 일반 로딩)"""
+        try:
+            index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self.memory_mapped = True
+            return index
+        except RuntimeError as e:
+            logger.info(f"FAISS 메모리 매핑 로딩 불가, 일반 로딩으로 대체: {e}")
+            self.memory_mapped = False
+            return faiss.read_index(str(index_path))
+
+    def _initialize_backend(self):
+        """FAISS 인덱스와 문서 메타데이터 로딩"""
+        index_path = self.index_dir / INDEX_FILENAME
+        documents_path = self.index_dir / DOCUMENTS_FILENAME
+
+        if not index_path.exists() or not documents_path.exists():
+            raise ValueError(f"FAISS 인덱스 파일이 없습니다: {self.index_dir}")
+
+        self.index = self._read_index(index_path)
+        with open(documents_path, "r", encoding="utf-8") as f:
+            self.documents = [json.loads(line) for line in f if line.strip()]
+
+        if self.index.ntotal != len(self.documents):
+            raise ValueError(
+                f"FAISS 인덱스({self.index.ntotal})와 문서 수({len(self.documents)})가 일치하지 않습니다."
+            )
+
+        logger.info(
+            f"FAISS 벡터 스토어 로딩 완료: {self.index_dir} "
+            f"(문서 {len(self.documents)}개, 메모리 매핑: {self.memory_mapped})"
+        )
+
+    def is_ready(self) -> bool:
+        return self.index is not None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "index_dir": str(self.index_dir),
+            "documents": len(self.documents),
+            "memory_mapped": self.memory_mapped
+        }
+
+    async def _search_vectors(
+        self,
+        query_embedding: List[float],
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        프로세스 내 FAISS 검색 (수천 건 규모의 flat 검색은 1ms 내외라 스레드 풀을 거치지 않음)
+
+        메타데이터 필터가 있으면 전체 순위를 구한 뒤 조건에 맞는 문서만 상위 k개 반환
+        """
+        query = np.asarray([query_embedding], dtype=np.float32)
+        faiss.normalize_L2(query)
+        search_k = self.index.ntotal if metadata_filter else min(k, self.index.ntotal)
+        scores, indices = self.index.search(query, search_k)
+
+        documents = []
+        for score, idx in zip(scores[0], indices[0]):
+            if idx < 0:
+                continue
+            stored = self.documents[idx]
+            if not matches_filter(stored["metadata"], metadata_filter):
+                continue
+            documents.append({
+                "id": stored["id"],
+                "page_content": stored["text"],
+                "metadata": {**stored["metadata"], "text": stored["text"]},
+                "score": float(score)
+            })
+            if len(documents) >= k:
+                break
+        return documents
@@ -5,8 +5,9 @@ import httpx
 import json
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from config import settings
+from services.context_packer import pack_context, get_token_estimator
 
 logger = logging.getLogger(__name__)
 
@@ -198,7 +199,151 @@ class HyperCLOVAClient:
         
         # 모든 재시도 실패
         raise Exception("HyperCLOVA X API 호출이 최대 재시도 횟수를 초과했습니다")
-    
+
+    async def chat_text(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        chat 호출 후 응답 메시지의 텍스트만 반환 (비동기)
+
+        generate_* 메서드와 달리 실패 시 안내 문구로 대체하지 않고 예외를 그대로 전파합니다.
+        (제목 생성, 대화 요약처럼 실패를 호출자가 직접 처리하는 경우용)
+
+        Args:
+            messages: 대화 메시지 리스트
+            **kwargs: chat에 그대로 전달할 생성 옵션 (max_tokens, temperature 등)
+
+        Returns:
+            응답 텍스트 (앞뒤 공백 제거)
+        """
+        response = await self.chat(messages=messages, **kwargs)
+        return self._extract_message_text(response.get("result", {}).get("message", {})).strip()
+
+    @staticmethod
+    def _extract_message_text(message: Dict[str, Any]) -> str:
+        """메시지 객체에서 텍스트 추출 (content가 문자열/배열 모두 지원)"""
+        content = message.get("content", "")
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            texts = []
+            for item in content:
+                if isinstance(item, dict):
+                    texts.append(item.get("text", ""))
+                elif isinstance(item, str):
+                    texts.append(item)
+            return "".join(texts)
+        return ""
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 500,
+        temperature: float = 0.5,
+        top_k: int = 99,
+        top_p: float = 0.8,
+        repetition_penalty: float = 1.05,
+        stop: List[str] = None,
+        seed: int = 0,
+        include_ai_filters: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        HyperCLOVA X v3 Chat Completions API 스트리밍 호출 (SSE)
+
+        토큰이 생성되는 대로 텍스트 조각을 반환합니다.
+        재시도는 첫 토큰을 받기 전(연결/상태 코드 오류)까지만 수행합니다.
+
+        Args:
+            chat()과 동일
+
+        Yields:
+            생성된 텍스트 조각
+        """
+        max_retries = 3
+        backoff_factor = 0.5
+
+        v3_messages = self._convert_messages_to_v3_format(messages)
+        payload = {
+            "messages": v3_messages,
+            "topP": top_p,
+            "topK": top_k,
+            "maxTokens": max_tokens,
+            "temperature": temperature,
+            "repetitionPenalty": repetition_penalty,
+            "stop": stop if stop else [],
+            "seed": seed,
+            "includeAiFilters": include_ai_filters
+        }
+        url = self.HOST + self.API_ENDPOINT
+
+        for attempt in range(max_retries):
+            started = False
+            try:
+                client = await self._get_client()
+                headers = self._build_headers()
+                headers["Accept"] = "text/event-stream"
+
+                logger.info(f"HyperCLOVA X v3 스트리밍 API 호출 중... (메시지 수: {len(messages)}, 시도: {attempt + 1})")
+
+                async with client.stream("POST", url, headers=headers, json=payload) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                    response.raise_for_status()
+
+                    event = None
+                    async for line in response.aiter_lines():
+                        if not line:
+                            event = None
+                            continue
+                        if line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                            continue
+                        if not line.startswith("data:"):
+                            continue
+
+                        data = line[len("data:"):].strip()
+                        if event == "result":
+                            logger.info("HyperCLOVA X 스트리밍 완료")
+                            return
+                        if event == "error":
+                            raise ValueError(f"HyperCLOVA X 스트리밍 오류: {data}")
+                        if event != "token":
+                            continue
+
+                        try:
+                            chunk = json.loads(data)
+                        except json.JSONDecodeError:
+                            logger.warning(f"스트리밍 데이터 파싱 실패: {data[:100]}")
+                            continue
+
+                        text = self._extract_message_text(chunk.get("message", {}))
+                        if text:
+                            started = True
+                            yield text
+                return
+
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                logger.error(f"HyperCLOVA X 스트리밍 API 호출 실패 (HTTP {status_code}): {e}")
+
+                if status_code in [408, 429, 500, 502, 503, 504] and attempt < max_retries - 1:
+                    wait_time = backoff_factor * (2 ** attempt)
+                    logger.info(f"{wait_time}초 후 재시도...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise
+
+            except httpx.RequestError as e:
+                logger.error(f"HyperCLOVA X 스트리밍 API 네트워크 오류: {e}")
+
+                # 이미 토큰을 내보낸 뒤에는 재시도하면 답변이 중복되므로 중단
+                if not started and attempt < max_retries - 1:
+                    wait_time = backoff_factor * (2 ** attempt)
+                    logger.info(f"{wait_time}초 후 재시도...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise
+
+        raise Exception("HyperCLOVA X 스트리밍 API 호출이 최대 재시도 횟수를 초과했습니다")
+
     async def classify_intent(self, query: str) -> str:
         """
         사용자 질문의 의도 분류 (비동기)
@@ -261,24 +406,48 @@ class HyperCLOVAClient:
             # 오류 시 안전하게 수업 관련으로 처리
             return 'course_related'
     
-    async def generate_answer(
+    @staticmethod
+    def _build_history_messages(
+        system_prompt: str,
+        message_history: List[Dict[str, str]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        시스템 프롬프트 + 대화 히스토리 메시지 구성
+        
+        히스토리의 system 메시지(대화 메모리 요약)는 시스템 프롬프트 뒤에 합쳐 하나의 system 메시지로 보냅니다.
+        """
+        history = message_history or []
+        memory = [msg["content"] for msg in history if msg["role"] == "system"]
+        if memory:
+            system_prompt = system_prompt + "\n\n" + "\n".join(memory)
+        
+        messages = [{"role": "system", "content": system_prompt}]
+        for hist_msg in history:
+            if hist_msg["role"] != "system":
+                messages.append({
+                    "role": hist_msg["role"],
+                    "content": hist_msg["content"]
+                })
+        return messages
+    
+    def _build_answer_messages(
         self,
         query: str,
         context_docs: List[Dict[str, Any]],
         system_prompt: str = None,
         message_history: List[Dict[str, str]] = None
-    ) -> str:
+    ) -> List[Dict[str, str]]:
         """
-        컨텍스트 기반 답변 생성 (비동기)
+        컨텍스트 기반 답변용 메시지 구성 (일반/스트리밍 공용)
         
         Args:
             query: 사용자 질문
             context_docs: 검색된 컨텍스트 문서 리스트
             system_prompt: 시스템 프롬프트 (선택)
-            message_history: 최근 대화 히스토리 (선택, 최대 3개)
+            message_history: 최근 대화 히스토리 (선택, 대화 메모리 요약 포함 가능)
         
         Returns:
-            생성된 답변 텍스트
+            API 요청용 메시지 리스트
         """
         # 기본 시스템 프롬프트 (개선된 버전)
         if system_prompt is None:
@@ -300,22 +469,12 @@ class HyperCLOVAClient:
                             - 연락처를 물어본 경우: "○○ 교수님의 연락처는 010-xxxx-xxxx입니다."
                             - 구체적 수업을 물어본 경우: 해당 수업의 상세 정보 제공"""
 
-        # 컨텍스트 구성
-        context_text = "\n\n".join([
-            f"[관련 정보 {i+1}]\n{doc.get('content', doc.get('page_content', ''))}"
-            for i, doc in enumerate(context_docs)
-        ])
+        # 컨텍스트 구성 (같은 과목/항목 청크 병합, 반복 헤더 제거, 토큰 예산까지만 포함)
+        context_text = pack_context(context_docs, settings.CONTEXT_TOKEN_BUDGET)
         
         # 메시지 구성 (시스템 프롬프트 + 이전 대화 히스토리 + 현재 질문)
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # 이전 대화 히스토리 추가 (있는 경우)
-        if message_history and len(message_history) > 0:
-            for hist_msg in message_history:
-                messages.append({
-                    "role": hist_msg["role"],
-                    "content": hist_msg["content"]
-                })
+        messages = self._build_history_messages(system_prompt, message_history)
+        if message_history:
             logger.info(f"대화 히스토리 {len(message_history)}개를 컨텍스트에 포함")
         
         # 현재 질문과 컨텍스트 추가
@@ -328,6 +487,28 @@ class HyperCLOVAClient:
 위 정보를 바탕으로 질문에 답변해주세요."""
         
         messages.append({"role": "user", "content": user_content})
+        return messages
+    
+    async def generate_answer(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        system_prompt: str = None,
+        message_history: List[Dict[str, str]] = None
+    ) -> str:
+        """
+        컨텍스트 기반 답변 생성 (비동기)
+        
+        Args:
+            query: 사용자 질문
+            context_docs: 검색된 컨텍스트 문서 리스트
+            system_prompt: 시스템 프롬프트 (선택)
+            message_history: 최근 대화 히스토리 (선택, 대화 메모리 요약 포함 가능)
+        
+        Returns:
+            생성된 답변 텍스트
+        """
+        messages = self._build_answer_messages(query, context_docs, system_prompt, message_history)
         
         # API 호출
         response = await self.chat(
@@ -339,6 +520,12 @@ class HyperCLOVAClient:
             repetition_penalty=1.05
         )
         
+        # 실제 입력 토큰 수로 컨텍스트 패킹용 토큰 추정 비율 보정
+        usage = response.get("result", {}).get("usage") or {}
+        if usage.get("promptTokens"):
+            estimator = get_token_estimator()
+            estimator.calibrate(estimator.count_messages(messages), usage["promptTokens"])
+        
         # 답변 추출 (HyperCLOVA X v3 응답 형식)
         # 응답 형식: {"status": {...}, "result": {"message": {"role": "assistant", "content": [{"type": "text", "text": "..."}]}, "usage": {...}}}
         try:
@@ -371,16 +558,41 @@ class HyperCLOVAClient:
             logger.error(f"전체 응답: {json.dumps(response, ensure_ascii=False, indent=2)}")
             raise
     
-    async def generate_casual_answer(self, query: str, message_history: List[Dict[str, str]] = None) -> str:
+    async def generate_answer_stream(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        system_prompt: str = None,
+        message_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
         """
-        일상 대화 답변 생성 (컨텍스트 없이, 비동기)
+        컨텍스트 기반 답변 스트리밍 생성 (generate_answer의 스트리밍 버전)
+        
+        Yields:
+            생성된 답변 텍스트 조각
+        """
+        messages = self._build_answer_messages(query, context_docs, system_prompt, message_history)
+        
+        async for text in self.chat_stream(
+            messages=messages,
+            max_tokens=500,
+            temperature=0.5,
+            top_p=0.8,
+            top_k=99,
+            repetition_penalty=1.05
+        ):
+            yield text
+    
+    def _build_casual_messages(self, query: str, message_history: List[Dict[str, str]] = None) -> List[Dict[str, str]]:
+        """
+        일상 대화용 메시지 구성 (일반/스트리밍 공용)
         
         Args:
             query: 사용자 질문
-            message_history: 최근 대화 히스토리 (선택, 최대 3개)
+            message_history: 최근 대화 히스토리 (선택, 대화 메모리 요약 포함 가능)
             
         Returns:
-            생성된 답변 텍스트
+            API 요청용 메시지 리스트
         """
         system_prompt = """당신은 친근하고 도움이 되는 대학교 수업 안내 챗봇입니다.
                         학생들과 자연스럽게 대화하며, 필요한 경우 수업계획서 관련 질문을 하도록 안내해주세요.
@@ -391,19 +603,26 @@ class HyperCLOVAClient:
                         3. 수업 관련 질문이 있다면 구체적으로 물어보도록 유도
                         4. 이전 대화 내용을 참고하여 맥락에 맞는 답변 제공"""
 
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # 이전 대화 히스토리 추가 (있는 경우)
-        if message_history and len(message_history) > 0:
-            for hist_msg in message_history:
-                messages.append({
-                    "role": hist_msg["role"],
-                    "content": hist_msg["content"]
-                })
+        messages = self._build_history_messages(system_prompt, message_history)
+        if message_history:
             logger.info(f"일상 대화 - 히스토리 {len(message_history)}개를 컨텍스트에 포함")
         
         # 현재 질문 추가
         messages.append({"role": "user", "content": query})
+        return messages
+    
+    async def generate_casual_answer(self, query: str, message_history: List[Dict[str, str]] = None) -> str:
+        """
+        일상 대화 답변 생성 (컨텍스트 없이, 비동기)
+        
+        Args:
+            query: 사용자 질문
+            message_history: 최근 대화 히스토리 (선택, 대화 메모리 요약 포함 가능)
+            
+        Returns:
+            생성된 답변 텍스트
+        """
+        messages = self._build_casual_messages(query, message_history)
         
         try:
             response = await self.chat(
@@ -435,6 +654,33 @@ class HyperCLOVAClient:
             logger.error(f"일상 대화 답변 생성 실패: {e}")
             return "죄송합니다. 답변을 생성하는 중 오류가 발생했습니다."
     
+    async def generate_casual_answer_stream(self, query: str, message_history: List[Dict[str, str]] = None) -> AsyncIterator[str]:
+        """
+        일상 대화 답변 스트리밍 생성 (generate_casual_answer의 스트리밍 버전)
+        
+        Yields:
+            생성된 답변 텍스트 조각
+        """
+        messages = self._build_casual_messages(query, message_history)
+        
+        started = False
+        try:
+            async for text in self.chat_stream(
+                messages=messages,
+                max_tokens=200,
+                temperature=0.7,
+                top_p=0.9
+            ):
+                started = True
+                yield text
+        except Exception as e:
+            logger.error(f"일상 대화 스트리밍 답변 생성 실패: {e}")
+            # 아직 아무것도 보내지 않았다면 일반 버전과 동일한 안내 문구로 대체
+            if not started:
+                yield "죄송합니다. 답변을 생성하는 중 오류가 발생했습니다."
+            else:
+                raise
+    
     def _generate_mock_answer(self, query: str, context_docs: List[Dict[str, Any]]) -> str:
         """
         Mock 응답 생성 (API 키 문제 해결 전까지 임시 사용)
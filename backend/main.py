@@ -7,15 +7,29 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
+import asyncio
 import uvicorn
 import logging
 from config import settings
-from direct_pinecone_service import get_vectorstore_service
+from direct_pinecone_service import get_vectorstore_service, get_vectorstore_metrics, close_vectorstore_service
 from hyperclova_client import get_hyperclova_client
 from database import db_instance, Collections
 from routers import auth, conversations
 from routers.conversations import ChatRequest, ChatResponse
 from auth_utils import get_current_user
+from services.stage_metrics import stage_metrics
+from services.answer_cache import get_answer_cache, watch_index_version
+from services.reranker import get_reranker
+from services.single_flight import answer_flight
+from services.background_queue import title_queue
+from services.conversation_memory import summary_queue
+from services.write_behind import get_write_behind_buffer
+from services.history_cache import get_history_cache
+from services.token_cache import get_token_cache
+from services.password_hasher import get_password_hasher
+from services.rate_limiter import get_rate_limiter
+from services.mail_dispatcher import mail_queue, get_mailer, close_mailer
+from migrations.runner import bootstrap_database
 
 # 로깅 설정
 logging.basicConfig(
@@ -106,6 +120,45 @@ async def startup_db_client():
     await db_instance.connect_db()
     logger.info("MongoDB Atlas 연결 완료")
 
+    # 인덱스 적용 + 대기 중인 마이그레이션 (실패해도 서비스는 시작)
+    if settings.DB_BOOTSTRAP_ON_STARTUP:
+        try:
+            await bootstrap_database(db_instance.get_database())
+        except Exception as e:
+            logger.error(f"DB 부트스트랩 실패: {e}", exc_info=True)
+
+    # 쓰기 지연 버퍼: 이전 실행이 남긴 저널 복구 후 주기적 반영 시작
+    write_behind = get_write_behind_buffer()
+    if write_behind:
+        await write_behind.start()
+
+    # 다른 호스트에서 벡터 인덱스를 재구축해도 답변 캐시가 무효화되도록 버전 감시
+    if get_answer_cache():
+        app.state.index_version_watcher = asyncio.create_task(
+            watch_index_version(settings.ANSWER_CACHE_INDEX_POLL_SECONDS)
+        )
+
+    # 재순위화 모델은 첫 요청을 막지 않도록 백그라운드에서 로딩
+    reranker = get_reranker()
+    if reranker:
+        asyncio.create_task(reranker.warmup())
+
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    """앱 종료 시 남은 백그라운드 작업 처리 후 외부 연결 정리"""
+    index_version_watcher = getattr(app.state, "index_version_watcher", None)
+    if index_version_watcher:
+        index_version_watcher.cancel()
+    await title_queue.drain(timeout=settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+    await summary_queue.drain(timeout=settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+    await close_mailer()
+    write_behind = get_write_behind_buffer()
+    if write_behind:
+        await write_behind.stop()
+    await close_vectorstore_service()
+    await db_instance.close_db()
+
 
 @router.get("/")
 async def root():
@@ -126,31 +179,32 @@ async def health_check():
         "checks": {}
     }
     
-    # Pinecone 연결 상태 확인
-    pinecone_status = "unknown"
+    # 벡터 스토어 연결 상태 확인 (백엔드 이름으로 표시: pinecone | faiss)
+    vectorstore_check = settings.VECTORSTORE_BACKEND.lower()
+    vectorstore_status = "unknown"
     try:
         vectorstore = get_vectorstore_service()
-        if vectorstore and vectorstore.index:
+        if vectorstore and vectorstore.is_ready():
             # 간단한 연결 테스트 (인덱스 정보 확인)
             # 실제 쿼리는 하지 않고 클라이언트만 확인
-            pinecone_status = "healthy"
-            health_status["checks"]["pinecone"] = {
+            vectorstore_status = "healthy"
+            health_status["checks"][vectorstore_check] = {
                 "status": "healthy",
-                "index_name": settings.PINECONE_INDEX_NAME
+                **vectorstore.describe()
             }
         else:
-            pinecone_status = "unhealthy"
-            health_status["checks"]["pinecone"] = {
+            vectorstore_status = "unhealthy"
+            health_status["checks"][vectorstore_check] = {
                 "status": "unhealthy",
-                "error": "Pinecone index not initialized"
+                "error": "Vector store index not initialized"
             }
     except Exception as e:
-        pinecone_status = "unhealthy"
-        health_status["checks"]["pinecone"] = {
+        vectorstore_status = "unhealthy"
+        health_status["checks"][vectorstore_check] = {
             "status": "unhealthy",
             "error": str(e)
         }
-        logger.warning(f"Pinecone health check failed: {e}")
+        logger.warning(f"Vector store health check failed: {e}")
     
     hyperclova_status = "unknown"
     try:
@@ -175,7 +229,7 @@ async def health_check():
         logger.warning(f"HyperCLOVA health check failed: {e}")
     
     # 전체 상태 결정 (하나라도 unhealthy면 unhealthy)
-    if pinecone_status == "unhealthy" or hyperclova_status == "unhealthy":
+    if vectorstore_status == "unhealthy" or hyperclova_status == "unhealthy":
         health_status["status"] = "unhealthy"
         # HTTP 503 반환 (로드 밸런서가 헬스 체크 실패로 인식)
         return JSONResponse(status_code=503, content=health_status)
@@ -188,10 +242,29 @@ async def metrics():
     if not settings.ENABLE_METRICS:
         return {"message": "Metrics disabled"}
     
+    answer_cache = get_answer_cache()
+    reranker = get_reranker()
+    write_behind = get_write_behind_buffer()
+    history_cache = get_history_cache()
+    token_cache = get_token_cache()
+    rate_limiter = get_rate_limiter()
     return {
         "environment": settings.ENVIRONMENT,
         "debug": settings.DEBUG,
-        "log_level": settings.LOG_LEVEL
+        "log_level": settings.LOG_LEVEL,
+        "chat_stages": stage_metrics.snapshot(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "reranker": reranker.stats() if reranker else None,
+        "answer_single_flight": answer_flight.stats(),
+        "title_queue": title_queue.stats(),
+        "summary_queue": summary_queue.stats(),
+        "mail_queue": {**mail_queue.stats(), **get_mailer().stats()},
+        "write_behind": write_behind.stats() if write_behind else None,
+        "history_cache": history_cache.stats() if history_cache else None,
+        "jwt_cache": token_cache.stats() if token_cache else None,
+        "password_hasher": get_password_hasher().stats(),
+        "rate_limiter": rate_limiter.stats() if rate_limiter else None,
+        "vectorstore": get_vectorstore_metrics()
     }
 
 
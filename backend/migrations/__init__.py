@@ -0,0 +1,3 @@
+"""
+MongoDB 데이터 마이그레이션
+"""
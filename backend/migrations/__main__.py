@@ -0,0 +1,37 @@
+"""
+DB 부트스트랩 CLI
+
+    cd backend && python -m migrations [apply|status]
+"""
+import sys
+import json
+import asyncio
+import logging
+
+from database import db_instance
+from migrations.runner import bootstrap_database, database_status
+
+
+async def main(command: str) -> int:
+    await db_instance.connect_db()
+    try:
+        db = db_instance.get_database()
+        if command == "status":
+            report = await database_status(db)
+            print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+            return 1 if report["drift"] or report["pending_migrations"] else 0
+
+        report = await bootstrap_database(db)
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        return 1 if report["indexes"]["errors"] else 0
+    finally:
+        await db_instance.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "apply"
+    if command not in ("apply", "status"):
+        print("사용법: python -m migrations [apply|status]")
+        sys.exit(2)
+    sys.exit(asyncio.run(main(command)))
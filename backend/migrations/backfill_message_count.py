@@ -0,0 +1,96 @@
+"""
+대화방 message_count 백필 마이그레이션
+
+메시지 순서를 대화방 문서의 message_count 카운터로 예약하기 전에 만들어진 대화방에
+기존 메시지의 최대 order + 1을 카운터로 저장합니다.
+(이미 카운터가 있는 대화방은 건드리지 않으므로 여러 번 실행해도 안전)
+
+실행:
+    cd backend && python -m migrations.backfill_message_count
+"""
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from database import Collections, db_instance
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def next_order_pipeline(conversation_ids: list) -> list:
+    """대화방별 다음 메시지 순서 (기존 메시지 최대 order + 1) 집계 파이프라인"""
+    return [
+        {"$match": {"conversation_id": {"$in": conversation_ids}}},
+        {"$group": {"_id": "$conversation_id", "next_order": {"$max": {"$add": ["$order", 1]}}}}
+    ]
+
+
+async def next_message_order(messages_collection, conversation_id) -> int:
+    """
+    대화방의 다음 메시지 순서 (메시지가 없으면 0)
+
+    카운터가 없는 대화방에서 채팅 턴을 처리할 때도 백필과 같은 값으로 카운터를 맞추기 위해 사용합니다.
+    """
+    async for row in messages_collection.aggregate(next_order_pipeline([conversation_id])):
+        return row["next_order"]
+    return 0
+
+
+async def migrate(db) -> int:
+    """
+    message_count가 없는 대화방에 카운터 백필
+
+    Args:
+        db: Motor 데이터베이스 인스턴스
+
+    Returns:
+        갱신된 대화방 수
+    """
+    conversations_collection = db[Collections.CONVERSATIONS]
+    messages_collection = db[Collections.MESSAGES]
+
+    missing_ids = [
+        doc["_id"]
+        async for doc in conversations_collection.find({"message_count": {"$exists": False}}, {"_id": 1})
+    ]
+    if not missing_ids:
+        logger.info("message_count 백필 대상 없음")
+        return 0
+
+    updated = 0
+    for start in range(0, len(missing_ids), BATCH_SIZE):
+        batch_ids = missing_ids[start:start + BATCH_SIZE]
+        counts = {
+            row["_id"]: row["next_order"]
+            async for row in messages_collection.aggregate(next_order_pipeline(batch_ids))
+        }
+        result = await conversations_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": conv_id, "message_count": {"$exists": False}},
+                    {"$set": {"message_count": counts.get(conv_id, 0)}}
+                )
+                for conv_id in batch_ids
+            ],
+            ordered=False
+        )
+        updated += result.modified_count
+
+    logger.info(f"message_count 백필 완료: 대화방 {updated}개")
+    return updated
+
+
+async def main():
+    await db_instance.connect_db()
+    try:
+        await migrate(db_instance.get_database())
+    finally:
+        await db_instance.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+MongoDB 인덱스 선언 및 적용
+
+필요한 인덱스를 한곳에 선언하고, 실행 중인 DB의 인덱스와 비교(drift)해 없는 것만 생성합니다.
+
+- 같은 키의 인덱스가 이미 있으면 이름이 달라도 만족한 것으로 봄
+- TTL(expireAfterSeconds)만 다르면 collMod로 변경, 그 외 옵션 차이는 자동으로 삭제하지 않고 보고만 함
+- 선언에 없는 인덱스도 보고만 함 (운영 중 수동으로 만든 인덱스일 수 있음)
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from pymongo.errors import OperationFailure
+
+from config import settings
+from database import Collections
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexSpec:
+    """인덱스 선언"""
+    collection: str
+    keys: List[Tuple[str, int]]
+    name: str
+    options: Dict[str, Any] = field(default_factory=dict)  # unique, expireAfterSeconds 등
+
+
+# 비교 대상 옵션 (기본값)
+_COMPARED_OPTIONS = {"unique": False, "sparse": False, "expireAfterSeconds": None}
+
+REQUIRED_INDEXES: List[IndexSpec] = [
+    # 대화 메시지 조회 / 정렬, 대화 메모리의 최근 메시지
+    IndexSpec(Collections.MESSAGES, [("conversation_id", 1), ("order", 1)], "conversation_order"),
+    # 사용자별 대화 목록 (updated_at, _id 내림차순 커서 페이지네이션)
+    IndexSpec(Collections.CONVERSATIONS, [("user_id", 1), ("updated_at", -1), ("_id", -1)], "user_updated_at"),
+    # 로그인 / 회원가입 중복 확인
+    IndexSpec(Collections.USERS, [("email", 1)], "email_unique", {"unique": True}),
+    # 이메일 인증 / 비밀번호 재설정
+    IndexSpec(Collections.EMAIL_VERIFICATIONS, [("token", 1)], "token"),
+    IndexSpec(Collections.EMAIL_VERIFICATIONS, [("email", 1)], "email"),
+    # 만료된 인증 문서 자동 삭제 (회원가입 단계에서 verified 문서를 확인하므로 만료 후 유예 시간을 둠)
+    IndexSpec(
+        Collections.EMAIL_VERIFICATIONS,
+        [("expires_at", 1)],
+        "expires_at_ttl",
+        {"expireAfterSeconds": settings.EMAIL_VERIFICATION_TTL_GRACE_SECONDS}
+    ),
+    # 요청 제한 버킷 정리 (가득 찰 시각이 지나면 삭제)
+    IndexSpec(Collections.RATE_LIMITS, [("expires_at", 1)], "expires_at_ttl", {"expireAfterSeconds": 0}),
+]
+
+
+def _normalize_keys(keys) -> Tuple[Tuple[str, int], ...]:
+    return tuple((name, int(direction)) for name, direction in keys)
+
+
+def _option_diff(spec: IndexSpec, info: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """{옵션: (선언값, 실제값)} 중 다른 것만"""
+    diff = {}
+    for option, default in _COMPARED_OPTIONS.items():
+        expected = spec.options.get(option, default)
+        actual = info.get(option, default)
+        if expected != actual:
+            diff[option] = (expected, actual)
+    return diff
+
+
+def diff_indexes(specs: List[IndexSpec], existing: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    한 컬렉션의 선언된 인덱스와 실제 인덱스 비교
+
+    Args:
+        specs: 해당 컬렉션의 인덱스 선언
+        existing: collection.index_information() 결과
+
+    Returns:
+        {"missing": [...], "mismatched": [...], "unexpected": [...]}
+    """
+    by_keys = {_normalize_keys(info["key"]): (name, info) for name, info in existing.items()}
+    declared_keys = set()
+
+    missing, mismatched = [], []
+    for spec in specs:
+        keys = _normalize_keys(spec.keys)
+        declared_keys.add(keys)
+        if keys not in by_keys:
+            missing.append({"name": spec.name, "keys": spec.keys, "options": spec.options})
+            continue
+        actual_name, info = by_keys[keys]
+        options = _option_diff(spec, info)
+        if options:
+            mismatched.append({"name": spec.name, "actual_name": actual_name, "options": options})
+
+    unexpected = [
+        {"name": name, "keys": info["key"]}
+        for name, info in existing.items()
+        if name != "_id_" and _normalize_keys(info["key"]) not in declared_keys
+    ]
+    return {"missing": missing, "mismatched": mismatched, "unexpected": unexpected}
+
+
+def _specs_by_collection(specs: List[IndexSpec]) -> Dict[str, List[IndexSpec]]:
+    grouped: Dict[str, List[IndexSpec]] = {}
+    for spec in specs:
+        grouped.setdefault(spec.collection, []).append(spec)
+    return grouped
+
+
+async def check_indexes(db, specs: List[IndexSpec] = REQUIRED_INDEXES) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """
+    실행 중인 DB의 인덱스 drift 보고 (변경하지 않음)
+
+    Returns:
+        {컬렉션: diff_indexes 결과} (차이가 있는 컬렉션만)
+    """
+    report = {}
+    for collection_name, collection_specs in _specs_by_collection(specs).items():
+        try:
+            existing = await db[collection_name].index_information()
+        except OperationFailure:
+            existing = {}  # 컬렉션이 아직 없음
+        diff = diff_indexes(collection_specs, existing)
+        if any(diff.values()):
+            report[collection_name] = diff
+    return report
+
+
+async def ensure_indexes(db, specs: List[IndexSpec] = REQUIRED_INDEXES) -> Dict[str, Any]:
+    """
+    선언된 인덱스 적용 (멱등, 여러 워커가 동시에 실행해도 안전)
+
+    Returns:
+        {"created": [...], "updated": [...], "errors": [...], "drift": 적용 후 남은 차이}
+    """
+    created, updated, errors = [], [], []
+    specs_by_name = {(spec.collection, spec.name): spec for spec in specs}
+
+    for collection_name, diff in (await check_indexes(db, specs)).items():
+        collection = db[collection_name]
+
+        for item in diff["missing"]:
+            spec = specs_by_name[(collection_name, item["name"])]
+            try:
+                await collection.create_index(spec.keys, name=spec.name, **spec.options)
+                created.append(f"{collection_name}.{spec.name}")
+            except OperationFailure as e:
+                # 예: 기존 데이터에 중복 이메일이 있어 unique 인덱스 생성 실패
+                errors.append(f"{collection_name}.{spec.name}: {e}")
+
+        for item in diff["mismatched"]:
+            if set(item["options"]) != {"expireAfterSeconds"} or item["options"]["expireAfterSeconds"][1] is None:
+                continue  # TTL 값 변경 외에는 수동 처리 (보고만)
+            spec = specs_by_name[(collection_name, item["name"])]
+            try:
+                await db.command({
+                    "collMod": collection_name,
+                    "index": {"name": item["actual_name"], "expireAfterSeconds": spec.options["expireAfterSeconds"]}
+                })
+                updated.append(f"{collection_name}.{item['actual_name']}")
+            except OperationFailure as e:
+                errors.append(f"{collection_name}.{item['actual_name']}: {e}")
+
+    return {"created": created, "updated": updated, "errors": errors, "drift": await check_indexes(db, specs)}
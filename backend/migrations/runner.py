@@ -0,0 +1,94 @@
+"""
+DB 부트스트랩: 인덱스 적용 + 데이터 마이그레이션 실행
+
+앱 시작 시(DB_BOOTSTRAP_ON_STARTUP) 또는 CLI로 실행합니다.
+
+    cd backend && python -m migrations            # 인덱스 적용 + 대기 중인 마이그레이션 실행
+    cd backend && python -m migrations status     # 변경 없이 인덱스 drift / 대기 중인 마이그레이션만 보고
+
+마이그레이션:
+- MIGRATIONS 순서대로 migrations.<이름> 모듈의 migrate(db)를 실행하고 schema_migrations 컬렉션에 기록
+- 여러 워커가 동시에 실행할 수 있으므로 각 마이그레이션은 여러 번 실행해도 안전해야 함
+"""
+import logging
+import importlib
+from datetime import datetime
+from typing import Any, Dict, List
+
+from database import Collections
+from migrations.indexes import check_indexes, ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+# 실행 순서대로 (추가만 하고 순서를 바꾸지 않음)
+MIGRATIONS: List[str] = [
+    "backfill_message_count",
+]
+
+
+async def pending_migrations(db) -> List[str]:
+    """아직 실행 기록이 없는 마이그레이션 이름"""
+    applied = {
+        doc["_id"]
+        async for doc in db[Collections.SCHEMA_MIGRATIONS].find({}, {"_id": 1})
+    }
+    return [name for name in MIGRATIONS if name not in applied]
+
+
+async def run_migrations(db) -> List[str]:
+    """
+    대기 중인 마이그레이션 실행
+
+    Returns:
+        실행한 마이그레이션 이름 (실패하면 그 이후는 실행하지 않고 예외 전파)
+    """
+    applied = []
+    for name in await pending_migrations(db):
+        module = importlib.import_module(f"migrations.{name}")
+        logger.info(f"마이그레이션 실행: {name}")
+        result = await module.migrate(db)
+        await db[Collections.SCHEMA_MIGRATIONS].update_one(
+            {"_id": name},
+            {"$setOnInsert": {"applied_at": datetime.utcnow(), "result": result}},
+            upsert=True
+        )
+        applied.append(name)
+    return applied
+
+
+def _log_drift(drift: Dict[str, Any]) -> None:
+    for collection_name, diff in drift.items():
+        for item in diff["missing"]:
+            logger.warning(f"인덱스 누락: {collection_name}.{item['name']} {item['keys']}")
+        for item in diff["mismatched"]:
+            logger.warning(f"인덱스 옵션 불일치: {collection_name}.{item['actual_name']} (선언/실제) {item['options']}")
+        for item in diff["unexpected"]:
+            logger.info(f"선언되지 않은 인덱스: {collection_name}.{item['name']} {item['keys']}")
+
+
+async def bootstrap_database(db) -> Dict[str, Any]:
+    """
+    인덱스 적용 후 대기 중인 마이그레이션 실행
+
+    Returns:
+        {"indexes": ensure_indexes 결과, "migrations": 실행한 마이그레이션 이름}
+    """
+    index_report = await ensure_indexes(db)
+    if index_report["created"] or index_report["updated"]:
+        logger.info(f"인덱스 적용: 생성 {index_report['created']}, 변경 {index_report['updated']}")
+    for error in index_report["errors"]:
+        logger.error(f"인덱스 적용 실패: {error}")
+    _log_drift(index_report["drift"])
+
+    applied = await run_migrations(db)
+    if applied:
+        logger.info(f"마이그레이션 완료: {applied}")
+
+    return {"indexes": index_report, "migrations": applied}
+
+
+async def database_status(db) -> Dict[str, Any]:
+    """변경 없이 인덱스 drift와 대기 중인 마이그레이션 보고"""
+    drift = await check_indexes(db)
+    _log_drift(drift)
+    return {"drift": drift, "pending_migrations": await pending_migrations(db)}
@@ -1,7 +1,7 @@
 """
 인증 관련 API 라우터
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from datetime import datetime, timedelta
 from bson import ObjectId
 import logging
@@ -12,7 +12,9 @@ from models.user import (
     PasswordResetRequest, PasswordResetConfirm
 )
 from database import Collections, db_instance
-from auth_utils import hash_password, verify_password, create_access_token
+from auth_utils import create_access_token, revoke_user_tokens, password_needs_rehash
+from services.password_hasher import get_password_hasher
+from services.rate_limiter import enforce_rate_limit
 from config import settings
 from email_utils import generate_verification_token, generate_password_reset_code, save_verification_token, verify_token, send_verification_email
 
@@ -31,12 +33,15 @@ router = APIRouter(
     summary="이메일 인증 요청",
     description="회원가입 전 이메일 인증 코드를 발송합니다."
 )
-async def send_verification_email_endpoint(request: EmailVerificationRequest):
+async def send_verification_email_endpoint(request: EmailVerificationRequest, http_request: Request):
     """
     이메일 인증 메일 발송 엔드포인트
 
     - **email**: 백석대학교 이메일 (@bu.ac.kr)
     """
+    # 0. 요청 제한 (IP / 이메일별, 초과 시 429)
+    await enforce_rate_limit("verification_email", http_request, request.email)
+
     try:
         # 1. 이미 인증된 이메일인지 확인
         users_collection = db_instance.get_collection(Collections.USERS)
@@ -61,7 +66,7 @@ async def send_verification_email_endpoint(request: EmailVerificationRequest):
         # 3. 토큰 저장
         await save_verification_token(request.email, token, expires_minutes=30)
 
-        # 4. 이메일 발송
+        # 4. 이메일 발송 (발송 큐에 넣고 바로 반환)
         await send_verification_email(request.email, token)
 
         logger.info(f"이메일 인증 요청: {request.email}")
@@ -206,7 +211,7 @@ async def signup(user_data: UserSignup):
             )
 
         # 3. 비밀번호 해싱
-        password_hash = hash_password(user_data.password)
+        password_hash = await get_password_hasher().hash(user_data.password)
 
         # 4. 사용자 문서 생성
         now = datetime.utcnow()
@@ -262,7 +267,7 @@ async def signup(user_data: UserSignup):
     summary="로그인",
     description="사용자 인증 후 JWT 토큰을 발급합니다."
 )
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, http_request: Request):
     """
     로그인 엔드포인트
 
@@ -271,6 +276,9 @@ async def login(credentials: UserLogin):
 
     **Returns**: JWT Access Token 및 사용자 정보
     """
+    # 0. 요청 제한 (bcrypt 검증 전, IP / 이메일별, 초과 시 429)
+    await enforce_rate_limit("login", http_request, credentials.email)
+
     try:
         # 1. 데이터베이스 연결
         users_collection = db_instance.get_collection(Collections.USERS)
@@ -291,8 +299,9 @@ async def login(credentials: UserLogin):
                 }
             )
 
-        # 3. 비밀번호 검증
-        if not verify_password(credentials.password, user["password_hash"]):
+        # 3. 비밀번호 검증 (bcrypt는 전용 스레드 풀에서 실행)
+        password_hasher = get_password_hasher()
+        if not await password_hasher.verify(credentials.password, user["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={
@@ -305,6 +314,17 @@ async def login(credentials: UserLogin):
                 }
             )
 
+        # 3.5. bcrypt 비용(BCRYPT_ROUNDS)이 바뀌었으면 새 비용으로 재해싱 (동시에 비밀번호가 바뀐 경우는 건너뜀)
+        if password_needs_rehash(user["password_hash"]):
+            try:
+                await users_collection.update_one(
+                    {"_id": user["_id"], "password_hash": user["password_hash"]},
+                    {"$set": {"password_hash": await password_hasher.hash(credentials.password)}}
+                )
+                logger.info(f"비밀번호 재해싱: {credentials.email}")
+            except Exception as e:
+                logger.warning(f"비밀번호 재해싱 실패 (다음 로그인에서 재시도): {e}")
+
         # 4. JWT 토큰 생성
         access_token = create_access_token(
             data={"sub": str(user["_id"]), "email": user["email"]}
@@ -353,12 +373,15 @@ async def login(credentials: UserLogin):
     summary="비밀번호 재설정 요청",
     description="등록된 이메일로 비밀번호 재설정 인증 코드를 발송합니다."
 )
-async def request_password_reset(request: PasswordResetRequest):
+async def request_password_reset(request: PasswordResetRequest, http_request: Request):
     """
     비밀번호 재설정 요청 엔드포인트
 
     - **email**: 등록된 이메일 (@bu.ac.kr)
     """
+    # 0. 요청 제한 (IP / 이메일별, 초과 시 429)
+    await enforce_rate_limit("password_reset", http_request, request.email)
+
     try:
         users_collection = db_instance.get_collection(Collections.USERS)
 
@@ -401,7 +424,7 @@ async def request_password_reset(request: PasswordResetRequest):
         }
         await verification_collection.insert_one(verification_doc)
 
-        # 4. 이메일 발송
+        # 4. 이메일 발송 (발송 큐에 넣고 바로 반환)
         await send_verification_email(request.email, code, is_password_reset=True)
 
         logger.info(f"비밀번호 재설정 요청: {request.email}")
@@ -487,19 +510,22 @@ async def confirm_password_reset(request: PasswordResetConfirm):
             )
 
         # 3. 비밀번호 변경
-        new_password_hash = hash_password(request.new_password)
+        new_password_hash = await get_password_hasher().hash(request.new_password)
 
-        result = await users_collection.update_one(
+        now = datetime.utcnow()
+        user = await users_collection.find_one_and_update(
             {"email": request.email},
             {
                 "$set": {
                     "password_hash": new_password_hash,
-                    "updated_at": datetime.utcnow()
+                    "updated_at": now,
+                    "tokens_valid_after": now  # 다른 워커의 JWT 캐시도 이전 토큰을 거부하도록
                 }
-            }
+            },
+            projection={"_id": 1}
         )
 
-        if result.modified_count == 0:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail={
@@ -512,8 +538,9 @@ async def confirm_password_reset(request: PasswordResetConfirm):
                 }
             )
 
-        # 4. 사용된 토큰 삭제
+        # 4. 사용된 토큰 삭제, 기존 로그인 토큰 폐기
         await verification_collection.delete_one({"_id": verification["_id"]})
+        revoke_user_tokens(str(user["_id"]))
 
         logger.info(f"비밀번호 재설정 완료: {request.email}")
 
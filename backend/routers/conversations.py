@@ -1,18 +1,36 @@
 """
 대화 관리 API 라우터
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, AsyncIterator, Tuple, Set
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
+import asyncio
+import base64
+import json
 import logging
+import time
 
+from config import settings
 from database import Collections, db_instance
 from auth_utils import get_current_user
 from hyperclova_client import get_hyperclova_client
 from direct_pinecone_service import get_vectorstore_service
-from services.title_generator import auto_generate_title
+from services.title_generator import schedule_title_generation
+from services.stage_metrics import StageTimer
+from services.intent_classifier import get_intent_classifier
+from services.answer_cache import get_answer_cache, query_entities
+from services.reranker import get_reranker
+from services.conversation_memory import (
+    build_message_history, schedule_summary_update, record_message, forget_conversation
+)
+from services.single_flight import answer_flight
+from services.write_behind import get_write_behind_buffer, ensure_conversation_flushed
+from vectorstore_base import normalize_query
+from migrations.backfill_message_count import next_message_order
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +39,28 @@ router = APIRouter(
     tags=["Conversations"]
 )
 
+# 검색 결과가 없을 때의 안내 문구
+NO_RESULTS_ANSWER = "죄송합니다. 관련 수업 정보를 찾을 수 없습니다. 다른 방식으로 질문해주시겠어요?"
+
+# 스트리밍 도중 클라이언트 연결이 끊겼을 때 부분 답변 뒤에 붙이는 안내 문구
+STREAM_INTERRUPTED_NOTICE = "(응답 생성이 중단되었습니다)"
+
+# 연결이 끊긴 스트리밍 턴의 저장 태스크 (완료 전에 GC되지 않도록 참조 유지)
+_interrupted_turn_tasks: Set[asyncio.Task] = set()
+
+# 목록 조회용 프로젝션 (응답에 쓰는 필드만 읽음, 대화 요약 등은 제외)
+CONVERSATION_LIST_PROJECTION = {"title": 1, "created_at": 1, "updated_at": 1}
+MESSAGE_FULL_PROJECTION = {"role": 1, "content": 1, "sources": 1, "order": 1, "created_at": 1}
+
+# 대화 목록 커서의 updated_at 기준 시각 (MongoDB datetime은 밀리초 정밀도)
+CURSOR_EPOCH = datetime(1970, 1, 1)
+
+# SSE 응답 헤더 (프록시 버퍼링 비활성화)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
 
 # ==================== Pydantic 모델 ====================
 
@@ -82,18 +122,39 @@ class ChatResponse(BaseModel):
 
 # ==================== 내부 헬퍼 함수 ====================
 
-async def _process_chat_message(
+async def _reserve_message_orders(
+    conversations_collection,
+    conv_object_id: ObjectId,
+    current_user_id: str,
+    now: datetime
+) -> Optional[dict]:
+    """
+    소유권 검증 + message_count를 원자적으로 2 증가시켜 메시지 순서 예약
+
+    Returns:
+        증가 전 대화방 문서 (대화방이 없거나, 소유자가 아니거나, 카운터 백필 전이면 None)
+    """
+    return await conversations_collection.find_one_and_update(
+        {"_id": conv_object_id, "user_id": ObjectId(current_user_id), "message_count": {"$exists": True}},
+        {"$inc": {"message_count": 2}, "$set": {"updated_at": now}},
+        projection={"message_count": 1, "summary": 1, "summary_order": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+
+
+async def _prepare_chat_turn(
     conversation_id: str,
     query: str,
-    k: int,
-    include_sources: bool,
     current_user_id: str
 ) -> dict:
     """
-    채팅 메시지 처리 공통 로직
+    채팅 턴 준비: 소유권 검증 + 메시지 순서 예약, 대화 메모리(요약 + 최근 메시지) 조회, 사용자 메시지 저장
+
+    메시지 순서는 대화방 문서의 message_count를 원자적으로 2 증가시켜 예약합니다.
+    (소유권 검증, updated_at 갱신과 한 번의 find_one_and_update로 처리, 동시 요청에도 순서가 겹치지 않음)
 
     Returns:
-        {"answer": str, "sources": list, "message_id": str, "conversation_id": str}
+        {"conv_object_id": ObjectId, "conversation": dict, "message_history": list, "bot_message_order": int}
     """
     conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
     messages_collection = db_instance.get_collection(Collections.MESSAGES)
@@ -107,45 +168,44 @@ async def _process_chat_message(
             detail="유효하지 않은 대화 ID입니다"
         )
 
-    # 1. 대화방 확인 및 소유권 검증
-    conversation = await conversations_collection.find_one({
-        "_id": conv_object_id,
-        "user_id": ObjectId(current_user_id)
-    })
+    # 1. 대화방 확인 및 소유권 검증 + 메시지 순서 예약 (사용자, 봇 메시지 2개)
+    now = datetime.utcnow()
+    conversation = await _reserve_message_orders(conversations_collection, conv_object_id, current_user_id, now)
 
     if not conversation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="대화를 찾을 수 없습니다"
+        # 카운터 백필 전 대화방: 백필 마이그레이션과 같은 값(최대 order + 1)으로 카운터를 원자적으로 맞춘 뒤 다시 예약
+        # ($max라 동시 요청이 함께 보정하거나 이미 예약이 진행된 경우에도 카운터가 줄어들지 않음,
+        #  migrations/backfill_message_count.py 실행 후에는 사용되지 않음)
+        if not await conversations_collection.find_one(
+            {"_id": conv_object_id, "user_id": ObjectId(current_user_id)}, {"_id": 1}
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="대화를 찾을 수 없습니다"
+            )
+        await ensure_conversation_flushed(conv_object_id)
+        next_order = await next_message_order(messages_collection, conv_object_id)
+        await conversations_collection.update_one(
+            {"_id": conv_object_id},
+            {"$max": {"message_count": next_order}}
         )
+        conversation = await _reserve_message_orders(conversations_collection, conv_object_id, current_user_id, now)
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="대화를 찾을 수 없습니다"
+            )
 
     logger.info(f"채팅 요청: {query} (대화: {conversation_id})")
 
-    # 2. 최근 메시지 3개 조회 (대화 흐름 유지용)
-    recent_messages = await messages_collection.find(
-        {"conversation_id": conv_object_id}
-    ).sort("order", -1).limit(3).to_list(length=3)
-    
-    # 최근 메시지를 시간순으로 정렬 (오래된 것부터)
-    recent_messages.reverse()
-    
-    # 메시지 히스토리 구성 (role과 content만)
-    message_history = [
-        {"role": msg["role"], "content": msg["content"]}
-        for msg in recent_messages
-    ]
-    
-    logger.info(f"최근 메시지 {len(message_history)}개를 컨텍스트로 포함")
-
-    # 3. 현재 메시지 순서 계산
-    message_count = await messages_collection.count_documents(
-        {"conversation_id": conv_object_id}
-    )
-    user_message_order = message_count
-    bot_message_order = message_count + 1
+    # 2. 대화 메모리 조회 (누적 요약 + 최근 메시지, 토큰 예산 내, 최근 메시지 캐시 우선)
+    message_history = await build_message_history(conversation)
+
+    # 3. 예약한 메시지 순서
+    user_message_order = conversation["message_count"]
+    bot_message_order = user_message_order + 1
 
     # 4. 사용자 메시지 저장
-    now = datetime.utcnow()
     user_message_doc = {
         "conversation_id": conv_object_id,
         "role": "user",
@@ -154,55 +214,207 @@ async def _process_chat_message(
         "created_at": now
     }
     await messages_collection.insert_one(user_message_doc)
+    record_message(conv_object_id, user_message_order, "user", query)
+
+    return {
+        "conv_object_id": conv_object_id,
+        "conversation": conversation,
+        "message_history": message_history,
+        "bot_message_order": bot_message_order
+    }
+
+
+async def _search_courses(query: str, k: int, query_embedding: Optional[List[float]] = None) -> List[dict]:
+    """Pinecone 벡터 검색"""
+    vectorstore = get_vectorstore_service()
+    return await vectorstore.similarity_search(
+        query=query,
+        k=k,
+        query_embedding=query_embedding
+    )
+
+
+async def _embed_query(query: str) -> Optional[List[float]]:
+    """로컬 의도 분류와 검색에 함께 쓸 쿼리 임베딩 생성 (실패 시 None)"""
+    try:
+        vectorstore = get_vectorstore_service()
+        return await vectorstore.embed_query(query)
+    except Exception as e:
+        logger.warning(f"쿼리 임베딩 생성 실패 - LLM 의도 분류로 대체: {e}")
+        return None
+
+
+async def _classify_intent(query: str, query_embedding: Optional[List[float]]) -> str:
+    """로컬 임베딩 분류기로 의도 분류, 확신도가 낮거나 불가하면 HyperCLOVA로 대체"""
+    if query_embedding is not None:
+        try:
+            intent, margin = await get_intent_classifier().classify(query_embedding)
+            if intent:
+                logger.info(f"로컬 의도 분류: {intent} (마진: {margin:.3f})")
+                return intent
+        except Exception as e:
+            logger.warning(f"로컬 의도 분류 실패 - LLM 분류로 대체: {e}")
 
-    # 5. AI 응답 생성
     hyperclova = get_hyperclova_client()
+    return await hyperclova.classify_intent(query)
 
-    # 5-1. 질문 의도 분류
-    intent = await hyperclova.classify_intent(query)
-    logger.info(f"질문 의도: {intent}")
 
-    # 5-2. 일상 대화인 경우 바로 답변
-    if intent == 'casual_chat':
-        logger.info("일상 대화로 분류 - 직접 답변 생성")
-        answer = await hyperclova.generate_casual_answer(query, message_history)
-        sources = []
-    else:
+def _discard_task_result(task: asyncio.Task) -> None:
+    """폐기된 추측 실행 태스크의 예외를 소비 (미회수 예외 경고 방지)"""
+    if not task.cancelled():
+        task.exception()
+
+
+async def _rerank(query: str, search_results: List[dict], k: int, timer: StageTimer) -> List[dict]:
+    """재순위화가 켜져 있으면 넓게 가져온 후보를 크로스 인코더로 재정렬해 상위 k개만 남김"""
+    reranker = get_reranker()
+    if reranker is None:
+        return search_results[:k]
+    return await timer.timed("rerank", reranker.rerank(query, search_results, k))
+
+
+def _cache_entities(query: str) -> tuple:
+    """답변 캐시 적중 조건: 질문의 교수명/과목명(사전 매칭) + 숫자/과목 코드"""
+    metadata_filter = None
+    try:
+        gazetteer = get_vectorstore_service().gazetteer
+        metadata_filter = gazetteer.match(query) if gazetteer else None
+    except Exception as e:
+        logger.warning(f"답변 캐시 구분 요소 추출 실패 - 숫자/코드만 사용: {e}")
+    return query_entities(query, metadata_filter)
+
+
+async def _retrieve_context(query: str, k: int, timer: StageTimer, message_history: List[dict]) -> dict:
+    """
+    질문 의도 분류 후 수업 관련 질문이면 벡터 검색 수행
+
+    - 쿼리 임베딩은 한 번만 계산해 로컬 의도 분류, 답변 캐시 조회, 검색에 함께 사용합니다.
+    - SPECULATIVE_RETRIEVAL이 켜져 있으면 의도 분류와 벡터 검색을 동시에 시작하고,
+      일상 대화로 분류되거나 답변 캐시에 적중하면 검색 결과를 버립니다.
+    - 답변 캐시는 대화 히스토리(이전 메시지, 누적 요약)가 없는 턴에만 사용합니다.
+      후속 질문("두 번째 건?")은 맥락에 따라 답이 달라지므로 다른 대화의 답변을 돌려주면 안 됩니다.
+      주차/과목 코드/교수명만 다른 질문도 임베딩이 가까우므로 구분 요소(cache_entities)가 같아야 적중합니다.
+    - 재순위화가 켜져 있으면 RERANK_CANDIDATES개를 검색한 뒤 크로스 인코더로 상위 k개를 고릅니다.
+
+    Returns:
+        {"intent": str, "search_results": list, "query_embedding": list | None,
+         "cached_answer": str | None, "cacheable": bool, "cache_entities": tuple | None}
+    """
+    answer_cache = get_answer_cache() if not message_history else None
+    search_k = max(k, settings.RERANK_CANDIDATES) if settings.RERANK_ENABLED else k
+
+    with timer.stage("retrieve_context"):
+        query_embedding = None
+        if settings.INTENT_CLASSIFIER == "local" or answer_cache is not None:
+            query_embedding = await timer.timed("embedding", _embed_query(query))
+
+        search_task = None
+        if settings.SPECULATIVE_RETRIEVAL:
+            async def speculative_search() -> List[dict]:
+                return await timer.timed("retrieval", _search_courses(query, search_k, query_embedding))
+
+            search_task = asyncio.create_task(speculative_search())
+            search_task.add_done_callback(_discard_task_result)
+
+        # 5-1. 질문 의도 분류 (추측 실행 시 검색과 동시 진행)
+        try:
+            intent = await timer.timed("intent", _classify_intent(query, query_embedding))
+        except BaseException:
+            if search_task:
+                search_task.cancel()
+            raise
+        logger.info(f"질문 의도: {intent}")
+
+        result = {
+            "intent": intent,
+            "search_results": [],
+            "query_embedding": query_embedding,
+            "cached_answer": None,
+            "cacheable": answer_cache is not None,
+            "cache_entities": _cache_entities(query) if answer_cache is not None else None
+        }
+
+        if intent == 'casual_chat':
+            if search_task:
+                search_task.cancel()
+            return result
+
+        # 5-2. 의미 캐시 조회 (적중 시 검색/생성 생략)
+        cached = answer_cache.lookup(query_embedding, result["cache_entities"]) if answer_cache else None
+        if cached:
+            if search_task:
+                search_task.cancel()
+            result["cached_answer"] = cached.answer
+            result["search_results"] = cached.documents
+            return result
+
         # 5-3. 수업 관련: Pinecone 벡터 검색
-        logger.info(f"{intent} 분류 - 벡터 검색 수행")
+        if search_task:
+            logger.info(f"{intent} 분류 - 추측 실행한 벡터 검색 결과 사용")
+            search_results = await search_task
+        else:
+            logger.info(f"{intent} 분류 - 벡터 검색 수행")
+            search_results = await timer.timed(
+                "retrieval", _search_courses(query, search_k, query_embedding)
+            )
+        result["search_results"] = await _rerank(query, search_results, k, timer)
+        return result
 
-        vectorstore = get_vectorstore_service()
-        search_results = await vectorstore.similarity_search(
-            query=query,
-            k=k
+
+def _answer_key(query: str, intent: str, k: int, message_history: List[dict]) -> tuple:
+    """답변 공유 키 (히스토리가 다르면 답변도 달라지므로 키에 포함)"""
+    history = tuple((msg["role"], msg["content"]) for msg in message_history or [])
+    return (normalize_query(query), intent, k, hash(history))
+
+
+def _store_answer(retrieval: dict, answer: str) -> None:
+    """생성된 수업 관련 답변을 의미 캐시에 저장 (히스토리 없는 턴만)"""
+    answer_cache = get_answer_cache()
+    if answer_cache and retrieval["cacheable"]:
+        answer_cache.store(
+            retrieval["query_embedding"], retrieval["search_results"], answer, retrieval["cache_entities"]
         )
 
-        if not search_results:
-            answer = "죄송합니다. 관련 수업 정보를 찾을 수 없습니다. 다른 방식으로 질문해주시겠어요?"
-            sources = []
-        else:
-            logger.info(f"검색된 문서 수: {len(search_results)}")
 
-            # 5-4. HyperCLOVA 답변 생성 (최근 메시지 히스토리 포함)
-            answer = await hyperclova.generate_answer(
-                query=query,
-                context_docs=search_results,
-                message_history=message_history
-            )
+def _build_sources(search_results: List[dict], include_sources: bool) -> List[dict]:
+    """검색 결과로 출처 목록 구성"""
+    sources = []
+    if include_sources:
+        for result in search_results:
+            sources.append({
+                "course_name": result["metadata"].get("course_name", ""),
+                "professor": result["metadata"].get("professor", ""),
+                "section": result["metadata"].get("section", ""),
+                "content_preview": result["page_content"][:200] + "..."
+            })
+    return sources
+
 
-            # 5-5. 출처 구성
-            sources = []
-            if include_sources:
-                for result in search_results:
-                    sources.append({
-                        "course_name": result["metadata"].get("course_name", ""),
-                        "professor": result["metadata"].get("professor", ""),
-                        "section": result["metadata"].get("section", ""),
-                        "content_preview": result["page_content"][:200] + "..."
-                    })
+async def _finalize_chat_turn(
+    conversation_id: str,
+    conv_object_id: ObjectId,
+    query: str,
+    answer: str,
+    sources: List[dict],
+    bot_message_order: int,
+    conversation: dict
+) -> str:
+    """
+    채팅 턴 마무리: 봇 메시지 저장, 자동 제목 생성, 대화 요약 갱신 예약
+    (대화방 updated_at은 턴 준비 단계의 순서 예약과 함께 갱신됨)
+
+    쓰기 지연(WRITE_BEHIND_ENABLED) 모드에서는 봇 메시지를 저널/버퍼에 넣고
+    DB 반영을 기다리지 않습니다 (메시지 ID는 미리 발급).
+
+    Returns:
+        저장된 봇 메시지 ID
+    """
+    messages_collection = db_instance.get_collection(Collections.MESSAGES)
+    write_behind = get_write_behind_buffer()
 
     # 6. 봇 메시지 저장
     bot_message_doc = {
+        "_id": ObjectId(),
         "conversation_id": conv_object_id,
         "role": "assistant",
         "content": answer,
@@ -210,25 +422,98 @@ async def _process_chat_message(
         "order": bot_message_order,
         "created_at": datetime.utcnow()
     }
-    bot_message_result = await messages_collection.insert_one(bot_message_doc)
-    bot_message_id = str(bot_message_result.inserted_id)
+    bot_message_id = str(bot_message_doc["_id"])
 
-    # 7. 대화방 updated_at 갱신
-    await conversations_collection.update_one(
-        {"_id": conv_object_id},
-        {"$set": {"updated_at": datetime.utcnow()}}
-    )
+    if write_behind is not None:
+        write_behind.add_message(bot_message_doc)
+    else:
+        await messages_collection.insert_one(bot_message_doc)
+    record_message(conv_object_id, bot_message_order, "assistant", answer)
 
-    # 8. 자동 제목 생성 (1번째 또는 5번째 대화)
+    # 7. 자동 제목 생성 (1번째 또는 5번째 대화, 백그라운드 큐에서 실행)
     new_message_count = bot_message_order + 1  # 사용자 + 봇 메시지 포함
-    if new_message_count == 2 or new_message_count == 10:
-        await auto_generate_title(
+    schedule_title_generation(
+        conversation_id=conversation_id,
+        message_count=new_message_count,
+        user_query=query
+    )
+
+    # 8. 대화 요약 갱신 (N턴마다 백그라운드)
+    schedule_summary_update(conversation, bot_message_order)
+
+    return bot_message_id
+
+
+async def _process_chat_message(
+    conversation_id: str,
+    query: str,
+    k: int,
+    include_sources: bool,
+    current_user_id: str
+) -> dict:
+    """
+    채팅 메시지 처리 공통 로직
+
+    Returns:
+        {"answer": str, "sources": list, "message_id": str, "conversation_id": str}
+    """
+    timer = StageTimer()
+    with timer.stage("prepare"):
+        turn = await _prepare_chat_turn(conversation_id, query, current_user_id)
+    message_history = turn["message_history"]
+
+    # 5. AI 응답 생성
+    hyperclova = get_hyperclova_client()
+    retrieval = await _retrieve_context(query, k, timer, message_history)
+    search_results = retrieval["search_results"]
+
+    # 5-2. 일상 대화인 경우 바로 답변
+    if retrieval["intent"] == 'casual_chat':
+        logger.info("일상 대화로 분류 - 직접 답변 생성")
+        with timer.stage("generation"):
+            answer = await answer_flight.do(
+                _answer_key(query, retrieval["intent"], k, message_history),
+                lambda: hyperclova.generate_casual_answer(query, message_history)
+            )
+        sources = []
+    elif retrieval["cached_answer"] is not None:
+        logger.info("의미 캐시 적중 - 검색/답변 생성 생략")
+        answer = retrieval["cached_answer"]
+        sources = _build_sources(search_results, include_sources)
+    elif not search_results:
+        answer = NO_RESULTS_ANSWER
+        sources = []
+    else:
+        logger.info(f"검색된 문서 수: {len(search_results)}")
+
+        # 5-4. HyperCLOVA 답변 생성 (최근 메시지 히스토리 포함, 동시에 들어온 같은 질문은 한 번만 생성)
+        with timer.stage("generation"):
+            answer = await answer_flight.do(
+                _answer_key(query, retrieval["intent"], k, message_history),
+                lambda: hyperclova.generate_answer(
+                    query=query,
+                    context_docs=search_results,
+                    message_history=message_history
+                )
+            )
+        _store_answer(retrieval, answer)
+
+        # 5-5. 출처 구성
+        sources = _build_sources(search_results, include_sources)
+
+    with timer.stage("finalize"):
+        bot_message_id = await _finalize_chat_turn(
             conversation_id=conversation_id,
-            message_count=new_message_count,
-            user_query=query
+            conv_object_id=turn["conv_object_id"],
+            query=query,
+            answer=answer,
+            sources=sources,
+            bot_message_order=turn["bot_message_order"],
+            conversation=turn["conversation"]
         )
 
     logger.info("답변 생성 완료")
+    timer.log()
 
     return {
         "answer": answer,
@@ -238,6 +523,239 @@ async def _process_chat_message(
     }
 
 
+def _on_interrupted_turn_saved(task: asyncio.Task) -> None:
+    """중단된 스트리밍 턴 저장 태스크 정리 (실패 시 로그)"""
+    _interrupted_turn_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"중단된 스트리밍 답변 저장 실패: {task.exception()}")
+
+
+def _persist_interrupted_turn(
+    conversation_id: str,
+    query: str,
+    answer_parts: List[str],
+    sources: List[dict],
+    turn: dict
+) -> None:
+    """
+    클라이언트 연결이 끊긴 스트리밍 턴의 부분 답변을 백그라운드에서 저장
+
+    사용자 메시지와 봇 메시지 순서는 턴 준비 단계에서 이미 예약되었으므로,
+    봇 메시지를 저장하지 않으면 질문만 남고 순서에 빈자리가 생깁니다.
+    요청 태스크는 이미 취소 중이므로 별도 태스크로 저장합니다.
+    """
+    partial = "".join(answer_parts)
+    answer = f"{partial}\n\n{STREAM_INTERRUPTED_NOTICE}" if partial else STREAM_INTERRUPTED_NOTICE
+    logger.warning(
+        f"스트리밍 도중 클라이언트 연결 종료 - 부분 답변 저장 "
+        f"(대화: {conversation_id}, 수신 조각: {len(answer_parts)}개)"
+    )
+    task = asyncio.create_task(_finalize_chat_turn(
+        conversation_id=conversation_id,
+        conv_object_id=turn["conv_object_id"],
+        query=query,
+        answer=answer,
+        sources=sources,
+        bot_message_order=turn["bot_message_order"],
+        conversation=turn["conversation"]
+    ))
+    _interrupted_turn_tasks.add(task)
+    task.add_done_callback(_on_interrupted_turn_saved)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 형식 문자열 생성"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_chat_message(
+    conversation_id: str,
+    query: str,
+    k: int,
+    include_sources: bool,
+    turn: dict
+) -> AsyncIterator[str]:
+    """
+    채팅 메시지 처리 스트리밍 버전 (SSE)
+
+    이벤트 순서:
+        meta  - {"conversation_id"} (즉시 전송, 첫 바이트 시간 단축)
+        token - {"text"} (HyperCLOVA 토큰 조각, 여러 번)
+        done  - {"conversation_id", "message_id", "answer", "sources"} (저장 완료 후)
+        error - {"detail"} (처리 중 오류)
+
+    클라이언트 연결이 끊겨 스트림이 취소/종료되면 그때까지 받은 부분 답변을
+    백그라운드에서 저장합니다 (예약된 봇 메시지 순서를 비워두지 않음).
+    """
+    yield _sse_event("meta", {"conversation_id": conversation_id})
+
+    timer = StageTimer()
+    answer_parts: List[str] = []
+    sources: List[dict] = []
+    finalize_task: Optional[asyncio.Task] = None
+    try:
+        hyperclova = get_hyperclova_client()
+        message_history = turn["message_history"]
+        retrieval = await _retrieve_context(query, k, timer, message_history)
+        search_results = retrieval["search_results"]
+
+        cacheable = False
+        if retrieval["intent"] == 'casual_chat':
+            logger.info("일상 대화로 분류 - 직접 답변 스트리밍")
+            token_stream = hyperclova.generate_casual_answer_stream(query, message_history)
+        elif retrieval["cached_answer"] is not None:
+            logger.info("의미 캐시 적중 - 검색/답변 생성 생략")
+            token_stream = None
+            sources = _build_sources(search_results, include_sources)
+        elif not search_results:
+            token_stream = None
+        else:
+            cacheable = True
+            logger.info(f"검색된 문서 수: {len(search_results)}")
+            token_stream = hyperclova.generate_answer_stream(
+                query=query,
+                context_docs=search_results,
+                message_history=message_history
+            )
+            sources = _build_sources(search_results, include_sources)
+
+        if token_stream is None:
+            answer = retrieval["cached_answer"] or NO_RESULTS_ANSWER
+            yield _sse_event("token", {"text": answer})
+        else:
+            generation_start = time.perf_counter()
+            async for text in token_stream:
+                if not answer_parts:
+                    timer.record("first_token", (time.perf_counter() - generation_start) * 1000)
+                answer_parts.append(text)
+                yield _sse_event("token", {"text": text})
+            timer.record("generation", (time.perf_counter() - generation_start) * 1000)
+            answer = "".join(answer_parts)
+            if cacheable:
+                _store_answer(retrieval, answer)
+
+        # 스트림 종료 후 최종 답변과 출처 저장 (저장 도중 연결이 끊겨도 끝까지 진행)
+        with timer.stage("finalize"):
+            finalize_task = asyncio.create_task(_finalize_chat_turn(
+                conversation_id=conversation_id,
+                conv_object_id=turn["conv_object_id"],
+                query=query,
+                answer=answer,
+                sources=sources,
+                bot_message_order=turn["bot_message_order"],
+                conversation=turn["conversation"]
+            ))
+            bot_message_id = await asyncio.shield(finalize_task)
+
+        logger.info("스트리밍 답변 생성 완료")
+        timer.log("스트리밍 채팅")
+
+        yield _sse_event("done", {
+            "conversation_id": conversation_id,
+            "message_id": bot_message_id,
+            "answer": answer,
+            "sources": sources
+        })
+
+    except (asyncio.CancelledError, GeneratorExit):
+        if finalize_task is None:
+            _persist_interrupted_turn(conversation_id, query, answer_parts, sources, turn)
+        raise
+
+    except Exception as e:
+        logger.error(f"스트리밍 채팅 처리 중 오류 발생: {e}", exc_info=True)
+        yield _sse_event("error", {"detail": "서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요."})
+
+
+async def _ensure_conversation(conversation_id: Optional[str], current_user_id: str) -> str:
+    """conversation_id가 없으면 새 대화방을 생성하고 ID 반환"""
+    if conversation_id:
+        return conversation_id
+
+    conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
+
+    logger.info(f"새 대화방 자동 생성 (사용자: {current_user_id})")
+
+    now = datetime.utcnow()
+    conversation_doc = {
+        "user_id": ObjectId(current_user_id),
+        "title": "새 대화",
+        "message_count": 0,
+        "created_at": now,
+        "updated_at": now
+    }
+    result = await conversations_collection.insert_one(conversation_doc)
+    conversation_id = str(result.inserted_id)
+
+    logger.info(f"새 대화방 생성 완료: {conversation_id}")
+    return conversation_id
+
+
+def _encode_conversation_cursor(conversation: dict) -> str:
+    """대화방의 (updated_at, _id)를 불투명한 커서 문자열로 변환"""
+    millis = (conversation["updated_at"] - CURSOR_EPOCH) // timedelta(milliseconds=1)
+    raw = f"{millis}:{conversation['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_conversation_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """커서 문자열을 (updated_at, _id)로 변환 (잘못된 커서는 400)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        millis, object_id = raw.split(":", 1)
+        return CURSOR_EPOCH + timedelta(milliseconds=int(millis)), ObjectId(object_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="유효하지 않은 커서입니다"
+        )
+
+
+def _conversation_keyset_filter(cursor: str, newer: bool) -> dict:
+    """(updated_at, _id) 기준으로 커서보다 이전(newer=False) 또는 이후(newer=True) 대화방 조건"""
+    updated_at, object_id = _decode_conversation_cursor(cursor)
+    op = "$gt" if newer else "$lt"
+    return {"$or": [
+        {"updated_at": {op: updated_at}},
+        {"updated_at": updated_at, "_id": {op: object_id}}
+    ]}
+
+
+def _message_projection(view: str) -> dict:
+    """
+    메시지 조회 프로젝션
+
+    - full: 전체 content + sources
+    - summary: sources 제외, content는 MESSAGE_PREVIEW_CHARS자까지만 DB에서 잘라서 읽음
+    """
+    if view == "summary":
+        return {
+            "role": 1,
+            "order": 1,
+            "created_at": 1,
+            "content": {"$substrCP": ["$content", 0, settings.MESSAGE_PREVIEW_CHARS]},
+            "content_length": {"$strLenCP": "$content"}
+        }
+    return MESSAGE_FULL_PROJECTION
+
+
+def _serialize_message(msg: dict, conversation_id: str, view: str) -> dict:
+    """메시지 문서를 응답 형식으로 변환 (summary는 sources 대신 truncated 표시)"""
+    item = {
+        "id": str(msg["_id"]),
+        "conversation_id": conversation_id,
+        "role": msg["role"],
+        "content": msg["content"],
+        "order": msg["order"],
+        "created_at": msg["created_at"].isoformat() + "Z"
+    }
+    if view == "summary":
+        item["truncated"] = msg.get("content_length", 0) > len(msg["content"])
+    else:
+        item["sources"] = msg.get("sources", [])
+    return item
+
+
 # ==================== API 엔드포인트 ====================
 
 @router.post(
@@ -263,6 +781,7 @@ async def create_conversation(
         conversation_doc = {
             "user_id": ObjectId(current_user_id),
             "title": request.title,
+            "message_count": 0,
             "created_at": now,
             "updated_at": now
         }
@@ -294,20 +813,45 @@ async def create_conversation(
     "",
     response_model=dict,
     summary="대화 목록 조회",
-    description="사용자의 모든 대화를 최신순으로 조회합니다."
+    description="사용자의 대화를 최신순으로 페이지 단위 조회합니다 (before/after 커서)."
 )
 async def get_conversations(
+    limit: int = Query(settings.CONVERSATIONS_PAGE_SIZE, ge=1, le=settings.CONVERSATIONS_MAX_PAGE_SIZE),
+    before: Optional[str] = Query(None, description="이 커서보다 오래된 대화 (다음 페이지)"),
+    after: Optional[str] = Query(None, description="이 커서보다 최근에 갱신된 대화 (새로 갱신된 대화 확인)"),
     current_user_id: str = Depends(get_current_user)
 ):
     """
-    내 대화 목록 조회 (최신순)
+    내 대화 목록 조회 (최신순, (updated_at, _id) 키셋 페이지네이션)
+
+    - 응답의 cursors.before로 다음(더 오래된) 페이지, cursors.after로 그 이후 갱신된 대화를 조회
+    - has_more: 같은 방향으로 더 조회할 대화가 있는지
     """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="before와 after는 함께 사용할 수 없습니다"
+        )
+
     try:
         conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
 
-        conversations = await conversations_collection.find(
-            {"user_id": ObjectId(current_user_id)}
-        ).sort("updated_at", -1).to_list(length=100)
+        query = {"user_id": ObjectId(current_user_id)}
+        if before:
+            query.update(_conversation_keyset_filter(before, newer=False))
+        elif after:
+            query.update(_conversation_keyset_filter(after, newer=True))
+
+        # after는 커서에 가까운 것부터 가져온 뒤 최신순으로 뒤집음
+        direction = 1 if after else -1
+        conversations = await conversations_collection.find(query, CONVERSATION_LIST_PROJECTION).sort(
+            [("updated_at", direction), ("_id", direction)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+
+        has_more = len(conversations) > limit
+        conversations = conversations[:limit]
+        if after:
+            conversations.reverse()
 
         conversations_list = [
             {
@@ -325,10 +869,17 @@ async def get_conversations(
             "success": True,
             "data": {
                 "conversations": conversations_list,
-                "total": len(conversations_list)
+                "total": len(conversations_list),
+                "has_more": has_more,
+                "cursors": {
+                    "before": _encode_conversation_cursor(conversations[-1]) if conversations else before,
+                    "after": _encode_conversation_cursor(conversations[0]) if conversations else after
+                }
             }
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"대화 목록 조회 중 오류 발생: {e}", exc_info=True)
         raise HTTPException(
@@ -362,10 +913,10 @@ async def get_conversation(
                 detail="유효하지 않은 대화 ID입니다"
             )
 
-        conversation = await conversations_collection.find_one({
-            "_id": conv_object_id,
-            "user_id": ObjectId(current_user_id)
-        })
+        conversation = await conversations_collection.find_one(
+            {"_id": conv_object_id, "user_id": ObjectId(current_user_id)},
+            CONVERSATION_LIST_PROJECTION
+        )
 
         if not conversation:
             raise HTTPException(
@@ -420,10 +971,10 @@ async def delete_conversation(
             )
 
         # 소유권 확인
-        conversation = await conversations_collection.find_one({
-            "_id": conv_object_id,
-            "user_id": ObjectId(current_user_id)
-        })
+        conversation = await conversations_collection.find_one(
+            {"_id": conv_object_id, "user_id": ObjectId(current_user_id)},
+            {"_id": 1}
+        )
 
         if not conversation:
             raise HTTPException(
@@ -431,8 +982,10 @@ async def delete_conversation(
                 detail="대화를 찾을 수 없습니다"
             )
 
-        # 메시지 삭제
+        # 메시지 삭제 (쓰기 지연 버퍼에 남은 메시지가 삭제 후 다시 생기지 않도록 먼저 반영)
+        await ensure_conversation_flushed(conv_object_id)
         await messages_collection.delete_many({"conversation_id": conv_object_id})
+        forget_conversation(conv_object_id)
 
         # 대화 삭제
         await conversations_collection.delete_one({"_id": conv_object_id})
@@ -458,15 +1011,33 @@ async def delete_conversation(
     "/{conversation_id}/messages",
     response_model=dict,
     summary="메시지 목록 조회",
-    description="특정 대화의 모든 메시지를 순서대로 조회합니다."
+    description="특정 대화의 메시지를 순서대로 페이지 단위 조회합니다 (before/after 커서, since_order 증분 조회, view=summary 미리보기)."
 )
 async def get_messages(
     conversation_id: str,
+    limit: int = Query(settings.MESSAGES_PAGE_SIZE, ge=1, le=settings.MESSAGES_MAX_PAGE_SIZE),
+    before: Optional[int] = Query(None, ge=0, description="이 order보다 이전 메시지 (위로 스크롤)"),
+    after: Optional[int] = Query(None, ge=-1, description="이 order보다 이후 메시지"),
+    since_order: Optional[int] = Query(None, ge=-1, description="증분 조회: 클라이언트가 가진 마지막 order 이후의 새 메시지만"),
+    view: str = Query("full", pattern="^(full|summary)$", description="full: 전체 내용 + 출처, summary: 출처 제외 + 내용 미리보기"),
     current_user_id: str = Depends(get_current_user)
 ):
     """
-    대화의 모든 메시지 조회 (순서대로)
+    대화의 메시지 조회 (order 오름차순, order 키셋 페이지네이션)
+
+    - 기본 / before: 가장 최근(또는 before 이전) limit개
+    - after / since_order: after 이후 limit개 (since_order는 after와 같고, 새 메시지가 없으면 메시지 조회를 생략)
+    - latest_order: 대화방에 예약된 마지막 메시지 순서 (진행 중인 턴의 봇 메시지 포함)
+    - view=summary: sources를 읽지 않고 content를 MESSAGE_PREVIEW_CHARS자로 잘라 반환 (truncated 표시)
     """
+    if sum(param is not None for param in (before, after, since_order)) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="before, after, since_order 중 하나만 사용할 수 있습니다"
+        )
+    if since_order is not None:
+        after = since_order
+
     try:
         conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
         messages_collection = db_instance.get_collection(Collections.MESSAGES)
@@ -481,10 +1052,10 @@ async def get_messages(
             )
 
         # 소유권 확인
-        conversation = await conversations_collection.find_one({
-            "_id": conv_object_id,
-            "user_id": ObjectId(current_user_id)
-        })
+        conversation = await conversations_collection.find_one(
+            {"_id": conv_object_id, "user_id": ObjectId(current_user_id)},
+            {"message_count": 1}
+        )
 
         if not conversation:
             raise HTTPException(
@@ -492,23 +1063,33 @@ async def get_messages(
                 detail="대화를 찾을 수 없습니다"
             )
 
-        # 메시지 조회
-        messages = await messages_collection.find(
-            {"conversation_id": conv_object_id}
-        ).sort("order", 1).to_list(length=1000)
+        # 카운터 백필 전 대화방은 알 수 없음 (None)
+        latest_order = conversation["message_count"] - 1 if "message_count" in conversation else None
 
-        messages_list = [
-            {
-                "id": str(msg["_id"]),
-                "conversation_id": conversation_id,
-                "role": msg["role"],
-                "content": msg["content"],
-                "sources": msg.get("sources", []),
-                "order": msg["order"],
-                "created_at": msg["created_at"].isoformat() + "Z"
-            }
-            for msg in messages
-        ]
+        if since_order is not None and latest_order is not None and since_order >= latest_order:
+            # 증분 조회: 새로 예약된 메시지가 없으면 메시지 컬렉션을 읽지 않음
+            messages = []
+            has_more = False
+        else:
+            # 메시지 조회 (쓰기 지연 버퍼에 남은 메시지 먼저 반영)
+            await ensure_conversation_flushed(conv_object_id)
+
+            query = {"conversation_id": conv_object_id}
+            if after is not None:
+                query["order"] = {"$gt": after}
+            elif before is not None:
+                query["order"] = {"$lt": before}
+
+            # 최근 페이지 / before는 커서에 가까운 것부터 가져온 뒤 오름차순으로 뒤집음
+            direction = 1 if after is not None else -1
+            messages = await messages_collection.find(query, _message_projection(view)).sort("order", direction).limit(limit + 1).to_list(length=limit + 1)
+
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            if direction == -1:
+                messages.reverse()
+
+        messages_list = [_serialize_message(msg, conversation_id, view) for msg in messages]
 
         logger.info(f"메시지 목록 조회: {len(messages_list)}개 (대화: {conversation_id})")
 
@@ -516,7 +1097,9 @@ async def get_messages(
             "success": True,
             "data": {
                 "messages": messages_list,
-                "total": len(messages_list)
+                "total": len(messages_list),
+                "has_more": has_more,
+                "latest_order": latest_order
             }
         }
 
@@ -589,25 +1172,8 @@ async def chat_with_auto_create(
     - 로그인 필수
     """
     try:
-        conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
-
         # conversation_id가 없으면 자동으로 새 대화방 생성
-        if not request.conversation_id:
-            logger.info(f"새 대화방 자동 생성 (사용자: {current_user_id})")
-
-            now = datetime.utcnow()
-            conversation_doc = {
-                "user_id": ObjectId(current_user_id),
-                "title": "새 대화",
-                "created_at": now,
-                "updated_at": now
-            }
-            result = await conversations_collection.insert_one(conversation_doc)
-            conversation_id = str(result.inserted_id)
-
-            logger.info(f"새 대화방 생성 완료: {conversation_id}")
-        else:
-            conversation_id = request.conversation_id
+        conversation_id = await _ensure_conversation(request.conversation_id, current_user_id)
 
         # 메시지 처리
         result = await _process_chat_message(
@@ -636,3 +1202,84 @@ async def chat_with_auto_create(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
         )
+
+
+@router.post(
+    "/{conversation_id}/messages/stream",
+    summary="대화방에 메시지 추가 (스트리밍)",
+    description="특정 대화방에 메시지를 추가하고 AI 응답을 Server-Sent Events로 스트리밍합니다."
+)
+async def add_message_to_conversation_stream(
+    conversation_id: str,
+    request: MessageRequest,
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    RESTful 스타일 메시지 추가 API (SSE 스트리밍)
+
+    응답은 text/event-stream 이며 meta → token(반복) → done 순서로 전송됩니다.
+    """
+    try:
+        # 소유권 검증 및 사용자 메시지 저장은 스트림 시작 전에 수행 (404 등은 일반 HTTP 오류로 반환)
+        turn = await _prepare_chat_turn(conversation_id, request.query, current_user_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"스트리밍 메시지 추가 중 오류 발생: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+        )
+
+    return StreamingResponse(
+        _stream_chat_message(
+            conversation_id=conversation_id,
+            query=request.query,
+            k=request.k,
+            include_sources=request.include_sources,
+            turn=turn
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.post(
+    "/chat/stream",
+    summary="채팅하기 (자동 대화방 생성, 스트리밍)",
+    description="conversation_id가 없으면 자동으로 새 대화방을 생성하고 AI 응답을 Server-Sent Events로 스트리밍합니다."
+)
+async def chat_with_auto_create_stream(
+    request: ChatRequest,
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    채팅 API (자동 대화방 생성, SSE 스트리밍)
+
+    응답은 text/event-stream 이며 meta 이벤트에 conversation_id가 포함됩니다.
+    """
+    try:
+        conversation_id = await _ensure_conversation(request.conversation_id, current_user_id)
+        turn = await _prepare_chat_turn(conversation_id, request.query, current_user_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"스트리밍 채팅 처리 중 오류 발생: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="서버 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+        )
+
+    return StreamingResponse(
+        _stream_chat_message(
+            conversation_id=conversation_id,
+            query=request.query,
+            k=request.k,
+            include_sources=request.include_sources,
+            turn=turn
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -0,0 +1,342 @@
+"""
+쿼리 임베딩 유사도 기반 의미(semantic) 답변 캐시
+
+수업 관련 질문의 (쿼리 임베딩, 검색 문서, 답변)을 저장해 두고,
+코사인 거리가 임계값 이내인 새 질문은 Pinecone 검색과 HyperCLOVA 생성 없이 캐시에서 답변합니다.
+
+- LRU + TTL 만료, 항목 수 / 메모리 상한
+- 대화 히스토리(이전 메시지, 누적 요약)가 없는 턴만 캐시 (후속 질문은 맥락에 따라 답이 달라짐)
+- 임베딩 거리만으로는 주차/과목 코드/교수명만 다른 질문을 구분하지 못하므로,
+  질문의 구분 요소(query_entities: 사전 매칭한 교수명/과목명 + 숫자/영문 코드)가 같은 항목만 적중
+- 벡터화 스크립트(vectorize_courses_pinecone_direct.py)가 인덱스를 재구축하면 새 index_version을
+  metadata_stats.json과 MongoDB(index_versions 컬렉션)에 기록하고, 버전이 바뀌면 캐시 전체를 무효화
+  (다른 호스트에서 재구축해도 watch_index_version이 MongoDB를 주기적으로 확인해 반영)
+- 이벤트 루프 안에서만 사용 (락 없음)
+"""
+import asyncio
+import json
+import re
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from database import Collections, db_instance
+from services.gazetteer import MetadataFilter
+from vectorstore_base import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# index_versions 컬렉션에서 벡터 인덱스 버전을 담는 문서 ID (벡터화 스크립트와 동일해야 함)
+INDEX_VERSION_DOC_ID = "vectorstore"
+
+# 임베딩에 잘 드러나지 않는 구분 요소: 숫자("5주차", "3학점"), 영문+숫자 과목 코드("CS101")
+_DISTINGUISHING_TOKEN = re.compile(r"[0-9]+|[A-Za-z]+[0-9][A-Za-z0-9]*")
+
+QueryEntities = Tuple[Tuple[Tuple[str, Tuple[str, ...]], ...], Tuple[str, ...]]
+
+
+def query_entities(query: str, metadata_filter: Optional[MetadataFilter] = None) -> QueryEntities:
+    """
+    캐시 적중 조건으로 쓸 질문의 구분 요소
+
+    Args:
+        query: 사용자 질문
+        metadata_filter: 사전(gazetteer)이 질문에서 찾은 교수명/과목명
+
+    Returns:
+        (정렬된 메타데이터 필터, 정렬된 숫자/코드 토큰) - 비교/해시 가능한 튜플
+    """
+    filter_key = tuple(sorted((field, tuple(sorted(values))) for field, values in (metadata_filter or {}).items()))
+    tokens = {token.upper() for token in _DISTINGUISHING_TOKEN.findall(normalize_query(query))}
+    return filter_key, tuple(sorted(tokens))
+
+
+@dataclass
+class CachedAnswer:
+    """캐시 항목"""
+    embedding: np.ndarray
+    entities: QueryEntities
+    doc_ids: List[str]
+    documents: List[Dict[str, Any]]
+    answer: str
+    size_bytes: int
+    created_at: float = field(default_factory=time.monotonic)
+
+
+def _estimate_size(embedding: np.ndarray, documents: List[Dict[str, Any]], answer: str) -> int:
+    """캐시 항목의 대략적인 메모리 사용량 (바이트)"""
+    size = embedding.nbytes + len(answer.encode("utf-8"))
+    for doc in documents:
+        size += len(doc.get("page_content", "").encode("utf-8"))
+        size += len(json.dumps(doc.get("metadata", {}), ensure_ascii=False).encode("utf-8"))
+    return size
+
+
+class SemanticAnswerCache:
+    """쿼리 임베딩 코사인 거리 기반 답변 캐시"""
+
+    def __init__(
+        self,
+        max_distance: float = 0.05,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        index_version_path: Optional[Path] = None,
+        index_version_check_seconds: float = 30
+    ):
+        """
+        Args:
+            max_distance: 캐시 적중으로 인정할 최대 코사인 거리 (1 - 코사인 유사도)
+            ttl_seconds: 항목 유효 시간 (초)
+            max_entries: 최대 항목 수
+            max_bytes: 최대 메모리 사용량 (바이트)
+            index_version_path: 인덱스 버전이 기록된 metadata_stats.json 경로
+            index_version_check_seconds: 인덱스 버전 확인 주기 (초)
+        """
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.index_version_path = index_version_path
+        self.index_version_check_seconds = index_version_check_seconds
+
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_key = 0
+        self._total_bytes = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[int] = []
+
+        self._index_versions: Dict[str, str] = {}  # 출처("file" / "mongo")별 마지막으로 본 버전
+        self._index_version_checked_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ---------- 내부 헬퍼 ----------
+
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def _remove(self, key: int) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.size_bytes
+        self._matrix = None
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            self._remove(key)
+            self.evictions += 1
+
+    def _evict_over_capacity(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _read_index_version(self) -> Optional[str]:
+        """metadata_stats.json에서 인덱스 버전 읽기 (없으면 파일 수정 시각 사용)"""
+        try:
+            stats = json.loads(self.index_version_path.read_text(encoding="utf-8"))
+            return str(stats.get("index_version") or self.index_version_path.stat().st_mtime)
+        except (OSError, ValueError):
+            return None
+
+    def _check_index_version(self) -> None:
+        """인덱스 재구축 여부를 주기적으로 확인하고, 바뀌었으면 전체 무효화"""
+        if self.index_version_path is None:
+            return
+
+        now = time.monotonic()
+        if now - self._index_version_checked_at < self.index_version_check_seconds:
+            return
+        self._index_version_checked_at = now
+
+        version = self._read_index_version()
+        if version is not None:
+            self.observe_index_version(version, source="file")
+
+    def _get_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[key].embedding for key in self._matrix_keys])
+        return self._matrix
+
+    # ---------- 공개 API ----------
+
+    def lookup(self, query_embedding, entities: QueryEntities = ((), ())) -> Optional[CachedAnswer]:
+        """
+        구분 요소가 같은 캐시 항목 중 가장 가까운 항목 조회
+
+        Args:
+            query_embedding: 쿼리 임베딩
+            entities: 질문의 구분 요소 (query_entities)
+
+        Returns:
+            구분 요소가 같고 코사인 거리가 max_distance 이내인 캐시 항목 또는 None
+        """
+        if query_embedding is None:
+            return None
+
+        self._check_index_version()
+        self._evict_expired()
+
+        query_vector = self._normalize(query_embedding)
+        if query_vector is None or not self._entries:
+            self.misses += 1
+            return None
+
+        similarities = self._get_matrix() @ query_vector
+        same_entities = np.fromiter(
+            (self._entries[key].entities == entities for key in self._matrix_keys),
+            dtype=bool,
+            count=len(self._matrix_keys)
+        )
+        if not same_entities.any():
+            self.misses += 1
+            return None
+        similarities = np.where(same_entities, similarities, -np.inf)
+        best = int(np.argmax(similarities))
+        distance = 1.0 - float(similarities[best])
+
+        if distance > self.max_distance:
+            self.misses += 1
+            return None
+
+        key = self._matrix_keys[best]
+        self._entries.move_to_end(key)
+        self.hits += 1
+        logger.info(f"답변 캐시 적중 (코사인 거리: {distance:.4f})")
+        return self._entries[key]
+
+    def store(
+        self,
+        query_embedding,
+        documents: List[Dict[str, Any]],
+        answer: str,
+        entities: QueryEntities = ((), ())
+    ) -> None:
+        """
+        답변 저장
+
+        Args:
+            query_embedding: 쿼리 임베딩
+            documents: 답변 생성에 사용한 검색 문서
+            answer: 생성된 답변
+            entities: 질문의 구분 요소 (query_entities, 조회 시 같아야 적중)
+        """
+        if query_embedding is None or not answer:
+            return
+
+        vector = self._normalize(query_embedding)
+        if vector is None:
+            return
+
+        self._check_index_version()
+
+        entry = CachedAnswer(
+            embedding=vector,
+            entities=entities,
+            doc_ids=[doc.get("id", "") for doc in documents],
+            documents=documents,
+            answer=answer,
+            size_bytes=_estimate_size(vector, documents, answer)
+        )
+        if entry.size_bytes > self.max_bytes:
+            return
+
+        self._entries[self._next_key] = entry
+        self._next_key += 1
+        self._total_bytes += entry.size_bytes
+        self._matrix = None
+        self._evict_over_capacity()
+
+    def observe_index_version(self, version: str, source: str = "mongo") -> None:
+        """
+        현재 벡터 인덱스 버전 반영 (같은 출처에서 이전과 다른 버전을 보면 캐시 전체 무효화)
+
+        출처별로 따로 비교하므로 로컬 파일이 오래된 호스트에서도 두 버전을 번갈아 보며 무효화하지 않습니다.
+
+        Args:
+            version: 벡터화 스크립트가 기록한 index_version
+            source: 버전 출처 ("file": metadata_stats.json, "mongo": index_versions 컬렉션)
+        """
+        previous = self._index_versions.get(source)
+        if previous is not None and version != previous:
+            logger.info(f"벡터 인덱스 재구축 감지 ({source}: {previous} → {version}) - 답변 캐시 무효화")
+            self.invalidate()
+        self._index_versions[source] = version
+
+    def invalidate(self) -> None:
+        """캐시 전체 무효화 (인덱스 재구축 / 문서 추가 시)"""
+        self._entries.clear()
+        self._total_bytes = 0
+        self._matrix = None
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "index_versions": dict(self._index_versions)
+        }
+
+
+# 싱글톤 인스턴스
+_answer_cache = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """답변 캐시 싱글톤 인스턴스 반환 (비활성화 시 None)"""
+    global _answer_cache
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            max_distance=settings.ANSWER_CACHE_MAX_DISTANCE,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            max_bytes=settings.ANSWER_CACHE_MAX_MB * 1024 * 1024,
+            index_version_path=Path(settings.VECTORSTORE_STATS_PATH),
+            index_version_check_seconds=settings.ANSWER_CACHE_INDEX_POLL_SECONDS
+        )
+    return _answer_cache
+
+
+async def watch_index_version(poll_seconds: float) -> None:
+    """
+    MongoDB에 기록된 벡터 인덱스 버전을 주기적으로 확인해 답변 캐시에 반영 (앱 시작 시 백그라운드 실행)
+
+    로컬 metadata_stats.json이 갱신되지 않는 다른 호스트/컨테이너에서 재구축한 경우에도 무효화됩니다.
+    """
+    while True:
+        answer_cache = get_answer_cache()
+        if answer_cache is not None:
+            try:
+                doc = await db_instance.get_collection(Collections.INDEX_VERSIONS).find_one(
+                    {"_id": INDEX_VERSION_DOC_ID}, {"version": 1}
+                )
+                if doc and doc.get("version"):
+                    answer_cache.observe_index_version(str(doc["version"]), source="mongo")
+            except Exception as e:
+                logger.warning(f"벡터 인덱스 버전 확인 실패: {e}")
+        await asyncio.sleep(poll_seconds)
@@ -0,0 +1,156 @@
+"""
+프로세스 내 백그라운드 작업 큐
+
+응답 경로에서 기다릴 필요가 없는 작업(대화 제목 생성 등)을 큐에 넣고 워커가 처리합니다.
+
+- 동시 실행 수 제한 (워커 수), 큐 길이 상한 (가득 차면 작업 폐기)
+- 실패 시 지수 백오프 재시도
+- 앱 종료 시 남은 작업을 시간 제한 안에서 처리한 뒤 워커 종료 (graceful drain)
+- 큐 길이, 작업 지연(대기 + 실행) 통계
+"""
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[str, Callable[[], Awaitable[Any]], float]
+
+
+class BackgroundQueue:
+    """재시도와 동시 실행 제한이 있는 비동기 작업 큐"""
+
+    def __init__(self, name: str, concurrency: int = 2, max_retries: int = 2, max_size: int = 1000):
+        """
+        Args:
+            name: 로그/통계용 큐 이름
+            concurrency: 동시에 실행할 최대 작업 수 (워커 수)
+            max_retries: 실패 시 재시도 횟수
+            max_size: 큐 길이 상한
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.max_size = max_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self._latency_total_ms = 0.0
+        self._latency_max_ms = 0.0
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        """큐와 워커를 현재 이벤트 루프에서 시작 (최초 1회)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+                for i in range(self.concurrency)
+            ]
+        return self._queue
+
+    def enqueue(self, job_name: str, work: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        작업 추가 (즉시 반환)
+
+        Args:
+            job_name: 로그용 작업 이름
+            work: 작업 코루틴을 만드는 함수 (재시도 시 다시 호출)
+
+        Returns:
+            큐에 들어갔으면 True, 큐가 가득 차 폐기됐으면 False
+        """
+        queue = self._ensure_workers()
+        try:
+            queue.put_nowait((job_name, work, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"{self.name} 큐가 가득 차 작업을 폐기합니다: {job_name}")
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self, job_name: str, work: Callable[[], Awaitable[Any]]) -> None:
+        """작업 실행 (실패 시 지수 백오프 재시도)"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await work()
+                self.completed += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    logger.error(f"{self.name} 작업 실패 ({job_name}): {e}", exc_info=True)
+                    return
+                self.retries += 1
+                wait_time = 0.5 * (2 ** attempt)
+                logger.warning(f"{self.name} 작업 재시도 {attempt + 1}/{self.max_retries} ({job_name}): {e}")
+                await asyncio.sleep(wait_time)
+
+    async def _worker(self) -> None:
+        while True:
+            job_name, work, enqueued_at = await self._queue.get()
+            try:
+                await self._run(job_name, work)
+            finally:
+                elapsed_ms = (time.perf_counter() - enqueued_at) * 1000
+                self._latency_total_ms += elapsed_ms
+                self._latency_max_ms = max(self._latency_max_ms, elapsed_ms)
+                self._queue.task_done()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """
+        남은 작업을 timeout 안에서 처리하고 워커 종료 (앱 종료 시)
+
+        Args:
+            timeout: 남은 작업을 기다릴 최대 시간 (초)
+        """
+        if self._queue is None:
+            return
+
+        pending = self._queue.qsize()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            logger.info(f"{self.name} 큐 정리 완료 (남은 작업 {pending}개 처리)")
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} 큐 정리 시간 초과 - 미처리 작업 {self._queue.qsize()}개 폐기")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 통계"""
+        finished = self.completed + self.failed
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "concurrency": self.concurrency,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "avg_latency_ms": round(self._latency_total_ms / finished, 1) if finished else 0.0,
+            "max_latency_ms": round(self._latency_max_ms, 1)
+        }
+
+
+# 대화 제목 생성 큐
+title_queue = BackgroundQueue(
+    name="제목 생성",
+    concurrency=settings.TITLE_QUEUE_CONCURRENCY,
+    max_retries=settings.TITLE_QUEUE_MAX_RETRIES,
+    max_size=settings.TITLE_QUEUE_MAX_SIZE
+)
@@ -0,0 +1,192 @@
+"""
+답변 생성용 컨텍스트 패킹 서비스
+
+검색된 청크를 그대로 이어 붙이지 않고 HyperCLOVA 입력 토큰을 줄이기 위해:
+1. 같은 course_code + section의 청크를 하나로 합침 (청크 간 중복 구간 제거, 교수님별 수업 목록은 교수별로)
+2. 벡터화 시 청크마다 붙인 "[강의명] ... [담당교수] ..." 헤더를 제거하고 블록당 한 번만 표기
+3. 검색 순위 순으로 토큰 예산(CONTEXT_TOKEN_BUDGET)까지만 채움
+
+토큰 수 추정:
+- HCX_TOKENIZER_PATH에 HCX 계열 tokenizer.json이 있으면 tokenizers 라이브러리로 정확히 계산
+- 없으면 문자 종류별 비율로 추정하고, API 응답의 usage.promptTokens로 비율을 보정
+"""
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_HEADER = re.compile(r"^\[강의명\][^\n]*\n\[담당교수\][^\n]*\n+")
+_HANGUL = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_NON_SPACE = re.compile(r"\S")
+MAX_OVERLAP_CHARS = 120
+
+# 교수님별 수업 목록 문서의 course_code (교수마다 별도 문서이므로 교수명까지 묶음 기준에 포함)
+PROFESSOR_LIST_CODE = "PROFESSOR_LIST"
+
+
+class TokenEstimator:
+    """HCX 토큰 수 추정기"""
+
+    # 문자당 토큰 수 (HCX 토크나이저는 한글 음절을 1~2자 단위로 묶음)
+    HANGUL_TOKENS_PER_CHAR = 0.7
+    OTHER_TOKENS_PER_CHAR = 0.35
+
+    def __init__(self, tokenizer_path: str = ""):
+        """
+        Args:
+            tokenizer_path: HuggingFace tokenizers 형식의 tokenizer.json 경로 (선택)
+        """
+        self._tokenizer = None
+        self.scale = 1.0
+        self.calibrations = 0
+
+        if tokenizer_path:
+            try:
+                from tokenizers import Tokenizer
+
+                self._tokenizer = Tokenizer.from_file(tokenizer_path)
+                logger.info(f"HCX 토크나이저 로딩 완료: {tokenizer_path}")
+            except Exception as e:
+                logger.warning(f"HCX 토크나이저 로딩 실패 - 문자 수 기반 추정 사용: {e}")
+
+    def count(self, text: str) -> int:
+        """텍스트의 토큰 수 (추정)"""
+        if not text:
+            return 0
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+        hangul = len(_HANGUL.findall(text))
+        other = len(_NON_SPACE.findall(text)) - hangul
+        return int((hangul * self.HANGUL_TOKENS_PER_CHAR + other * self.OTHER_TOKENS_PER_CHAR) * self.scale) + 1
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """메시지 리스트의 토큰 수 (메시지당 역할 토큰 포함)"""
+        return sum(self.count(message.get("content", "")) + 4 for message in messages)
+
+    def calibrate(self, estimated: int, actual: int) -> None:
+        """
+        API가 보고한 실제 입력 토큰 수로 추정 비율 보정 (지수 이동 평균)
+
+        Args:
+            estimated: count_messages로 추정한 토큰 수
+            actual: 응답 usage.promptTokens
+        """
+        if self._tokenizer is not None or estimated <= 0 or actual <= 0:
+            return
+        ratio = min(max(actual / estimated, 0.5), 2.0)
+        self.scale = min(max(self.scale * (0.9 + 0.1 * ratio), 0.5), 3.0)
+        self.calibrations += 1
+
+
+def _strip_header(text: str) -> str:
+    """청크 앞의 [강의명]/[담당교수] 헤더 제거"""
+    return _CHUNK_HEADER.sub("", text, count=1).strip()
+
+
+def _append_without_overlap(merged: str, text: str) -> str:
+    """이어 붙일 청크 앞부분이 이전 청크 끝과 겹치면 (청크 overlap) 겹친 부분을 제외하고 추가"""
+    if not merged:
+        return text
+    if text in merged:
+        return merged
+    max_overlap = min(len(merged), len(text), MAX_OVERLAP_CHARS)
+    for size in range(max_overlap, 0, -1):
+        if merged.endswith(text[:size]):
+            return merged + text[size:]
+    return merged + "\n" + text
+
+
+def _merge_chunks(context_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """같은 course_code + section (교수님별 수업 목록은 + professor) 청크를 검색 순위 순서로 묶어 하나의 블록으로 병합"""
+    groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+    for rank, doc in enumerate(context_docs):
+        metadata = doc.get("metadata", {}) or {}
+        text = doc.get("content", doc.get("page_content", ""))
+        course_code = metadata.get("course_code")
+        key = (
+            course_code or metadata.get("course_name") or f"doc-{rank}",
+            metadata.get("section", ""),
+            metadata.get("professor", "") if course_code == PROFESSOR_LIST_CODE else ""
+        )
+        groups.setdefault(key, []).append({"metadata": metadata, "text": text, "rank": rank})
+
+    blocks = []
+    for chunks in groups.values():
+        # 원문 순서대로 이어 붙이기 (chunk_index가 없으면 검색 순위 순)
+        chunks.sort(key=lambda chunk: (chunk["metadata"].get("chunk_index", chunk["rank"]), chunk["rank"]))
+        content = ""
+        for chunk in chunks:
+            content = _append_without_overlap(content, _strip_header(chunk["text"]))
+
+        metadata = chunks[0]["metadata"]
+        header_parts = []
+        if metadata.get("course_code") != PROFESSOR_LIST_CODE and metadata.get("course_name"):
+            header_parts.append(f"[강의명] {metadata['course_name']}")
+        if metadata.get("professor"):
+            header_parts.append(f"[담당교수] {metadata['professor']}")
+        if metadata.get("section"):
+            header_parts.append(f"[항목] {metadata['section']}")
+
+        blocks.append({
+            "header": " | ".join(header_parts),
+            "content": content,
+            "rank": min(chunk["rank"] for chunk in chunks)
+        })
+
+    blocks.sort(key=lambda block: block["rank"])
+    return blocks
+
+
+def pack_context(
+    context_docs: List[Dict[str, Any]],
+    token_budget: int,
+    estimator: Optional[TokenEstimator] = None
+) -> str:
+    """
+    검색 문서를 토큰 예산 안의 컨텍스트 텍스트로 패킹
+
+    Args:
+        context_docs: 검색된 컨텍스트 문서 리스트 (검색 순위 순)
+        token_budget: 컨텍스트에 사용할 최대 토큰 수
+        estimator: 토큰 수 추정기 (기본: 싱글톤)
+
+    Returns:
+        "[관련 정보 N] 헤더\\n본문" 블록을 이어 붙인 컨텍스트 텍스트
+    """
+    estimator = estimator or get_token_estimator()
+
+    sections = []
+    used = 0
+    for block in _merge_chunks(context_docs):
+        title = f"[관련 정보 {len(sections) + 1}] {block['header']}".rstrip()
+        text = f"{title}\n{block['content']}"
+        tokens = estimator.count(text)
+
+        if used + tokens > token_budget:
+            # 남은 예산만큼 잘라서 넣을 수 있으면 넣고 종료
+            remaining = token_budget - used - estimator.count(title)
+            if remaining > 50:
+                ratio = remaining / max(estimator.count(block["content"]), 1)
+                sections.append(f"{title}\n{block['content'][:int(len(block['content']) * ratio)]}")
+            break
+
+        sections.append(text)
+        used += tokens
+
+    return "\n\n".join(sections)
+
+
+# 싱글톤 인스턴스
+_token_estimator = None
+
+
+def get_token_estimator() -> TokenEstimator:
+    """토큰 수 추정기 싱글톤 인스턴스 반환"""
+    global _token_estimator
+    if _token_estimator is None:
+        _token_estimator = TokenEstimator(settings.HCX_TOKENIZER_PATH)
+    return _token_estimator
@@ -0,0 +1,202 @@
+"""
+대화 메모리 서비스 (누적 요약 + 최근 메시지)
+
+대화방 문서에 지난 대화의 요약(summary)과 요약에 포함된 마지막 메시지 순서(summary_order)를 저장하고,
+프롬프트에는 원문 대화 대신 [요약 + 요약 이후 최근 메시지]를 토큰 예산(MEMORY_TOKEN_BUDGET) 안에서 넣습니다.
+
+- 요약은 MEMORY_SUMMARY_EVERY_TURNS 턴마다 백그라운드 큐(summary_queue)에서 증분 갱신
+  (응답 지연에 영향 없음, 앱 종료 시 남은 갱신을 처리)
+- 동시에 갱신이 겹치면 summary_order 조건부 업데이트로 먼저 끝난 쪽만 반영
+- 최근 메시지는 프로세스 내 캐시(services/history_cache.py)에 있으면 Mongo를 읽지 않음
+"""
+import logging
+from typing import Any, Dict, List, Set
+
+from bson import ObjectId
+
+from config import settings
+from database import Collections, db_instance
+from hyperclova_client import get_hyperclova_client
+from services.context_packer import get_token_estimator
+from services.background_queue import BackgroundQueue
+from services.history_cache import get_history_cache
+from services.write_behind import ensure_conversation_flushed
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = """당신은 대학교 수업 안내 챗봇의 대화 기록을 요약하는 도우미입니다.
+기존 요약과 새 대화를 합쳐 이후 질문에 답하는 데 필요한 정보(언급된 과목, 교수님, 사용자의 관심사와 결정 사항)만 남긴 요약을 작성하세요.
+요약문만 출력하고 다른 설명은 하지 마세요."""
+
+# 대화 요약 갱신 큐 (실패해도 다음 턴에 다시 시도하므로 큐에서는 재시도하지 않음)
+summary_queue = BackgroundQueue(
+    name="대화 요약",
+    concurrency=settings.SUMMARY_QUEUE_CONCURRENCY,
+    max_retries=0,
+    max_size=settings.SUMMARY_QUEUE_MAX_SIZE
+)
+
+# 큐에 들어갔거나 진행 중인 요약 갱신 (대화 ID 기준 중복 방지)
+_in_flight: Set[str] = set()
+
+
+async def _load_recent_messages(conversation: Dict[str, Any], summary_order: int) -> List[Dict[str, str]]:
+    """요약 이후의 최근 메시지 (요약이 아직 따라잡지 못한 구간은 최근 N개만 사용)"""
+    limit = settings.MEMORY_RECENT_MESSAGES
+    history_cache = get_history_cache()
+    # 턴 시작 시 예약 전 카운터 (카운터 백필 전 대화방은 캐시 사용 안 함)
+    next_order = conversation.get("message_count")
+
+    if history_cache is not None and next_order is not None:
+        cached = history_cache.get(conversation["_id"], next_order, summary_order, limit)
+        if cached is not None:
+            return cached
+
+    # 쓰기 지연 모드: 직전 턴의 봇 메시지가 아직 버퍼에 있으면 먼저 반영
+    await ensure_conversation_flushed(conversation["_id"])
+
+    messages_collection = db_instance.get_collection(Collections.MESSAGES)
+    recent_messages = await messages_collection.find(
+        {"conversation_id": conversation["_id"], "order": {"$gt": summary_order}},
+        {"role": 1, "content": 1, "order": 1}
+    ).sort("order", -1).limit(limit).to_list(length=limit)
+    recent_messages.reverse()
+
+    if history_cache is not None and next_order is not None:
+        history_cache.seed(conversation["_id"], recent_messages, summary_order, complete=len(recent_messages) < limit)
+
+    return [{"role": msg["role"], "content": msg["content"]} for msg in recent_messages]
+
+
+def record_message(conversation_id: ObjectId, order: int, role: str, content: str) -> None:
+    """저장한 메시지를 최근 메시지 캐시에 기록 (write-through)"""
+    history_cache = get_history_cache()
+    if history_cache is not None:
+        history_cache.append(conversation_id, order, role, content)
+
+
+def forget_conversation(conversation_id: ObjectId) -> None:
+    """대화 삭제 시 최근 메시지 캐시에서 제거"""
+    history_cache = get_history_cache()
+    if history_cache is not None:
+        history_cache.invalidate(conversation_id)
+
+
+async def build_message_history(conversation: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    프롬프트용 대화 히스토리 구성
+
+    Args:
+        conversation: 대화방 문서 (summary, summary_order, 턴 시작 시 예약 전 message_count 포함 가능)
+
+    Returns:
+        [{"role": "system", "content": "이전 대화 요약: ..."}, {"role": ..., "content": ...}, ...]
+        (요약이 있으면 system 메시지로 맨 앞에 위치, 토큰 예산 초과 시 오래된 메시지부터 제외)
+    """
+    summary = conversation.get("summary", "")
+    summary_order = conversation.get("summary_order", -1)
+
+    recent_messages = await _load_recent_messages(conversation, summary_order)
+    history = list(recent_messages)
+
+    estimator = get_token_estimator()
+    budget = settings.MEMORY_TOKEN_BUDGET
+    summary_message = {"role": "system", "content": f"이전 대화 요약: {summary}"} if summary else None
+    summary_tokens = estimator.count(summary_message["content"]) if summary_message else 0
+
+    while history and summary_tokens + sum(estimator.count(msg["content"]) for msg in history) > budget:
+        history.pop(0)
+
+    if summary_message:
+        if summary_tokens > budget:
+            summary_message["content"] = summary_message["content"][:int(len(summary_message["content"]) * budget / summary_tokens)]
+        history.insert(0, summary_message)
+
+    logger.info(f"대화 메모리: 요약 {'있음' if summary else '없음'}, 최근 메시지 {len(recent_messages)}개 중 {len(history) - (1 if summary else 0)}개 포함")
+    return history
+
+
+async def _update_summary(conversation_id: str, summary: str, summary_order: int, upto_order: int) -> None:
+    """(summary_order, upto_order] 구간의 메시지를 기존 요약에 합쳐 새 요약 저장"""
+    conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
+    messages_collection = db_instance.get_collection(Collections.MESSAGES)
+    conv_object_id = ObjectId(conversation_id)
+
+    try:
+        messages = await messages_collection.find(
+            {"conversation_id": conv_object_id, "order": {"$gt": summary_order, "$lte": upto_order}},
+            {"role": 1, "content": 1}
+        ).sort("order", 1).to_list(length=None)
+        if not messages:
+            return
+
+        conversation_text = "\n".join(
+            f"{'사용자' if msg['role'] == 'user' else 'AI'}: {msg['content']}"
+            for msg in messages
+        )
+        prompt = f"""기존 요약:
+{summary or '(없음)'}
+
+새 대화:
+{conversation_text}
+
+{settings.MEMORY_SUMMARY_MAX_CHARS}자 이내의 갱신된 요약:"""
+
+        hyperclova = get_hyperclova_client()
+        new_summary = await hyperclova.chat_text(
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=400,
+            temperature=0.3
+        )
+        new_summary = new_summary[:settings.MEMORY_SUMMARY_MAX_CHARS]
+        if not new_summary:
+            return
+
+        # 다른 갱신이 먼저 반영됐으면 덮어쓰지 않음
+        order_condition = (
+            {"$or": [{"summary_order": summary_order}, {"summary_order": {"$exists": False}}]}
+            if summary_order < 0 else {"summary_order": summary_order}
+        )
+        result = await conversations_collection.update_one(
+            {"_id": conv_object_id, **order_condition},
+            {"$set": {"summary": new_summary, "summary_order": upto_order}}
+        )
+        if result.modified_count:
+            logger.info(f"대화 요약 갱신: {conversation_id} (메시지 {upto_order}까지)")
+
+    except Exception as e:
+        logger.error(f"대화 요약 갱신 중 오류 발생: {e}", exc_info=True)
+        # 요약 실패는 치명적이지 않음 (다음 턴에 다시 시도)
+    finally:
+        _in_flight.discard(conversation_id)
+
+
+def schedule_summary_update(conversation: Dict[str, Any], last_order: int) -> None:
+    """
+    요약되지 않은 메시지가 충분히 쌓였으면 요약 갱신을 백그라운드 큐에 추가
+
+    최근 MEMORY_RECENT_MESSAGES개는 원문으로 남기고, 그 이전 메시지가
+    MEMORY_SUMMARY_EVERY_TURNS턴 이상 쌓이면 요약에 합칩니다.
+
+    Args:
+        conversation: 대화방 문서 (턴 시작 시 조회한 summary, summary_order)
+        last_order: 방금 저장한 마지막 메시지 순서
+    """
+    conversation_id = str(conversation["_id"])
+    summary_order = conversation.get("summary_order", -1)
+    upto_order = last_order - settings.MEMORY_RECENT_MESSAGES
+
+    if upto_order - summary_order < settings.MEMORY_SUMMARY_EVERY_TURNS * 2:
+        return
+    if conversation_id in _in_flight:
+        return
+
+    _in_flight.add(conversation_id)
+    if not summary_queue.enqueue(
+        f"summary:{conversation_id}:{upto_order}",
+        lambda: _update_summary(conversation_id, conversation.get("summary", ""), summary_order, upto_order)
+    ):
+        _in_flight.discard(conversation_id)
@@ -0,0 +1,168 @@
+"""
+교수명 / 과목명 사전(gazetteer) 기반 메타데이터 필터 서비스
+
+벡터화 스크립트가 저장한 metadata_stats.json의 교수, 과목 목록으로 Aho-Corasick 매처를 만들어
+질문에 교수명이나 과목명이 들어 있으면 벡터 검색에 메타데이터 필터를 적용합니다.
+(검색 범위를 좁혀 적은 k로도 재현율 유지)
+
+필터 형식: {"professor": ["임석구"], "course_name": ["C언어프로그래밍"]}
+(필드 간 AND, 값 목록 안에서는 OR)
+"""
+import json
+import re
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MetadataFilter = Dict[str, List[str]]
+
+_IGNORED_CHARS = re.compile(r"\s+")
+_NAME_SEPARATORS = re.compile(r"[,/·]")
+MIN_PATTERN_LENGTH = 2
+
+
+def _normalize(text: str) -> str:
+    """공백 제거 + 소문자 ("C 언어 프로그래밍" → "c언어프로그래밍")"""
+    return _IGNORED_CHARS.sub("", text).lower()
+
+
+class AhoCorasick:
+    """다중 패턴 문자열 매처 (패턴 → 메타데이터 값 목록)"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, Tuple[str, str]]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload: Tuple[str, str]) -> None:
+        """패턴 추가 (payload: (메타데이터 필드, 값))"""
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append((len(pattern), payload))
+        self._built = False
+
+    def build(self) -> None:
+        """실패 링크 생성 (BFS)"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[child] = candidate if candidate != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> List[Tuple[int, int, Tuple[str, str]]]:
+        """
+        text 안의 모든 패턴 매칭
+
+        Returns:
+            [(시작 위치, 끝 위치, payload), ...]
+        """
+        if not self._built:
+            self.build()
+
+        matches = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, payload in self._outputs[node]:
+                matches.append((position - length + 1, position + 1, payload))
+        return matches
+
+
+class Gazetteer:
+    """교수명 / 과목명 사전"""
+
+    def __init__(self, professors: List[str], courses: List[str]):
+        """
+        Args:
+            professors: 메타데이터 professor 값 목록 ("임석구, 홍길동"처럼 여러 명일 수 있음)
+            courses: 메타데이터 course_name 값 목록
+        """
+        self._matcher = AhoCorasick()
+        self.size = 0
+
+        for value in professors:
+            for name in _NAME_SEPARATORS.split(value):
+                self._add(name, ("professor", value))
+        for value in courses:
+            self._add(value, ("course_name", value))
+        self._matcher.build()
+
+    def _add(self, name: str, payload: Tuple[str, str]) -> None:
+        pattern = _normalize(name)
+        if len(pattern) >= MIN_PATTERN_LENGTH:
+            self._matcher.add(pattern, payload)
+            self.size += 1
+
+    def match(self, query: str) -> MetadataFilter:
+        """
+        질문에서 교수명 / 과목명 추출
+
+        겹치는 매칭은 긴 쪽만 사용합니다 ("C언어프로그래밍" 안의 "C언어" 무시).
+
+        Returns:
+            필드별 메타데이터 값 목록 (매칭이 없으면 빈 dict)
+        """
+        matches = self._matcher.iter_matches(_normalize(query))
+        matches.sort(key=lambda match: match[1] - match[0], reverse=True)
+
+        covered: List[Tuple[int, int]] = []
+        selected: Dict[str, Set[str]] = {}
+        for start, end, (field, value) in matches:
+            if any(start < c_end and c_start < end and (c_start, c_end) != (start, end) for c_start, c_end in covered):
+                continue
+            covered.append((start, end))
+            selected.setdefault(field, set()).add(value)
+
+        return {field: sorted(values) for field, values in selected.items()}
+
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Optional[MetadataFilter]) -> bool:
+    """문서 메타데이터가 필터 조건을 만족하는지 확인 (로컬 검색용)"""
+    if not metadata_filter:
+        return True
+    return all(metadata.get(field) in values for field, values in metadata_filter.items())
+
+
+def to_pinecone_filter(metadata_filter: MetadataFilter) -> Dict[str, Any]:
+    """Pinecone 메타데이터 필터 문법으로 변환"""
+    clauses = [{field: {"$in": values}} for field, values in metadata_filter.items()]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def load_gazetteer(stats_path: Path) -> Optional[Gazetteer]:
+    """metadata_stats.json으로 사전 생성 (파일이 없으면 None)"""
+    try:
+        stats = json.loads(stats_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning(f"메타데이터 통계 파일을 읽을 수 없습니다 - 메타데이터 필터 비활성화: {e}")
+        return None
+
+    gazetteer = Gazetteer(
+        professors=stats.get("professors", []),
+        courses=stats.get("courses", [])
+    )
+    logger.info(f"교수명/과목명 사전 생성 완료: {gazetteer.size}개 패턴 ({stats_path})")
+    return gazetteer
@@ -0,0 +1,147 @@
+"""
+대화별 최근 메시지 캐시 (프로세스 내 LRU + 링 버퍼)
+
+채팅 턴마다 Mongo에서 최근 메시지를 다시 읽지 않도록, 이 프로세스가 저장한 메시지를
+대화별 링 버퍼(role/content)에 함께 기록(write-through)하고 대화 메모리 구성 시 사용합니다.
+
+여러 워커 안전성:
+- 캐시 항목은 "다음 메시지 순서(next_order)"까지 빠짐없이 기록했을 때만 사용
+- 턴 시작 시 원자적으로 예약한 message_count와 next_order가 다르면 (다른 워커가 쓴 메시지,
+  실패한 턴, 동시 턴) 캐시를 쓰지 않고 Mongo 조회로 대체한 뒤 그 결과로 다시 채움
+- 순서가 이어지지 않는 기록이 들어오면 해당 항목을 버림
+"""
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+CachedMessage = Tuple[int, str, str]  # (order, role, content)
+
+
+@dataclass
+class _HistoryEntry:
+    """대화 하나의 최근 메시지"""
+    messages: Deque[CachedMessage]
+    next_order: int  # 여기까지(미만) 기록이 이어짐
+    base_order: int  # base_order 이상의 메시지는 빠짐없이 보유
+
+
+class HistoryCache:
+    """대화별 최근 메시지 LRU 캐시"""
+
+    def __init__(self, max_conversations: int = 1000, messages_per_conversation: int = 8):
+        """
+        Args:
+            max_conversations: 캐시할 최대 대화 수 (초과 시 가장 오래 쓰지 않은 대화 제거)
+            messages_per_conversation: 대화당 보관할 최근 메시지 수
+        """
+        self.max_conversations = max_conversations
+        self.messages_per_conversation = messages_per_conversation
+        self._entries: "OrderedDict[Hashable, _HistoryEntry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, conversation_id: Hashable, next_order: int, after_order: int, limit: int) -> Optional[List[Dict[str, str]]]:
+        """
+        after_order 이후의 최근 메시지 limit개 반환
+
+        Args:
+            conversation_id: 대화 ID
+            next_order: 턴 시작 시 예약 전 message_count (이 순서 미만의 메시지가 모두 기록돼 있어야 함)
+            after_order: 이 순서 이후의 메시지만 (요약에 포함된 마지막 순서)
+            limit: 최대 메시지 수
+
+        Returns:
+            [{"role", "content"}, ...] (오래된 순), 캐시로 답할 수 없으면 None
+        """
+        entry = self._entries.get(conversation_id)
+        if entry is None or entry.next_order != next_order:
+            self.misses += 1
+            return None
+
+        messages = [message for message in entry.messages if message[0] > after_order]
+        if len(messages) < limit and entry.base_order > after_order + 1:
+            # 필요한 구간이 링 버퍼 밖으로 밀려남
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return [{"role": role, "content": content} for _, role, content in messages[-limit:]]
+
+    def seed(self, conversation_id: Hashable, messages: List[Dict[str, Any]], after_order: int, complete: bool) -> None:
+        """
+        Mongo 조회 결과로 캐시 항목을 다시 채움
+
+        Args:
+            messages: order 오름차순 메시지 (order, role, content)
+            after_order: 조회 조건의 시작 순서 (이 순서 이후만 조회함)
+            complete: after_order 이후의 메시지를 모두 읽었는지 (limit보다 적게 반환됨)
+        """
+        entry = _HistoryEntry(
+            messages=deque(
+                ((msg["order"], msg["role"], msg["content"]) for msg in messages),
+                maxlen=self.messages_per_conversation
+            ),
+            next_order=messages[-1]["order"] + 1 if messages else after_order + 1,
+            base_order=after_order + 1 if complete or not messages else messages[0]["order"]
+        )
+        if entry.messages and len(entry.messages) < len(messages):
+            entry.base_order = max(entry.base_order, entry.messages[0][0])
+        self._entries[conversation_id] = entry
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_conversations:
+            self._entries.popitem(last=False)
+
+    def append(self, conversation_id: Hashable, order: int, role: str, content: str) -> None:
+        """저장한 메시지 기록 (순서가 이어지지 않으면 항목 제거)"""
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return
+        if order != entry.next_order:
+            self.invalidate(conversation_id)
+            return
+
+        if len(entry.messages) == entry.messages.maxlen:
+            entry.base_order = max(entry.base_order, entry.messages[0][0] + 1)
+        entry.messages.append((order, role, content))
+        entry.next_order = order + 1
+
+    def invalidate(self, conversation_id: Hashable) -> None:
+        """대화 항목 제거 (대화 삭제 등)"""
+        if self._entries.pop(conversation_id, None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            "conversations": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations
+        }
+
+
+# 싱글톤 인스턴스
+_history_cache = None
+
+
+def get_history_cache() -> Optional[HistoryCache]:
+    """최근 메시지 캐시 싱글톤 인스턴스 반환 (비활성화 시 None)"""
+    global _history_cache
+    if not settings.HISTORY_CACHE_ENABLED:
+        return None
+    if _history_cache is None:
+        _history_cache = HistoryCache(
+            max_conversations=settings.HISTORY_CACHE_MAX_CONVERSATIONS,
+            messages_per_conversation=max(settings.HISTORY_CACHE_MESSAGES, settings.MEMORY_RECENT_MESSAGES)
+        )
+    return _history_cache
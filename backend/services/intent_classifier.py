@@ -0,0 +1,144 @@
+"""
+로컬 임베딩 기반 질문 의도 분류 서비스
+
+벡터 스토어가 이미 로드한 ko-sroberta 임베딩 모델을 재사용하여
+예시 질문의 의도별 중심 벡터(centroid)와의 코사인 유사도로 분류합니다.
+확신도(1, 2위 유사도 차이)가 낮으면 None을 반환하고 호출 측에서 LLM 분류로 대체합니다.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from direct_pinecone_service import get_vectorstore_service
+
+logger = logging.getLogger(__name__)
+
+
+# 의도별 라벨링된 예시 질문
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "course_related": [
+        "임석구 교수님",
+        "임석구 교수님 연락처",
+        "C언어프로그래밍 교수님 누구야?",
+        "C언어프로그래밍 담당교수가 누구야",
+        "데이터베이스 과제 알려줘",
+        "웹프로그래밍 수업시간",
+        "캡스톤디자인 수업계획",
+        "정원석 교수님이 가르치는 과목은?",
+        "C언어 수업 목표가 뭐야?",
+        "C언어프로그래밍 1주차 수업 내용이 뭐야?",
+        "자료구조 5주차는 뭘 배워?",
+        "운영체제 평가 방법 알려줘",
+        "이 과목 중간고사 비율이 어떻게 돼?",
+        "교수님 이메일 주소 알려줘",
+        "알고리즘 과목 학점이 몇 학점이야",
+        "전공필수 과목 뭐 있어?",
+        "수업 교재가 뭐야",
+        "과제 제출 기한 알려줘",
+        "교과목 개요 보여줘",
+        "이 수업 출석 점수는 몇 점이야?",
+    ],
+    "casual_chat": [
+        "안녕",
+        "안녕하세요",
+        "고마워",
+        "감사합니다",
+        "날씨 어때?",
+        "지금 몇 시야?",
+        "뭐해?",
+        "심심해",
+        "오늘 기분이 좋아",
+        "너는 누구야?",
+        "잘 자",
+        "배고프다",
+        "재밌는 얘기 해줘",
+        "ㅋㅋㅋ",
+        "반가워",
+        "수고했어",
+        "좋은 하루 보내",
+        "너 이름이 뭐야",
+        "오늘 뭐 먹지",
+        "잘 지냈어?",
+    ],
+}
+
+
+class LocalIntentClassifier:
+    """의도별 중심 벡터 기반 로컬 의도 분류기"""
+
+    def __init__(self, vectorstore, min_margin: float = 0.05):
+        """
+        Args:
+            vectorstore: 임베딩 모델을 가진 벡터 스토어 서비스
+            min_margin: 1, 2위 의도 유사도 차이가 이 값보다 작으면 판단 보류
+        """
+        self._vectorstore = vectorstore
+        self.min_margin = min_margin
+        self._centroids: Optional[Dict[str, np.ndarray]] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_centroids(self) -> Dict[str, np.ndarray]:
+        """예시 질문 임베딩으로 의도별 중심 벡터 계산 (최초 1회)"""
+        if self._centroids is not None:
+            return self._centroids
+
+        async with self._lock:
+            if self._centroids is None:
+                centroids = {}
+                for intent, examples in INTENT_EXAMPLES.items():
+                    vectors = np.asarray(await self._vectorstore.embed_documents(examples), dtype=np.float32)
+                    centroid = vectors.mean(axis=0)
+                    centroids[intent] = centroid / np.linalg.norm(centroid)
+                self._centroids = centroids
+                logger.info(f"로컬 의도 분류기 초기화 완료 (의도 {len(centroids)}개)")
+        return self._centroids
+
+    async def classify(self, query_embedding: List[float]) -> Tuple[Optional[str], float]:
+        """
+        쿼리 임베딩으로 의도 분류
+
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+
+        Returns:
+            (의도 또는 None, 확신도 마진)
+        """
+        centroids = await self._ensure_centroids()
+
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return None, 0.0
+        query_vector = query_vector / norm
+
+        ranked = sorted(
+            ((intent, float(centroid @ query_vector)) for intent, centroid in centroids.items()),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        best_intent, best_score = ranked[0]
+        margin = best_score - ranked[1][1]
+
+        if margin < self.min_margin:
+            logger.info(f"로컬 의도 분류 보류 (최고: {best_intent}, 마진: {margin:.3f})")
+            return None, margin
+
+        return best_intent, margin
+
+
+# 싱글톤 인스턴스
+_intent_classifier = None
+
+
+def get_intent_classifier() -> LocalIntentClassifier:
+    """로컬 의도 분류기 싱글톤 인스턴스 반환"""
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = LocalIntentClassifier(
+            vectorstore=get_vectorstore_service(),
+            min_margin=settings.INTENT_CONFIDENCE_MARGIN
+        )
+    return _intent_classifier
@@ -0,0 +1,163 @@
+"""
+한국어 수업계획서 청크용 프로세스 내 BM25 어휘 색인
+
+밀집(dense) 검색이 놓치기 쉬운 교수명, 과목 코드 같은 정확한 표현을 보완하기 위해
+벡터화 스크립트가 저장한 청크(documents.jsonl)를 BM25로 색인하고,
+reciprocal_rank_fusion으로 밀집 검색 결과와 합칩니다.
+
+토크나이저: 공백/기호 기준 단어 + 한글이 포함된 단어는 음절 bigram 추가
+(형태소 분석기 없이 조사가 붙은 "임석구교수님의" 같은 표현도 매칭)
+"""
+import json
+import math
+import re
+import heapq
+import logging
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.gazetteer import MetadataFilter, matches_filter
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]+")
+_HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str) -> List[str]:
+    """단어 + 한글 음절 bigram 토큰화"""
+    tokens = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if len(word) >= 2 and _HANGUL_PATTERN.search(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """BM25 역색인"""
+
+    def __init__(self, documents: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents: [{"id": str, "text": str, "metadata": dict}, ...]
+            k1: 단어 빈도 포화 계수
+            b: 문서 길이 정규화 계수
+        """
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: List[int] = []
+        for doc_idx, doc in enumerate(documents):
+            term_counts = Counter(tokenize(doc.get("text", "")))
+            self._doc_lengths.append(sum(term_counts.values()))
+            for term, count in term_counts.items():
+                self._postings[term].append((doc_idx, count))
+
+        self._avg_length = (sum(self._doc_lengths) / len(self._doc_lengths)) if self._doc_lengths else 0.0
+        total = len(documents)
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        BM25 상위 k개 검색
+
+        Args:
+            query: 검색 쿼리
+            k: 반환할 결과 수
+            metadata_filter: 메타데이터 필터 (조건에 맞는 문서만 반환)
+
+        Returns:
+            [(문서 인덱스, 점수), ...] (점수 내림차순)
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc_idx, tf in postings:
+                length_norm = 1 - self.b + self.b * self._doc_lengths[doc_idx] / self._avg_length
+                scores[doc_idx] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        if metadata_filter:
+            scores = {
+                doc_idx: score for doc_idx, score in scores.items()
+                if matches_filter(self.documents[doc_idx].get("metadata", {}), metadata_filter)
+            }
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def search_documents(
+        self,
+        query: str,
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """BM25 검색 결과를 벡터 검색과 같은 문서 형식으로 반환"""
+        results = []
+        for doc_idx, score in self.search(query, k, metadata_filter):
+            stored = self.documents[doc_idx]
+            results.append({
+                "id": stored["id"],
+                "page_content": stored["text"],
+                "metadata": {**stored.get("metadata", {}), "text": stored["text"]},
+                "score": score
+            })
+        return results
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Dict[str, Any]]],
+    k: int,
+    rrf_k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Reciprocal Rank Fusion (문서 id 기준)
+
+    Args:
+        ranked_lists: 순위가 매겨진 문서 리스트들 (앞쪽 리스트의 문서 객체를 우선 사용)
+        k: 반환할 문서 수
+        rrf_k: RRF 상수 (클수록 하위 순위의 영향이 커짐)
+
+    Returns:
+        융합 점수 순 상위 k개 문서 (각 문서에 "fusion_score" 추가)
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    documents: Dict[str, Dict[str, Any]] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked):
+            doc_id = doc["id"]
+            fused[doc_id] += 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(doc_id, doc)
+
+    top = heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+    return [{**documents[doc_id], "fusion_score": score} for doc_id, score in top]
+
+
+def load_lexical_index(path: Path) -> Optional[BM25Index]:
+    """documents.jsonl로 BM25 색인 생성 (파일이 없으면 None)"""
+    if not path.exists():
+        logger.warning(f"어휘 색인용 문서 파일이 없습니다 - 하이브리드 검색 비활성화: {path}")
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        documents = [json.loads(line) for line in f if line.strip()]
+
+    index = BM25Index(documents)
+    logger.info(f"BM25 어휘 색인 생성 완료: {len(index)}개 문서 ({path})")
+    return index
@@ -0,0 +1,156 @@
+"""
+비동기 메일 발송 큐
+
+인증 메일 / 비밀번호 재설정 메일을 응답 경로에서 보내지 않고 백그라운드 큐(BackgroundQueue)에 넣습니다.
+
+- 워커는 인증까지 마친 SMTP 연결(aiosmtplib)을 재사용 (메일마다 연결 + STARTTLS + 로그인 하지 않음)
+- 연결이 끊겼거나 MAIL_SMTP_IDLE_SECONDS 이상 쓰지 않았으면 다시 연결
+- 발송 실패 시 큐의 지수 백오프 재시도 (MAIL_QUEUE_MAX_RETRIES)
+- MAIL_BACKEND=memory면 실제로 보내지 않고 메모리에 기록 (테스트 / 로컬 개발용 싱크)
+"""
+import time
+import asyncio
+import logging
+from email.message import Message
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.background_queue import BackgroundQueue
+
+logger = logging.getLogger(__name__)
+
+
+class SmtpMailer:
+    """인증된 SMTP 연결을 재사용하는 발송기"""
+
+    def __init__(self, host: str, port: int, username: str, password: str, start_tls: bool = True, idle_seconds: float = 60):
+        """
+        Args:
+            host, port: SMTP 서버
+            username, password: SMTP 로그인 정보 (Gmail은 앱 비밀번호)
+            start_tls: 연결 후 STARTTLS 사용
+            idle_seconds: 이 시간 이상 쓰지 않은 연결은 서버가 끊었을 수 있으므로 새로 연결
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.idle_seconds = idle_seconds
+
+        self._client = None
+        self._last_used = 0.0
+        self._lock = asyncio.Lock()
+
+        self.connects = 0
+        self.sent = 0
+        self.failures = 0
+
+    async def _connect(self) -> None:
+        import aiosmtplib
+
+        await self._disconnect()
+        client = aiosmtplib.SMTP(hostname=self.host, port=self.port, start_tls=self.start_tls, timeout=30)
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password)
+        self._client = client
+        self.connects += 1
+        logger.info(f"SMTP 연결: {self.host}:{self.port}")
+
+    async def _disconnect(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.quit()
+            except Exception:
+                pass  # 이미 끊긴 연결
+            self._client = None
+
+    async def send(self, message: Message) -> None:
+        """메일 발송 (실패 시 연결을 버리고 예외 전파, 재시도는 큐가 담당)"""
+        async with self._lock:
+            try:
+                if (
+                    self._client is None
+                    or not self._client.is_connected
+                    or time.monotonic() - self._last_used > self.idle_seconds
+                ):
+                    await self._connect()
+                await self._client.send_message(message)
+            except Exception:
+                self.failures += 1
+                await self._disconnect()
+                raise
+            self._last_used = time.monotonic()
+            self.sent += 1
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "smtp", "connects": self.connects, "sent": self.sent, "failures": self.failures}
+
+
+class MemoryMailer:
+    """보내지 않고 기록만 하는 발송기 (테스트 / 로컬 개발)"""
+
+    def __init__(self):
+        self.messages: List[Message] = []
+
+    async def send(self, message: Message) -> None:
+        self.messages.append(message)
+        logger.info(f"메일 기록 (MAIL_BACKEND=memory): {message['To']} - {message['Subject']}")
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "sent": len(self.messages)}
+
+
+# 메일 발송 큐
+mail_queue = BackgroundQueue(
+    name="메일 발송",
+    concurrency=1,  # SMTP 연결 하나를 순서대로 사용
+    max_retries=settings.MAIL_QUEUE_MAX_RETRIES,
+    max_size=settings.MAIL_QUEUE_MAX_SIZE
+)
+
+# 싱글톤 인스턴스
+_mailer = None
+
+
+def get_mailer():
+    """메일 발송기 싱글톤 인스턴스 반환 (MAIL_BACKEND: smtp | memory)"""
+    global _mailer
+    if _mailer is None:
+        if settings.MAIL_BACKEND.lower() == "memory":
+            _mailer = MemoryMailer()
+        else:
+            _mailer = SmtpMailer(
+                host=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                start_tls=settings.SMTP_STARTTLS,
+                idle_seconds=settings.MAIL_SMTP_IDLE_SECONDS
+            )
+    return _mailer
+
+
+def enqueue_mail(message: Message) -> bool:
+    """
+    메일 발송 예약 (즉시 반환)
+
+    Returns:
+        큐에 들어갔으면 True, 큐가 가득 차 폐기됐으면 False
+    """
+    return mail_queue.enqueue(f"mail:{message['To']}", lambda: get_mailer().send(message))
+
+
+async def close_mailer() -> None:
+    """남은 메일을 처리하고 SMTP 연결 종료 (앱 종료 시)"""
+    await mail_queue.drain(timeout=settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS)
+    if _mailer is not None:
+        await _mailer.close()
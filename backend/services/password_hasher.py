@@ -0,0 +1,94 @@
+"""
+bcrypt 해싱 / 검증 전용 스레드 풀
+
+bcrypt는 호출당 100~300ms CPU를 사용하므로 비동기 엔드포인트에서 직접 호출하면
+그동안 이벤트 루프가 멈춰 같은 워커의 모든 채팅 요청이 지연됩니다.
+전용 스레드 풀(PASSWORD_HASH_WORKERS개, bcrypt는 GIL을 해제함)에서 실행하고
+동시 실행 수를 제한하며, 대기열 길이 / 대기 시간 / 실행 시간 통계를 남깁니다.
+"""
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from config import settings
+from auth_utils import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """bcrypt 전용 스레드 풀"""
+
+    def __init__(self, workers: int = 2):
+        """
+        Args:
+            workers: 동시에 실행할 최대 bcrypt 연산 수
+        """
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._run_total_ms = 0.0
+
+    def _timed(self, func: Callable[..., T], submitted_at: float, *args) -> T:
+        """스레드 풀에서 실행 (대기 / 실행 시간 기록)"""
+        started_at = time.perf_counter()
+        self.started += 1
+        wait_ms = (started_at - submitted_at) * 1000
+        self._wait_total_ms += wait_ms
+        self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+        try:
+            return func(*args)
+        finally:
+            self._run_total_ms += (time.perf_counter() - started_at) * 1000
+            self.completed += 1
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        self.submitted += 1
+        # 빈 워커가 없어 기다려야 하는 작업 수
+        idle_workers = max(self.workers - (self.started - self.completed), 0)
+        self.max_queue_depth = max(self.max_queue_depth, self.submitted - self.started - idle_workers)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, self._timed, func, time.perf_counter(), *args)
+
+    async def hash(self, password: str) -> str:
+        """비밀번호 해싱 (설정된 BCRYPT_ROUNDS)"""
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """비밀번호 검증"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 통계"""
+        return {
+            "workers": self.workers,
+            "in_flight": self.started - self.completed,
+            "queued": self.submitted - self.started,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "avg_wait_ms": round(self._wait_total_ms / self.started, 1) if self.started else 0.0,
+            "max_wait_ms": round(self._wait_max_ms, 1),
+            "avg_run_ms": round(self._run_total_ms / self.completed, 1) if self.completed else 0.0
+        }
+
+
+# 싱글톤 인스턴스
+_password_hasher = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """bcrypt 스레드 풀 싱글톤 인스턴스 반환"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(workers=settings.PASSWORD_HASH_WORKERS)
+    return _password_hasher
@@ -0,0 +1,232 @@
+"""
+인증 엔드포인트 요청 제한 (토큰 버킷)
+
+로그인, 인증 메일 발송, 비밀번호 재설정 요청을 IP별 / 이메일별 토큰 버킷으로 제한해
+bcrypt, SMTP 같은 비싼 작업을 시작하기 전에 거절합니다 (429 + Retry-After).
+
+- 버킷 상태 저장소는 교체 가능 (RATE_LIMIT_BACKEND)
+  - memory: 프로세스 내 (기본값, 워커마다 따로 계산, 버킷 갱신은 락 안에서)
+  - mongo: rate_limits 컬렉션에 원자적 업데이트로 저장 (모든 워커가 공유, TTL 인덱스로 정리)
+- 규칙은 "용량/초" 형식 (예: "5/60" = 60초에 5회, 한 번에 최대 5회까지 몰아서 허용)
+"""
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+
+from config import settings
+from database import Collections, db_instance
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rule(rule: str) -> Tuple[float, float]:
+    """"용량/초" -> (용량, 초당 충전량)"""
+    capacity, seconds = rule.split("/", 1)
+    return float(capacity), float(capacity) / float(seconds)
+
+
+class RateLimitStore(ABC):
+    """토큰 버킷 저장소 인터페이스"""
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        """
+        버킷에서 토큰 1개 사용
+
+        Returns:
+            허용되면 0, 거절되면 다시 시도할 수 있을 때까지의 시간 (초)
+        """
+        pass
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """프로세스 내 토큰 버킷 (키 수 제한 LRU)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # 키 -> (토큰, 갱신 시각)
+        self._lock = asyncio.Lock()
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        async with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+class MongoRateLimitStore(RateLimitStore):
+    """MongoDB 공유 토큰 버킷 (파이프라인 업데이트 한 번으로 충전 + 사용)"""
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = datetime.utcnow()
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [
+            capacity,
+            {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed_seconds, refill_per_second]}]}
+        ]}
+
+        bucket = await db_instance.get_collection(Collections.RATE_LIMITS).find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # 가득 찰 때까지 쓰지 않으면 TTL 인덱스로 삭제 (삭제 = 가득 찬 버킷)
+                    "expires_at": now + timedelta(seconds=capacity / refill_per_second)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket["allowed"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / refill_per_second
+
+
+class RateLimiter:
+    """규칙 이름별 IP / 이메일 토큰 버킷 검사"""
+
+    def __init__(self, store: RateLimitStore, rules: Dict[str, Dict[str, str]]):
+        """
+        Args:
+            store: 버킷 저장소
+            rules: {규칙 이름: {"ip": "용량/초", "email": "용량/초"}}
+        """
+        self.store = store
+        self.rules = {
+            name: {scope: parse_rule(rule) for scope, rule in scopes.items() if rule}
+            for name, scopes in rules.items()
+        }
+        self.allowed = 0
+        self.rejected: Dict[str, int] = {}
+        self.store_errors = 0
+        self._stats_lock = asyncio.Lock()
+
+    async def _count(self, outcome: str, key: str = "") -> None:
+        """통계 카운터 갱신 (락 안에서)"""
+        async with self._stats_lock:
+            if outcome == "allowed":
+                self.allowed += 1
+            elif outcome == "rejected":
+                self.rejected[key] = self.rejected.get(key, 0) + 1
+            else:
+                self.store_errors += 1
+
+    async def check(self, name: str, ip: Optional[str], email: Optional[str] = None) -> float:
+        """
+        규칙 검사 (IP 먼저, 다음 이메일)
+
+        Returns:
+            허용되면 0, 거절되면 Retry-After (초)
+        """
+        subjects = {"ip": ip, "email": email.lower() if email else None}
+        for scope, (capacity, refill_per_second) in self.rules.get(name, {}).items():
+            if not subjects.get(scope):
+                continue
+            try:
+                retry_after = await self.store.take(f"{name}:{scope}:{subjects[scope]}", capacity, refill_per_second)
+            except Exception as e:
+                # 저장소 장애로 로그인까지 막지 않음
+                await self._count("store_error")
+                logger.error(f"요청 제한 저장소 오류 - 제한 없이 허용: {e}")
+                continue
+            if retry_after > 0:
+                await self._count("rejected", f"{name}:{scope}")
+                logger.warning(f"요청 제한 초과: {name} ({scope}={subjects[scope]}), {retry_after:.1f}초 후 재시도")
+                return retry_after
+        await self._count("allowed")
+        return 0.0
+
+    def stats(self) -> Dict[str, object]:
+        """요청 제한 통계"""
+        return {
+            "backend": type(self.store).__name__,
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+            "store_errors": self.store_errors
+        }
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    클라이언트 IP
+
+    X-Forwarded-For의 왼쪽 항목은 클라이언트가 마음대로 넣을 수 있으므로,
+    RATE_LIMIT_PROXY_HOPS개의 신뢰하는 프록시가 오른쪽에 덧붙인 주소만 사용합니다
+    (오른쪽에서 RATE_LIMIT_PROXY_HOPS번째 항목). 0이거나 항목이 부족하면 직접 연결한 주소를 사용합니다.
+    """
+    hops = settings.RATE_LIMIT_PROXY_HOPS
+    if hops > 0:
+        forwarded = [addr.strip() for addr in request.headers.get("x-forwarded-for", "").split(",") if addr.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else None
+
+
+# 싱글톤 인스턴스
+_rate_limiter = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """요청 제한기 싱글톤 인스턴스 반환 (비활성화 시 None)"""
+    global _rate_limiter
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    if _rate_limiter is None:
+        store = MongoRateLimitStore() if settings.RATE_LIMIT_BACKEND.lower() == "mongo" else InMemoryRateLimitStore()
+        _rate_limiter = RateLimiter(store, {
+            "login": {"ip": settings.RATE_LIMIT_LOGIN_IP, "email": settings.RATE_LIMIT_LOGIN_EMAIL},
+            "verification_email": {"ip": settings.RATE_LIMIT_EMAIL_SEND_IP, "email": settings.RATE_LIMIT_EMAIL_SEND_EMAIL},
+            "password_reset": {"ip": settings.RATE_LIMIT_EMAIL_SEND_IP, "email": settings.RATE_LIMIT_EMAIL_SEND_EMAIL},
+        })
+    return _rate_limiter
+
+
+async def enforce_rate_limit(name: str, request: Request, email: Optional[str] = None) -> None:
+    """
+    요청 제한 검사 (초과 시 429 + Retry-After)
+
+    Args:
+        name: 규칙 이름 (login, verification_email, password_reset)
+        request: FastAPI 요청 (클라이언트 IP)
+        email: 요청 본문의 이메일
+    """
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        return
+
+    retry_after = await rate_limiter.check(name, client_ip(request), email)
+    if retry_after > 0:
+        retry_seconds = max(int(retry_after + 0.999), 1)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "TOO_MANY_REQUESTS",
+                    "message": "요청이 너무 많습니다. 잠시 후 다시 시도해주세요",
+                    "details": f"{retry_seconds}초 후 다시 시도할 수 있습니다"
+                }
+            },
+            headers={"Retry-After": str(retry_seconds)}
+        )
@@ -0,0 +1,144 @@
+"""
+크로스 인코더 재순위화(rerank) 서비스
+
+벡터 검색으로 넓게 가져온 후보를 한국어 크로스 인코더로 한 번에 점수 매겨 상위 k개만 남깁니다.
+(HyperCLOVA에 더 적고 정확한 청크를 넘겨 입력 토큰과 생성 지연을 줄임)
+
+- 모델은 앱 시작 시 백그라운드로 로딩하며, 로딩 전 요청은 밀집 검색 순서를 그대로 사용
+- 시간 예산(RERANK_BUDGET_MS)을 넘기면 결과를 기다리지 않고 밀집 검색 순서로 대체
+- 추론은 한 번에 하나씩 실행 (세마포어): 이전 추론이 진행 중이면 예산 안에서 차례를 기다리고,
+  예산 안에 차례가 오지 않으면 대체 (실행 중인 CPU 추론은 중단할 수 없으므로 대기열이 예산 이상 쌓이지 않음)
+- 통계: 모델 준비 전 생략(skipped), 차례 대기 중 예산 초과(queue_timeouts), 추론 중 예산 초과(timeouts)를 따로 집계
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """시간 예산이 있는 크로스 인코더 재순위화"""
+
+    def __init__(self, model_name: str, budget_ms: float = 300, max_length: int = 512):
+        """
+        Args:
+            model_name: sentence-transformers CrossEncoder 모델 이름
+            budget_ms: 재순위화 시간 예산 (밀리초)
+            max_length: (질문, 문서) 쌍의 최대 토큰 길이
+        """
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.max_length = max_length
+
+        self._model = None
+        self._load_failed = False
+        self._slot = asyncio.Semaphore(1)  # 진행 중인 추론 1개 (추론 스레드가 끝나야 해제)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+        self.reranked = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.queue_timeouts = 0
+
+    def _load_model(self) -> None:
+        """모델 로딩 (스레드 풀에서 실행)"""
+        try:
+            from sentence_transformers import CrossEncoder
+
+            self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+            logger.info(f"재순위화 모델 로딩 완료: {self.model_name}")
+        except Exception as e:
+            self._load_failed = True
+            logger.error(f"재순위화 모델 로딩 실패 - 밀집 검색 순서 사용: {e}")
+
+    async def warmup(self) -> None:
+        """모델을 백그라운드에서 미리 로딩"""
+        if self._model is None and not self._load_failed:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(self._executor, self._load_model)
+
+    def _predict(self, pairs: List[List[str]]) -> List[float]:
+        return [float(score) for score in self._model.predict(pairs, batch_size=len(pairs))]
+
+    async def rerank(self, query: str, documents: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """
+        후보 문서를 재순위화해 상위 k개 반환
+
+        모델이 준비되지 않았거나, 차례 대기와 추론을 합쳐 시간 예산을 넘기면 밀집 검색 순서의 상위 k개 반환
+
+        Args:
+            query: 사용자 질문
+            documents: 밀집 검색 후보 (검색 순위 순)
+            k: 반환할 문서 수
+
+        Returns:
+            상위 k개 문서 (재순위화된 경우 "rerank_score" 추가)
+        """
+        if len(documents) <= 1:
+            return documents[:k]
+        if self._model is None:
+            self.skipped += 1
+            return documents[:k]
+
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.budget_ms / 1000
+
+        try:
+            await asyncio.wait_for(self._slot.acquire(), timeout=self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            logger.warning(f"재순위화 차례 대기 중 시간 예산 초과({self.budget_ms}ms) - 밀집 검색 순서 사용")
+            return documents[:k]
+
+        pairs = [[query, doc.get("page_content", "")] for doc in documents]
+        future = loop.run_in_executor(self._executor, self._predict, pairs)
+        future.add_done_callback(lambda _: self._slot.release())
+
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(future), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            # 실행 중인 추론은 끝까지 돌고 차례를 해제함 (결과는 폐기)
+            self.timeouts += 1
+            logger.warning(f"재순위화 시간 예산 초과({self.budget_ms}ms) - 밀집 검색 순서 사용")
+            return documents[:k]
+        except Exception as e:
+            logger.error(f"재순위화 실패 - 밀집 검색 순서 사용: {e}")
+            return documents[:k]
+
+        self.reranked += 1
+        ranked = sorted(zip(scores, documents), key=lambda item: item[0], reverse=True)
+        return [{**doc, "rerank_score": score} for score, doc in ranked[:k]]
+
+    def stats(self) -> Dict[str, Any]:
+        """재순위화 통계"""
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "budget_ms": self.budget_ms,
+            "reranked": self.reranked,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "queue_timeouts": self.queue_timeouts
+        }
+
+
+# 싱글톤 인스턴스
+_reranker = None
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """재순위화 싱글톤 인스턴스 반환 (비활성화 시 None)"""
+    global _reranker
+    if not settings.RERANK_ENABLED:
+        return None
+    if _reranker is None:
+        _reranker = CrossEncoderReranker(
+            model_name=settings.RERANK_MODEL,
+            budget_ms=settings.RERANK_BUDGET_MS,
+            max_length=settings.RERANK_MAX_LENGTH
+        )
+    return _reranker
@@ -0,0 +1,87 @@
+"""
+동일 작업 단일 실행(single-flight) 서비스
+
+같은 키의 작업이 이미 진행 중이면 새로 실행하지 않고 진행 중인 결과를 함께 기다립니다.
+(공지 직후처럼 같은 질문이 동시에 몰릴 때 임베딩, Pinecone 검색, HyperCLOVA 호출을 한 번만 수행)
+
+- 결과는 완료 즉시 키에서 제거 (캐시가 아님, 진행 중인 작업만 공유)
+- 기다리던 요청 하나가 취소되어도 공유 작업은 취소되지 않음
+- 기다리던 요청이 모두 취소되면 공유 작업도 취소 (추측 실행 검색 취소 시 Pinecone 질의까지 중단)
+- 이벤트 루프 안에서만 사용 (락 없음)
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """키 단위 진행 중 작업 공유"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 로그/통계용 이름
+        """
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        """완료된 작업을 키에서 제거 (기다리는 요청이 모두 취소된 경우를 위해 예외 소비)"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        key의 작업이 진행 중이면 그 결과를, 아니면 work()를 실행한 결과를 반환
+
+        Args:
+            key: 작업 키 (같은 키 = 같은 결과)
+            work: 작업 코루틴을 만드는 함수 (진행 중인 작업이 없을 때만 호출)
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._on_done(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"{self.name}: 진행 중인 동일 요청 결과 공유")
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                # 마지막으로 기다리던 요청이 취소됨: 결과를 쓸 곳이 없으므로 공유 작업도 취소
+                self.abandoned += 1
+                self._in_flight.pop(key, None)
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def stats(self) -> Dict[str, Any]:
+        """통계"""
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned
+        }
+
+
+# HyperCLOVA 답변 생성 공유 인스턴스 (키: 정규화 쿼리, 의도, k, 대화 히스토리)
+answer_flight = SingleFlight("답변 생성")
@@ -0,0 +1,79 @@
+"""
+채팅 파이프라인 단계별 소요 시간 측정 서비스
+"""
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StageMetrics:
+    """프로세스 전체의 단계별 소요 시간 누적 통계 (/metrics 노출용)"""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, stage: str, elapsed_ms: float) -> None:
+        """단계 소요 시간 기록"""
+        entry = self._stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """단계별 호출 수 / 평균 / 최대 소요 시간 반환"""
+        return {
+            stage: {
+                "count": int(entry["count"]),
+                "avg_ms": round(entry["total_ms"] / entry["count"], 1) if entry["count"] else 0.0,
+                "max_ms": round(entry["max_ms"], 1)
+            }
+            for stage, entry in self._stages.items()
+        }
+
+
+# 전역 단계 통계 인스턴스
+stage_metrics = StageMetrics()
+
+
+class StageTimer:
+    """요청 단위 단계별 소요 시간 측정기"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        """단계 소요 시간 기록 (요청 단위 + 전역 통계)"""
+        self.timings[stage] = round(elapsed_ms, 1)
+        stage_metrics.observe(stage, elapsed_ms)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """with 블록 소요 시간 측정"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    async def timed(self, stage: str, awaitable: Awaitable[T]) -> T:
+        """코루틴 소요 시간 측정 (동시 실행되는 단계에 사용, 취소된 단계는 기록하지 않음)"""
+        start = time.perf_counter()
+        cancelled = False
+        try:
+            return await awaitable
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def log(self, label: str = "채팅") -> None:
+        """단계별 소요 시간 로그 출력"""
+        logger.info(f"{label} 단계별 소요 시간(ms): {self.timings}")
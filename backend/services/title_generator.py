@@ -1,13 +1,28 @@
 """
 대화 제목 자동 생성 서비스
+
+채팅 응답을 막지 않도록 schedule_title_generation으로 백그라운드 큐(title_queue)에서 실행합니다.
 """
 import logging
 from bson import ObjectId
 from database import Collections, db_instance
 from hyperclova_client import get_hyperclova_client
+from services.background_queue import title_queue
+from services.write_behind import ensure_conversation_flushed
 
 logger = logging.getLogger(__name__)
 
+TITLE_MAX_LENGTH = 30
+
+# 생성 실패 시 HyperCLOVA 클라이언트가 돌려주는 안내 문구 (제목으로 저장하면 안 됨)
+FAILURE_PREFIXES = ("죄송합니다",)
+
+
+def _truncate_title(text: str) -> str:
+    """질문 앞부분을 제목으로 사용 (30자 초과 시 말줄임)"""
+    text = text.strip()
+    return text[:TITLE_MAX_LENGTH] + ("..." if len(text) > TITLE_MAX_LENGTH else "")
+
 
 async def auto_generate_title(
     conversation_id: str,
@@ -19,42 +34,47 @@ async def auto_generate_title(
 
     - 1번째 대화 (message_count == 2): 첫 사용자 질문의 앞 30자
     - 5번째 대화 (message_count == 10): HyperCLOVA로 대화 요약
+      (응답이 비었거나 오류 안내 문구면 첫 질문 30자로 대체)
 
     Args:
         conversation_id: 대화방 ID
         message_count: 현재 메시지 개수 (사용자 + 봇 메시지 포함)
         user_query: 사용자 질문 (첫 대화 시 제목으로 사용)
+
+    Raises:
+        Exception: 조회/HyperCLOVA 호출/저장 실패 (백그라운드 큐에서 재시도,
+            모두 실패하면 1번째 대화에서 저장한 제목 유지)
     """
-    try:
-        conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
-
-        # 1번째 대화: 첫 질문 30자
-        if message_count == 2:
-            title = user_query[:30] + ("..." if len(user_query) > 30 else "")
-            await conversations_collection.update_one(
-                {"_id": ObjectId(conversation_id)},
-                {"$set": {"title": title}}
-            )
-            logger.info(f"대화 제목 생성 (1번째): {title}")
-            return
-
-        # 5번째 대화: HyperCLOVA 요약
-        if message_count == 10:
-            # 모든 메시지 가져오기
-            messages_collection = db_instance.get_collection(Collections.MESSAGES)
-            messages = await messages_collection.find(
-                {"conversation_id": ObjectId(conversation_id)}
-            ).sort("order", 1).to_list(length=10)
-
-            # 대화 내용 조합
-            conversation_text = "\n".join([
-                f"{'사용자' if msg['role'] == 'user' else 'AI'}: {msg['content']}"
-                for msg in messages
-            ])
-
-            # HyperCLOVA로 제목 생성
-            hyperclova = get_hyperclova_client()
-            prompt = f"""다음 대화 내용을 보고 간결한 제목을 30자 이내로 생성해주세요.
+    conversations_collection = db_instance.get_collection(Collections.CONVERSATIONS)
+
+    # 1번째 대화: 첫 질문 30자
+    if message_count == 2:
+        title = _truncate_title(user_query)
+        await conversations_collection.update_one(
+            {"_id": ObjectId(conversation_id)},
+            {"$set": {"title": title}}
+        )
+        logger.info(f"대화 제목 생성 (1번째): {title}")
+        return
+
+    # 5번째 대화: HyperCLOVA 요약
+    if message_count == 10:
+        # 모든 메시지 가져오기 (쓰기 지연 버퍼에 남은 봇 메시지 먼저 반영)
+        await ensure_conversation_flushed(ObjectId(conversation_id))
+        messages_collection = db_instance.get_collection(Collections.MESSAGES)
+        messages = await messages_collection.find(
+            {"conversation_id": ObjectId(conversation_id)}
+        ).sort("order", 1).to_list(length=10)
+
+        # 대화 내용 조합
+        conversation_text = "\n".join([
+            f"{'사용자' if msg['role'] == 'user' else 'AI'}: {msg['content']}"
+            for msg in messages
+        ])
+
+        # HyperCLOVA로 제목 생성
+        hyperclova = get_hyperclova_client()
+        prompt = f"""다음 대화 내용을 보고 간결한 제목을 30자 이내로 생성해주세요.
 제목만 출력하고 다른 설명은 하지 마세요.
 
 대화 내용:
@@ -62,16 +82,32 @@ async def auto_generate_title(
 
 제목:"""
 
-            title = await hyperclova.generate_casual_answer(prompt)
-            title = title.strip()[:30]
+        # generate_casual_answer는 실패해도 안내 문구를 돌려주므로 예외가 전파되는 chat_text를 호출
+        title = await hyperclova.chat_text(
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=50,
+            temperature=0.3
+        )
+        title = title.strip('"\'')[:TITLE_MAX_LENGTH]
+
+        if not title or title.startswith(FAILURE_PREFIXES):
+            first_query = next((msg["content"] for msg in messages if msg["role"] == "user"), user_query)
+            logger.warning(f"대화 제목 생성 응답이 비정상 ({title!r}) - 첫 질문으로 대체")
+            title = _truncate_title(first_query)
+
+        await conversations_collection.update_one(
+            {"_id": ObjectId(conversation_id)},
+            {"$set": {"title": title}}
+        )
+        logger.info(f"대화 제목 생성 (5번째): {title}")
+        return
 
-            await conversations_collection.update_one(
-                {"_id": ObjectId(conversation_id)},
-                {"$set": {"title": title}}
-            )
-            logger.info(f"대화 제목 생성 (5번째): {title}")
-            return
 
-    except Exception as e:
-        logger.error(f"제목 생성 중 오류 발생: {e}", exc_info=True)
-        # 제목 생성 실패는 치명적이지 않으므로 예외를 던지지 않음
+def schedule_title_generation(conversation_id: str, message_count: int, user_query: str) -> None:
+    """제목 생성이 필요한 시점(1번째, 5번째 대화)이면 백그라운드 큐에 추가 (즉시 반환)"""
+    if message_count not in (2, 10):
+        return
+    title_queue.enqueue(
+        f"title:{conversation_id}:{message_count}",
+        lambda: auto_generate_title(conversation_id, message_count, user_query)
+    )
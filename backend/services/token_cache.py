@@ -0,0 +1,142 @@
+"""
+검증된 JWT 캐시
+
+get_current_user가 요청마다 jwt.decode(HMAC 검증 + 클레임 파싱)를 하지 않도록
+검증에 성공한 토큰의 페이로드를 토큰 해시 키로 만료(exp)까지 보관합니다.
+
+- 크기 제한 LRU (JWT_CACHE_MAX_ENTRIES)
+- 검증에 실패한 토큰은 캐시하지 않음
+- 폐기 훅: revoke_token(토큰 하나), revoke_user(사용자의 기존 토큰 전체, 비밀번호 변경 등)
+- 다른 워커에서 한 폐기는 사용자 문서의 tokens_valid_after로 공유:
+  사용자마다 JWT_REVOCATION_CHECK_SECONDS 주기로 다시 읽어 반영 (반영 지연은 이 주기 이내)
+"""
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class VerifiedTokenCache:
+    """토큰 해시 -> 검증된 페이로드 LRU 캐시"""
+
+    def __init__(self, max_entries: int = 10000, revocation_check_seconds: float = 30):
+        """
+        Args:
+            max_entries: 최대 캐시 토큰 수
+            revocation_check_seconds: 사용자별 영구 폐기 기록(tokens_valid_after) 재확인 주기 (초)
+        """
+        self.max_entries = max_entries
+        self.revocation_check_seconds = revocation_check_seconds
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._revoked_before: Dict[str, float] = {}  # 사용자 ID -> 이 시각 이전 발급 토큰 거부
+        self._revocation_checked: Dict[str, float] = {}  # 사용자 ID -> 마지막 영구 기록 확인 시각 (monotonic)
+
+        self.hits = 0
+        self.misses = 0
+        self.revocations = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """캐시된 페이로드 (없거나 만료됐으면 None)"""
+        key = _token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        """검증된 페이로드 저장 (exp가 없는 토큰은 저장하지 않음)"""
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        key = _token_key(token)
+        self._entries[key] = (payload, float(expires_at))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """revoke_user 이전에 발급된 토큰인지"""
+        revoked_before = self._revoked_before.get(payload.get("sub"))
+        if revoked_before is None:
+            return False
+        return payload.get("iat", 0) < revoked_before
+
+    def needs_revocation_check(self, user_id: str) -> bool:
+        """영구 폐기 기록을 다시 읽을 때가 됐는지"""
+        checked_at = self._revocation_checked.get(user_id)
+        return checked_at is None or time.monotonic() - checked_at >= self.revocation_check_seconds
+
+    def observe_revocation(self, user_id: str, valid_after: Optional[float]) -> None:
+        """
+        영구 저장된 폐기 기록 반영 (다른 워커의 revoke_user 포함)
+
+        Args:
+            user_id: 사용자 ID
+            valid_after: 이 시각(epoch 초) 이전 발급 토큰 거부 (기록이 없으면 None)
+        """
+        if len(self._revocation_checked) >= self.max_entries:
+            self._revocation_checked.clear()
+        self._revocation_checked[user_id] = time.monotonic()
+        if valid_after is not None and valid_after > self._revoked_before.get(user_id, 0):
+            self._revoked_before[user_id] = valid_after
+
+    def revoke_token(self, token: str) -> None:
+        """토큰 하나를 캐시에서 제거"""
+        if self._entries.pop(_token_key(token), None) is not None:
+            self.revocations += 1
+
+    def revoke_user(self, user_id: str) -> None:
+        """사용자의 지금까지 발급된 토큰을 모두 거부하고 캐시에서 제거"""
+        # iat는 초 단위이므로 같은 초에 새로 발급된 토큰(재로그인)은 허용
+        self._revoked_before[user_id] = int(time.time())
+        stale = [key for key, (payload, _) in self._entries.items() if payload.get("sub") == user_id]
+        for key in stale:
+            del self._entries[key]
+        self.revocations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "revocations": self.revocations
+        }
+
+
+# 싱글톤 인스턴스
+_token_cache = None
+
+
+def get_token_cache() -> Optional[VerifiedTokenCache]:
+    """검증된 JWT 캐시 싱글톤 인스턴스 반환 (비활성화 시 None)"""
+    global _token_cache
+    if not settings.JWT_CACHE_ENABLED:
+        return None
+    if _token_cache is None:
+        _token_cache = VerifiedTokenCache(
+            max_entries=settings.JWT_CACHE_MAX_ENTRIES,
+            revocation_check_seconds=settings.JWT_REVOCATION_CHECK_SECONDS
+        )
+    return _token_cache
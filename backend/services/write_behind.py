@@ -0,0 +1,276 @@
+"""
+채팅 메시지 쓰기 지연(write-behind) 버퍼
+
+답변 이후의 쓰기(봇 메시지 저장)를 응답 경로에서 기다리지 않고
+버퍼에 모아 주기적으로 bulk_write로 한 번에 반영합니다.
+(대화방 updated_at은 턴 시작 시 메시지 순서 예약과 함께 갱신되므로 버퍼를 거치지 않음)
+
+크래시 안전성:
+- 버퍼에 넣기 전에 저널 파일(WRITE_BEHIND_JOURNAL_DIR)에 먼저 기록 (WRITE_BEHIND_FSYNC=true면 fsync)
+- 저널은 세그먼트 파일 단위로 교체하며, 해당 세그먼트의 쓰기가 DB에 반영된 뒤에만 삭제
+- 앱 시작 시 남아 있는 세그먼트를 다시 반영 (미리 발급한 _id로 upsert하므로 중복 반영해도 안전)
+- 여러 워커가 같은 디렉터리를 써도 되도록 세그먼트마다 파일 잠금 (잠긴 세그먼트는 복구 대상에서 제외)
+- 교체된 세그먼트도 DB 반영 후 삭제될 때까지 잠금을 유지 (반영 중/실패 후 다른 워커가 다시 반영하지 않음)
+
+읽기 일관성:
+- 같은 대화의 메시지를 읽거나 삭제하기 전에 ensure_flushed(conversation_id)로 대기 중인 쓰기를 먼저 반영
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from bson import ObjectId, json_util
+from pymongo import ReplaceOne
+
+from config import settings
+from database import Collections, db_instance
+
+try:
+    import fcntl
+except ImportError:  # Windows: 파일 잠금 없이 동작 (단일 워커 전제)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class JournalSegment:
+    """저널 세그먼트 파일 (추가 전용, 열려 있는 동안 잠금 유지)"""
+
+    def __init__(self, path: Path, fsync: bool):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, "a", encoding="utf-8")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # 다른 워커가 잠근 세그먼트: 파일 디스크립터를 닫고 호출자에게 알림
+                self._file.close()
+                raise
+            if os.fstat(self._file.fileno()).st_nlink == 0:
+                # 잠금을 얻기 직전에 소유 워커가 반영을 마치고 삭제한 세그먼트
+                self._file.close()
+                raise FileNotFoundError(str(path))
+
+    def append(self, op: Dict[str, Any]) -> None:
+        self._file.write(json_util.dumps(op) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def remove(self) -> None:
+        """잠금을 쥔 채로 파일을 삭제한 뒤 닫음 (삭제 전에 다른 워커가 잠금을 얻지 못하도록)"""
+        self.path.unlink(missing_ok=True)
+        self.close()
+
+
+class WriteBehindBuffer:
+    """봇 메시지 쓰기 지연 버퍼"""
+
+    def __init__(self, journal_dir: Path, flush_interval_ms: float = 200, max_batch: int = 500, fsync: bool = False):
+        """
+        Args:
+            journal_dir: 저널 세그먼트 디렉터리
+            flush_interval_ms: 주기적 반영 간격 (밀리초)
+            max_batch: 이만큼 쌓이면 간격을 기다리지 않고 반영
+            fsync: 저널 기록마다 fsync (OS 크래시까지 대비, 기록 지연 증가)
+        """
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.fsync = fsync
+
+        self._messages: List[Dict[str, Any]] = []
+        self._pending_conversations: Set[ObjectId] = set()
+        self._segment: Optional[JournalSegment] = None
+        self._unflushed_segments: List[JournalSegment] = []
+
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.flushes = 0
+        self.flushed_ops = 0
+        self.flush_failures = 0
+        self.recovered_ops = 0
+        self._last_flush_ms = 0.0
+
+    # ---------- 저널 ----------
+
+    def _new_segment(self) -> JournalSegment:
+        name = f"{SEGMENT_PREFIX}{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:6]}{SEGMENT_SUFFIX}"
+        return JournalSegment(self.journal_dir / name, self.fsync)
+
+    def _rotate_segment(self) -> None:
+        """현재 세그먼트를 반영 대기 목록으로 넘기고 새 세그먼트 시작 (넘긴 세그먼트는 삭제 때까지 잠금 유지)"""
+        if self._segment is not None:
+            self._unflushed_segments.append(self._segment)
+        self._segment = self._new_segment()
+
+    def _apply(self, op: Dict[str, Any]) -> None:
+        """저널 항목을 메모리 버퍼에 반영"""
+        if op["op"] == "message":
+            self._messages.append(op["doc"])
+            self._pending_conversations.add(op["doc"]["conversation_id"])
+
+    def _record(self, op: Dict[str, Any]) -> None:
+        """저널에 먼저 기록한 뒤 버퍼에 추가"""
+        self._segment.append(op)
+        self._apply(op)
+        if len(self._messages) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _recover(self) -> None:
+        """이전 프로세스가 남긴(잠기지 않은) 세그먼트를 읽어 버퍼에 복구"""
+        for path in sorted(self.journal_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")):
+            try:
+                segment = JournalSegment(path, self.fsync)
+            except (BlockingIOError, OSError):
+                continue  # 다른 워커가 사용 중
+
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._apply(json_util.loads(line))
+                        self.recovered_ops += 1
+                    except ValueError:
+                        logger.warning(f"손상된 저널 항목 무시: {path}")  # 기록 중 크래시한 마지막 줄
+            self._unflushed_segments.append(segment)  # 반영 후 삭제될 때까지 잠금 유지
+
+        if self.recovered_ops:
+            logger.info(f"쓰기 지연 저널 복구: {self.recovered_ops}개 항목")
+
+    # ---------- 공개 API ----------
+
+    async def start(self) -> None:
+        """저널 복구 후 주기적 반영 시작 (앱 시작 시)"""
+        if self._flush_task is not None:
+            return
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._recover()
+        self._segment = self._new_segment()
+        await self.flush()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """주기적 반영 중지 후 남은 쓰기 반영 (앱 종료 시)"""
+        if self._flush_task is None:
+            return
+        self._flush_task.cancel()
+        await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+        if self._segment is not None and not self._messages:
+            self._segment.remove()
+            self._segment = None
+
+    def add_message(self, message_doc: Dict[str, Any]) -> None:
+        """메시지 저장 예약 (message_doc에는 미리 발급한 _id가 있어야 함)"""
+        self._record({"op": "message", "doc": message_doc})
+
+    def has_pending(self, conversation_id: ObjectId) -> bool:
+        return conversation_id in self._pending_conversations
+
+    async def ensure_flushed(self, conversation_id: ObjectId) -> None:
+        """해당 대화의 대기 중인 쓰기가 있으면 즉시 반영 (읽기 전 호출)"""
+        if self.has_pending(conversation_id):
+            await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """버퍼의 쓰기를 bulk_write로 반영 (실패 시 버퍼와 저널을 유지하고 다음 주기에 재시도)"""
+        async with self._flush_lock:
+            if not self._messages:
+                # 반영할 것이 없으면 반영 완료된 세그먼트만 정리
+                for segment in self._unflushed_segments:
+                    segment.remove()
+                self._unflushed_segments = []
+                return
+
+            messages, pending_conversations = self._messages, self._pending_conversations
+            self._messages, self._pending_conversations = [], set()
+            self._rotate_segment()
+            segments, self._unflushed_segments = self._unflushed_segments, []
+
+            start = time.perf_counter()
+            try:
+                await db_instance.get_collection(Collections.MESSAGES).bulk_write(
+                    [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in messages],
+                    ordered=False
+                )
+            except Exception as e:
+                # 세그먼트 잠금을 유지한 채 다음 반영 때 다시 시도 (upsert라 일부가 이미 반영됐어도 안전)
+                self.flush_failures += 1
+                logger.error(f"쓰기 지연 버퍼 반영 실패 ({len(messages)}개 메시지): {e}")
+                self._messages = messages + self._messages
+                self._pending_conversations |= pending_conversations
+                self._unflushed_segments = segments + self._unflushed_segments
+                return
+
+            for segment in segments:
+                segment.remove()
+            self.flushes += 1
+            self.flushed_ops += len(messages)
+            self._last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        """버퍼 통계"""
+        return {
+            "pending_messages": len(self._messages),
+            "pending_conversations": len(self._pending_conversations),
+            "journal_segments": len(self._unflushed_segments) + (1 if self._segment else 0),
+            "flushes": self.flushes,
+            "flushed_ops": self.flushed_ops,
+            "flush_failures": self.flush_failures,
+            "recovered_ops": self.recovered_ops,
+            "last_flush_ms": round(self._last_flush_ms, 1)
+        }
+
+
+# 싱글톤 인스턴스
+_write_behind_buffer = None
+
+
+def get_write_behind_buffer() -> Optional[WriteBehindBuffer]:
+    """쓰기 지연 버퍼 싱글톤 인스턴스 반환 (비활성화 시 None)"""
+    global _write_behind_buffer
+    if not settings.WRITE_BEHIND_ENABLED:
+        return None
+    if _write_behind_buffer is None:
+        _write_behind_buffer = WriteBehindBuffer(
+            journal_dir=Path(settings.WRITE_BEHIND_JOURNAL_DIR),
+            flush_interval_ms=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS,
+            max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+            fsync=settings.WRITE_BEHIND_FSYNC
+        )
+    return _write_behind_buffer
+
+
+async def ensure_conversation_flushed(conversation_id: ObjectId) -> None:
+    """쓰기 지연 모드면 해당 대화의 대기 중인 쓰기를 먼저 반영 (비활성화 시 아무것도 하지 않음)"""
+    buffer = get_write_behind_buffer()
+    if buffer is not None:
+        await buffer.ensure_flushed(conversation_id)
@@ -141,6 +141,1460 @@ def test_chat_response_model():
     print("✅ ChatResponse 모델 확인 완료")
 
 
+def test_hyperclova_chat_stream():
+    """HyperCLOVA 스트리밍 응답(SSE)이 토큰 단위로 파싱되는지 확인"""
+    import asyncio
+    import httpx
+    from hyperclova_client import HyperCLOVAClient
+
+    body = (
+        'event: token\ndata: {"message": {"role": "assistant", "content": "안녕"}}\n\n'
+        'event: token\ndata: {"message": {"role": "assistant", "content": "하세요"}}\n\n'
+        'event: result\ndata: {"message": {"role": "assistant", "content": "안녕하세요"}}\n\n'
+    )
+
+    def handler(request):
+        assert request.headers["accept"] == "text/event-stream"
+        return httpx.Response(200, content=body.encode("utf-8"))
+
+    client = HyperCLOVAClient(api_key="test-key")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def collect():
+        return [text async for text in client.chat_stream([{"role": "user", "content": "안녕"}])]
+
+    assert asyncio.run(collect()) == ["안녕", "하세요"]
+    print("✅ HyperCLOVA 스트리밍 파싱 확인 완료")
+
+
+def test_stream_disconnect_persists_partial_answer(monkeypatch):
+    """스트리밍 도중 클라이언트 연결이 끊겨도 부분 답변이 예약된 순서로 저장되는지 확인"""
+    import asyncio
+    from types import SimpleNamespace
+    from routers import conversations
+
+    saved = []
+
+    async def fake_retrieve(query, k, timer, message_history):
+        return {
+            "intent": "course_related", "cached_answer": None, "cacheable": False,
+            "search_results": [{"id": "doc_1", "page_content": "C언어 수업 목표", "metadata": {}}],
+        }
+
+    async def token_stream(**kwargs):
+        yield "C언어는 "
+        yield "절차적 "
+        await asyncio.sleep(10)  # 생성 도중 연결 종료
+        yield "언어입니다"
+
+    async def fake_finalize(**kwargs):
+        await asyncio.sleep(0)
+        saved.append(kwargs)
+        return "bot_message_id"
+
+    fake_client = SimpleNamespace(generate_answer_stream=token_stream)
+    monkeypatch.setattr(conversations, "get_hyperclova_client", lambda: fake_client)
+    monkeypatch.setattr(conversations, "_retrieve_context", fake_retrieve)
+    monkeypatch.setattr(conversations, "_finalize_chat_turn", fake_finalize)
+    turn = {"message_history": [], "conv_object_id": "conv", "bot_message_order": 5, "conversation": {}}
+
+    async def disconnect(close_with_cancel):
+        stream = conversations._stream_chat_message("conv", "C언어란?", 3, False, turn)
+        events = [await stream.__anext__() for _ in range(3)]  # meta + 토큰 2개
+        if close_with_cancel:
+            pending = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.01)
+            pending.cancel()
+            try:
+                await pending
+            except asyncio.CancelledError:
+                pass
+        else:
+            await stream.aclose()
+        await asyncio.gather(*conversations._interrupted_turn_tasks)
+        return events
+
+    for close_with_cancel in (True, False):
+        saved.clear()
+        events = asyncio.run(disconnect(close_with_cancel))
+        assert events[0].startswith("event: meta")
+        assert len(saved) == 1
+        assert saved[0]["bot_message_order"] == 5
+        assert saved[0]["answer"] == "C언어는 절차적 \n\n" + conversations.STREAM_INTERRUPTED_NOTICE
+        assert not conversations._interrupted_turn_tasks
+    print("✅ 스트리밍 연결 종료 시 부분 답변 저장 확인 완료")
+
+
+def test_local_intent_classifier_routing(monkeypatch):
+    """로컬 의도 분류기의 일상 대화/수업 질문 분류와 확신도가 낮을 때 LLM 분류로 대체되는지 확인"""
+    import asyncio
+    from routers import conversations
+    from services.intent_classifier import INTENT_EXAMPLES, LocalIntentClassifier
+
+    class FakeVectorStore:
+        """예시 질문을 의도별 축 방향 벡터로 임베딩"""
+
+        def __init__(self):
+            self.calls = 0
+
+        async def embed_documents(self, texts):
+            self.calls += 1
+            return [
+                [1.0, 0.0] if text in INTENT_EXAMPLES["course_related"] else [0.0, 1.0]
+                for text in texts
+            ]
+
+    vectorstore = FakeVectorStore()
+    classifier = LocalIntentClassifier(vectorstore, min_margin=0.2)
+
+    async def classify_all():
+        return [
+            await classifier.classify(embedding)
+            for embedding in ([0.9, 0.1], [0.2, 0.95], [0.7, 0.6], [0.0, 0.0])
+        ]
+
+    course, casual, ambiguous, empty = asyncio.run(classify_all())
+    assert course[0] == "course_related" and course[1] >= 0.2
+    assert casual[0] == "casual_chat"
+    assert ambiguous[0] is None and ambiguous[1] < 0.2  # 마진이 임계값보다 작으면 판단 보류
+    assert empty == (None, 0.0)
+    assert vectorstore.calls == len(INTENT_EXAMPLES)  # 중심 벡터는 한 번만 계산
+
+    llm_calls = []
+
+    class FakeHyperCLOVA:
+        async def classify_intent(self, query):
+            llm_calls.append(query)
+            return "course_related"
+
+    monkeypatch.setattr(conversations, "get_intent_classifier", lambda: classifier)
+    monkeypatch.setattr(conversations, "get_hyperclova_client", lambda: FakeHyperCLOVA())
+
+    async def route():
+        return [
+            await conversations._classify_intent("안녕", [0.2, 0.95]),
+            await conversations._classify_intent("애매한 질문", [0.7, 0.6]),
+            await conversations._classify_intent("임베딩 실패", None),
+        ]
+
+    assert asyncio.run(route()) == ["casual_chat", "course_related", "course_related"]
+    assert llm_calls == ["애매한 질문", "임베딩 실패"]
+    print("✅ 로컬 의도 분류 확인 완료")
+
+
+class _FakeEmbeddings:
+    """HuggingFaceEmbeddings 대체 (모델 로딩 없이 텍스트별로 고정된 2차원 벡터)"""
+
+    def __init__(self, **kwargs):
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        return [[1.0, float(len(text))] for text in texts]
+
+
+def test_embedding_cache_lru_and_normalization(monkeypatch):
+    """쿼리 임베딩 캐시의 적중/미스, LRU 제거, 정규화된 키 사용 확인"""
+    import asyncio
+    import unicodedata
+    import vectorstore_base
+    from vectorstore_base import BaseVectorStoreService, EmbeddingCache, normalize_query
+
+    cache = EmbeddingCache(max_size=2)
+    assert cache.get("a") is None
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])  # 가장 오래전에 사용한 b 제거
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0] and cache.get("c") == [3.0]
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 3, "misses": 2, "evictions": 1}
+
+    disabled = EmbeddingCache(max_size=0)
+    disabled.put("a", [1.0])
+    assert disabled.get("a") is None
+
+    assert normalize_query("  C언어\t 수업\n목표  ") == "C언어 수업 목표"
+    assert normalize_query(unicodedata.normalize("NFD", "교수님")) == "교수님"
+
+    class StubVectorStore(BaseVectorStoreService):
+        def _initialize_backend(self):
+            pass
+
+        def is_ready(self):
+            return True
+
+        async def _search_vectors(self, query_embedding, k, metadata_filter=None):
+            return []
+
+    monkeypatch.setattr(vectorstore_base, "HuggingFaceEmbeddings", _FakeEmbeddings)
+    monkeypatch.setattr(vectorstore_base.settings, "EMBEDDING_BATCH_ENABLED", False)
+    monkeypatch.setattr(vectorstore_base.settings, "HYBRID_SEARCH_ENABLED", False)
+    monkeypatch.setattr(vectorstore_base.settings, "GAZETTEER_ENABLED", False)
+    service = StubVectorStore()
+
+    async def embed_variants():
+        return [
+            await service.embed_query(query)
+            for query in ("C언어 교수님", "  C언어   교수님 ", unicodedata.normalize("NFD", "C언어 교수님"))
+        ]
+
+    vectors = asyncio.run(embed_variants())
+    assert vectors[0] == vectors[1] == vectors[2]
+    assert service.embeddings.queries == ["C언어 교수님"]  # 공백/유니코드 표기만 다른 질문은 모델을 다시 호출하지 않음
+    assert service.metrics()["embedding_cache"]["hits"] == 2
+    service._executor.shutdown()
+    print("✅ 쿼리 임베딩 캐시 확인 완료")
+
+
+def test_faiss_backend_selection_and_search(tmp_path, monkeypatch):
+    """VECTORSTORE_BACKEND 설정으로 FAISS 백엔드가 선택되고, 검색 결과가 Pinecone 백엔드와 같은 형식인지 확인"""
+    import asyncio
+    import json
+    import faiss
+    import numpy as np
+    import pytest
+    import direct_pinecone_service
+    import vectorstore_base
+    from faiss_vector_service import FaissVectorStoreService
+    from vectorstore_base import BaseVectorStoreService
+
+    documents = [
+        {"id": "doc_c", "text": "C언어프로그래밍 수업 목표", "metadata": {"course_name": "C언어프로그래밍", "professor": "임석구"}},
+        {"id": "doc_db", "text": "데이터베이스 평가 방법", "metadata": {"course_name": "데이터베이스", "professor": "정원석"}},
+        {"id": "doc_web", "text": "웹프로그래밍 과제 안내", "metadata": {"course_name": "웹프로그래밍", "professor": "홍길동"}},
+    ]
+    vectors = np.asarray([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.6, 0.8, 0.0]], dtype=np.float32)
+    index = faiss.IndexFlatIP(3)
+    index.add(vectors)
+    faiss.write_index(index, str(tmp_path / "index.faiss"))
+    with open(tmp_path / "documents.jsonl", "w", encoding="utf-8") as f:
+        for doc in documents:
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+
+    monkeypatch.setattr(vectorstore_base, "HuggingFaceEmbeddings", _FakeEmbeddings)
+    monkeypatch.setattr(vectorstore_base.settings, "EMBEDDING_BATCH_ENABLED", False)
+    monkeypatch.setattr(vectorstore_base.settings, "HYBRID_SEARCH_ENABLED", False)
+    monkeypatch.setattr(vectorstore_base.settings, "GAZETTEER_ENABLED", False)
+    monkeypatch.setattr(vectorstore_base.settings, "FAISS_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(vectorstore_base.settings, "VECTORSTORE_BACKEND", "faiss")
+    monkeypatch.setattr(direct_pinecone_service, "_vectorstore_service", None)
+
+    service = direct_pinecone_service.get_vectorstore_service()
+    assert isinstance(service, FaissVectorStoreService) and isinstance(service, BaseVectorStoreService)
+    assert direct_pinecone_service.get_vectorstore_service() is service
+    assert service.is_ready() and service.describe()["documents"] == 3
+
+    async def search():
+        results = await service.similarity_search("데이터베이스 평가", k=2, query_embedding=[0.1, 1.0, 0.0])
+        filtered = await service._search_vectors([0.1, 1.0, 0.0], 2, {"professor": ["홍길동"]})
+        return results, filtered
+
+    results, filtered = asyncio.run(search())
+    assert [doc["id"] for doc in results] == ["doc_db", "doc_web"]
+    for doc in results:
+        assert set(doc) == {"id", "page_content", "metadata", "score"}
+        assert doc["metadata"]["text"] == doc["page_content"]  # Pinecone 백엔드처럼 메타데이터에 본문 포함
+    assert results[0]["score"] > results[1]["score"]
+    assert [doc["id"] for doc in filtered] == ["doc_web"]
+    service._executor.shutdown()
+
+    monkeypatch.setattr(vectorstore_base.settings, "VECTORSTORE_BACKEND", "chroma")
+    monkeypatch.setattr(direct_pinecone_service, "_vectorstore_service", None)
+    with pytest.raises(ValueError):
+        direct_pinecone_service.get_vectorstore_service()
+    print("✅ FAISS 백엔드 선택/검색 확인 완료")
+
+
+def test_embedding_batcher_coalescing_and_flush():
+    """동시 임베딩 요청이 한 배치로 모이고, 배치 크기 상한/대기 시간에 맞춰 실행되는지 확인"""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from vectorstore_base import EmbeddingBatcher
+
+    calls = []
+
+    def embed_documents(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), float(i)] for i, text in enumerate(texts)]
+
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def coalesce():
+        # 대기 시간 안에 들어온 요청은 한 배치로 (동일 텍스트는 한 번만 계산)
+        batcher = EmbeddingBatcher(embed_documents, executor, max_batch_size=16, max_wait_ms=20)
+        first = asyncio.ensure_future(batcher.embed("가"))
+        await asyncio.sleep(0.005)
+        rest = await asyncio.gather(batcher.embed("나나"), batcher.embed("가"), batcher.embed("다다다"))
+        return [await first, *rest], batcher.stats()
+
+    vectors, stats = asyncio.run(coalesce())
+    assert calls == [["가", "나나", "다다다"]]
+    assert vectors == [[1.0, 0.0], [2.0, 1.0], [1.0, 0.0], [3.0, 2.0]]
+    assert stats["batches"] == 1 and stats["items"] == 4
+
+    async def max_batch_flush():
+        # 상한만큼 쌓이면 대기 시간(10초)을 기다리지 않고 바로 실행
+        calls.clear()
+        batcher = EmbeddingBatcher(embed_documents, executor, max_batch_size=2, max_wait_ms=10_000)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(text) for text in ("a", "bb", "ccc", "dddd"))), timeout=2
+        )
+
+    assert len(asyncio.run(max_batch_flush())) == 4
+    assert calls == [["a", "bb"], ["ccc", "dddd"]]
+
+    async def timeout_flush():
+        # 혼자 들어온 요청도 max_wait_ms가 지나면 실행
+        calls.clear()
+        batcher = EmbeddingBatcher(embed_documents, executor, max_batch_size=16, max_wait_ms=20)
+        return await asyncio.wait_for(batcher.embed("혼자"), timeout=2)
+
+    assert asyncio.run(timeout_flush()) == [2.0, 0.0]
+    assert calls == [["혼자"]]
+    executor.shutdown()
+    print("✅ 임베딩 마이크로 배칭 확인 완료")
+
+
+def test_embedding_batcher_error_propagation():
+    """배치 임베딩이 실패하면 배치의 모든 호출자에게 같은 예외가 전달되고 다음 배치는 정상 처리되는지 확인"""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from vectorstore_base import EmbeddingBatcher
+
+    attempts = []
+
+    def embed_documents(texts):
+        attempts.append(list(texts))
+        if len(attempts) == 1:
+            raise RuntimeError("모델 오류")
+        return [[1.0] for _ in texts]
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    batcher = EmbeddingBatcher(embed_documents, executor, max_batch_size=16, max_wait_ms=10)
+
+    async def run():
+        failed = await asyncio.gather(*(batcher.embed(text) for text in ("a", "b", "c")), return_exceptions=True)
+        recovered = await batcher.embed("d")
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) and str(result) == "모델 오류" for result in failed)
+    assert recovered == [1.0]
+    assert attempts == [["a", "b", "c"], ["d"]]
+    executor.shutdown()
+    print("✅ 임베딩 배치 오류 전달 확인 완료")
+
+
+def test_speculative_retrieval_cancel_and_reuse(monkeypatch):
+    """의도 분류와 동시에 시작한 벡터 검색이 일상 대화면 취소되고, 수업 질문이면 다시 검색하지 않고 재사용되는지 확인"""
+    import asyncio
+    from routers import conversations
+    from services.stage_metrics import StageTimer
+
+    events = []
+
+    async def fake_embed(query):
+        return [1.0, 0.0]
+
+    async def fake_classify(query, query_embedding):
+        events.append("classify_start")
+        await asyncio.sleep(0.02)
+        events.append("classify_end")
+        return "casual_chat" if query == "안녕" else "course_related"
+
+    async def fake_search(query, k, query_embedding=None):
+        events.append("search_start")
+        try:
+            await asyncio.sleep(0.01 if query != "안녕" else 1)
+        except asyncio.CancelledError:
+            events.append("search_cancelled")
+            raise
+        events.append("search_end")
+        return [{"id": "doc_1", "page_content": "C언어 수업 목표", "metadata": {}}]
+
+    monkeypatch.setattr(conversations.settings, "SPECULATIVE_RETRIEVAL", True)
+    monkeypatch.setattr(conversations, "get_answer_cache", lambda: None)
+    monkeypatch.setattr(conversations, "get_reranker", lambda: None)
+    monkeypatch.setattr(conversations, "_embed_query", fake_embed)
+    monkeypatch.setattr(conversations, "_classify_intent", fake_classify)
+    monkeypatch.setattr(conversations, "_search_courses", fake_search)
+
+    async def run(query):
+        result = await conversations._retrieve_context(query, 3, StageTimer(), [])
+        await asyncio.sleep(0)  # 취소 전파 대기
+        return result
+
+    casual = asyncio.run(run("안녕"))
+    assert casual["intent"] == "casual_chat" and casual["search_results"] == []
+    assert events == ["classify_start", "search_start", "classify_end", "search_cancelled"]
+
+    events.clear()
+    course = asyncio.run(run("C언어 수업 목표"))
+    assert course["search_results"][0]["id"] == "doc_1"
+    # 검색은 분류와 동시에 진행되어 분류가 끝나기 전에 완료되고 한 번만 실행됨
+    assert events == ["classify_start", "search_start", "search_end", "classify_end"]
+    print("✅ 추측 실행 검색 취소/재사용 확인 완료")
+
+
+def test_semantic_answer_cache(tmp_path):
+    """의미 답변 캐시의 유사 질문 적중, 용량 제한, 인덱스 재구축 무효화 확인"""
+    import json
+    from services.answer_cache import SemanticAnswerCache
+
+    stats_path = tmp_path / "metadata_stats.json"
+    stats_path.write_text(json.dumps({"index_version": "v1"}), encoding="utf-8")
+
+    cache = SemanticAnswerCache(
+        max_distance=0.05,
+        max_entries=2,
+        index_version_path=stats_path,
+        index_version_check_seconds=0
+    )
+    docs = [{"id": "doc_1", "page_content": "본문", "metadata": {"course_name": "C언어"}}]
+
+    cache.store([1.0, 0.0, 0.0], docs, "답변 A")
+    assert cache.lookup([0.99, 0.05, 0.0]).answer == "답변 A"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+    cache.store([0.0, 1.0, 0.0], docs, "답변 B")
+    cache.store([0.0, 0.0, 1.0], docs, "답변 C")
+    assert cache.stats()["entries"] == 2
+
+    stats_path.write_text(json.dumps({"index_version": "v2"}), encoding="utf-8")
+    assert cache.lookup([0.0, 0.0, 1.0]) is None
+    assert cache.stats()["entries"] == 0
+
+    # 다른 호스트에서 재구축 (MongoDB 버전만 변경, 로컬 파일은 그대로)
+    cache.observe_index_version("m1", source="mongo")
+    cache.store([1.0, 0.0, 0.0], docs, "답변 A")
+    cache.observe_index_version("m1", source="mongo")
+    assert cache.stats()["entries"] == 1
+    cache.observe_index_version("m2", source="mongo")
+    assert cache.stats()["entries"] == 0
+    print("✅ 의미 답변 캐시 확인 완료")
+
+
+def test_semantic_answer_cache_entities():
+    """임베딩이 가까워도 주차/과목 코드/교수명이 다른 질문은 캐시에 적중하지 않는지 확인"""
+    from services.answer_cache import SemanticAnswerCache, query_entities
+
+    week5 = query_entities("C언어프로그래밍 5주차 수업 내용", {"course_name": ["C언어프로그래밍"]})
+    week6 = query_entities("C언어프로그래밍 6주차 수업 내용", {"course_name": ["C언어프로그래밍"]})
+    other_professor = query_entities("교수님 연락처", {"professor": ["정원석"]})
+    assert week5 != week6
+    assert query_entities("cs101 과제", None) == query_entities("CS101  과제", None)
+    assert query_entities("CS101 과제", None) != query_entities("CS102 과제", None)
+
+    cache = SemanticAnswerCache(max_distance=0.05)
+    docs = [{"id": "doc_5", "page_content": "5주차", "metadata": {}}]
+    cache.store([1.0, 0.0], docs, "5주차 답변", week5)
+    cache.store([0.999, 0.04], docs, "정원석 교수님 연락처", other_professor)
+
+    assert cache.lookup([1.0, 0.01], week5).answer == "5주차 답변"
+    assert cache.lookup([1.0, 0.01], week6) is None  # 가장 가까운 항목이라도 구분 요소가 다르면 미스
+    assert cache.lookup([1.0, 0.0], other_professor).answer == "정원석 교수님 연락처"
+    print("✅ 의미 답변 캐시 구분 요소 확인 완료")
+
+
+def test_answer_cache_skipped_for_follow_up_turns(monkeypatch):
+    """히스토리가 있는 후속 질문은 의미 캐시를 조회/저장하지 않는지 확인"""
+    import asyncio
+    from types import SimpleNamespace
+    from routers import conversations
+    from services.answer_cache import SemanticAnswerCache
+    from services.stage_metrics import StageTimer
+
+    cache = SemanticAnswerCache(max_distance=0.05)
+    docs = [{"id": "doc_1", "page_content": "본문", "metadata": {}}]
+    cache.store([1.0, 0.0], docs, "다른 대화의 답변")
+
+    async def fake_embed(query):
+        return [1.0, 0.0]
+
+    async def fake_classify(query, query_embedding):
+        return "course_info"
+
+    async def fake_search(query, k, query_embedding=None):
+        return [{"id": "doc_2", "page_content": "검색 결과", "metadata": {}}]
+
+    monkeypatch.setattr(conversations, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(conversations, "get_vectorstore_service", lambda: SimpleNamespace(gazetteer=None))
+    monkeypatch.setattr(conversations, "get_reranker", lambda: None)
+    monkeypatch.setattr(conversations, "_embed_query", fake_embed)
+    monkeypatch.setattr(conversations, "_classify_intent", fake_classify)
+    monkeypatch.setattr(conversations, "_search_courses", fake_search)
+
+    first_turn = asyncio.run(conversations._retrieve_context("두 번째 건?", 3, StageTimer(), []))
+    assert first_turn["cached_answer"] == "다른 대화의 답변"
+
+    history = [{"role": "system", "content": "이전 대화 요약: 자료구조 과목 문의"}]
+    follow_up = asyncio.run(conversations._retrieve_context("두 번째 건?", 3, StageTimer(), history))
+    assert follow_up["cached_answer"] is None
+    assert follow_up["search_results"][0]["id"] == "doc_2"
+
+    conversations._store_answer(follow_up, "후속 답변")
+    assert cache.stats()["entries"] == 1
+    print("✅ 후속 질문 의미 캐시 제외 확인 완료")
+
+
+def test_hybrid_lexical_fusion():
+    """BM25 어휘 색인의 교수명 매칭과 RRF 융합 순서 확인"""
+    from services.lexical_index import BM25Index, reciprocal_rank_fusion
+
+    index = BM25Index([
+        {"id": "doc_1", "text": "[강의명] C언어프로그래밍\n[담당교수] 임석구\n\n수업 목표", "metadata": {}},
+        {"id": "doc_2", "text": "[강의명] 데이터베이스\n[담당교수] 정원석\n\n평가 방법", "metadata": {}},
+        {"id": "doc_3", "text": "[강의명] 웹프로그래밍\n[담당교수] 홍길동\n\n과제 안내", "metadata": {}},
+    ])
+    lexical = index.search_documents("임석구교수님 연락처", k=1)
+    assert lexical[0]["id"] == "doc_1"
+
+    dense = [{"id": "doc_2"}, {"id": "doc_1"}]
+    fused = reciprocal_rank_fusion([dense, lexical], k=2)
+    assert [doc["id"] for doc in fused][0] == "doc_1"
+    print("✅ 하이브리드 검색 융합 확인 완료")
+
+
+def test_gazetteer_metadata_filter():
+    """교수명/과목명 사전 매칭과 Pinecone 필터 변환 확인"""
+    from services.gazetteer import Gazetteer, to_pinecone_filter
+
+    gazetteer = Gazetteer(
+        professors=["임석구", "정원석, 홍길동"],
+        courses=["C언어", "C언어프로그래밍", "데이터베이스"]
+    )
+    assert gazetteer.match("C 언어프로그래밍 담당교수가 누구야") == {"course_name": ["C언어프로그래밍"]}
+    assert gazetteer.match("홍길동교수님이 가르치는 과목은?") == {"professor": ["정원석, 홍길동"]}
+    assert gazetteer.match("안녕하세요") == {}
+
+    assert to_pinecone_filter({"professor": ["임석구"], "course_name": ["데이터베이스"]}) == {
+        "$and": [{"professor": {"$in": ["임석구"]}}, {"course_name": {"$in": ["데이터베이스"]}}]
+    }
+    print("✅ 메타데이터 필터 사전 확인 완료")
+
+
+def test_reranker_budget_fallback():
+    """재순위화 점수 정렬과 시간 예산 초과 시 밀집 검색 순서 대체 확인"""
+    import asyncio
+    import time
+    from services.reranker import CrossEncoderReranker
+
+    class FakeCrossEncoder:
+        def __init__(self, delay: float):
+            self.delay = delay
+
+        def predict(self, pairs, batch_size=None):
+            time.sleep(self.delay)
+            return [len(doc) for _, doc in pairs]
+
+    docs = [{"id": "a", "page_content": "짧음"}, {"id": "b", "page_content": "조금 더 긴 문서"}]
+
+    reranker = CrossEncoderReranker("fake", budget_ms=500)
+    reranker._model = FakeCrossEncoder(delay=0)
+    ranked = asyncio.run(reranker.rerank("질문", docs, k=1))
+    assert [doc["id"] for doc in ranked] == ["b"]
+
+    reranker = CrossEncoderReranker("fake", budget_ms=10)
+    reranker._model = FakeCrossEncoder(delay=0.2)
+    ranked = asyncio.run(reranker.rerank("질문", docs, k=1))
+    assert [doc["id"] for doc in ranked] == ["a"]
+    assert reranker.stats()["timeouts"] == 1
+
+    async def concurrent(reranker, n):
+        return await asyncio.gather(*(reranker.rerank("질문", docs, k=1) for _ in range(n)))
+
+    # 동시 요청은 예산 안에서 차례를 기다려 모두 재순위화
+    reranker = CrossEncoderReranker("fake", budget_ms=1000)
+    reranker._model = FakeCrossEncoder(delay=0.05)
+    results = asyncio.run(concurrent(reranker, 3))
+    assert all([doc["id"] for doc in ranked] == ["b"] for ranked in results)
+    assert reranker.stats()["reranked"] == 3 and reranker.stats()["queue_timeouts"] == 0
+
+    # 예산 안에 차례가 오지 않으면 대체하고 따로 집계
+    reranker = CrossEncoderReranker("fake", budget_ms=50)
+    reranker._model = FakeCrossEncoder(delay=0.2)
+    results = asyncio.run(concurrent(reranker, 2))
+    assert all([doc["id"] for doc in ranked] == ["a"] for ranked in results)
+    stats = reranker.stats()
+    assert stats["timeouts"] == 1 and stats["queue_timeouts"] == 1 and stats["skipped"] == 0
+    print("✅ 재순위화 시간 예산 확인 완료")
+
+
+def test_context_packer():
+    """같은 과목/항목 청크 병합, 반복 헤더 제거, 토큰 예산 적용 확인"""
+    from services.context_packer import TokenEstimator, pack_context
+
+    header = "[강의명] C언어프로그래밍\n[담당교수] 임석구\n\n"
+    meta = {"course_code": "CS101", "course_name": "C언어프로그래밍", "professor": "임석구", "section": "교과목 개요"}
+    docs = [
+        {"page_content": header + "포인터와 배열을 배운다. 구조체", "metadata": {**meta, "chunk_index": 1}},
+        {"page_content": header + "C언어 기초 문법을 익힌다. 포인터와 배열을", "metadata": {**meta, "chunk_index": 0}},
+        {"page_content": header + "매주 실습 과제", "metadata": {**meta, "section": "과제"}},
+    ]
+    estimator = TokenEstimator()
+
+    packed = pack_context(docs, token_budget=1000, estimator=estimator)
+    assert packed.count("[강의명]") == 2
+    assert "C언어 기초 문법을 익힌다. 포인터와 배열을 배운다. 구조체" in packed
+    assert packed.index("교과목 개요") < packed.index("매주 실습 과제")
+
+    small = pack_context(docs, token_budget=estimator.count(packed.split("\n\n")[0]), estimator=estimator)
+    assert "매주 실습 과제" not in small
+
+    # 교수님별 수업 목록은 교수마다 별도 블록으로 유지하고 교수명을 표기
+    list_meta = {"course_code": "PROFESSOR_LIST", "section": "교수님별 수업 목록"}
+    professor_docs = [
+        {"page_content": "C언어프로그래밍, 자료구조", "metadata": {**list_meta, "professor": "임석구", "course_name": "임석구 교수님 전체 수업"}},
+        {"page_content": "운영체제", "metadata": {**list_meta, "professor": "정원석", "course_name": "정원석 교수님 전체 수업"}},
+    ]
+    packed = pack_context(professor_docs, token_budget=1000, estimator=estimator)
+    assert "[담당교수] 임석구" in packed and "[담당교수] 정원석" in packed
+    assert packed.index("임석구") < packed.index("C언어프로그래밍") < packed.index("정원석") < packed.index("운영체제")
+    print("✅ 컨텍스트 패킹 확인 완료")
+
+
+def test_memory_summary_in_system_prompt():
+    """대화 메모리 요약이 시스템 프롬프트에 합쳐지는지 확인"""
+    from hyperclova_client import HyperCLOVAClient
+
+    messages = HyperCLOVAClient._build_history_messages("시스템", [
+        {"role": "system", "content": "이전 대화 요약: C언어 과목 문의"},
+        {"role": "user", "content": "과제는?"},
+        {"role": "assistant", "content": "매주 실습 과제입니다."},
+    ])
+    assert [msg["role"] for msg in messages] == ["system", "user", "assistant"]
+    assert "C언어 과목 문의" in messages[0]["content"]
+    print("✅ 대화 메모리 요약 프롬프트 확인 완료")
+
+
+def test_summary_update_drained_on_shutdown(monkeypatch):
+    """요약 갱신이 백그라운드 큐로 실행되어 중복 없이 예약되고 종료 시 정리(drain)에서 끝나는지 확인"""
+    import asyncio
+    from bson import ObjectId
+    from services import conversation_memory
+
+    finished = []
+
+    async def slow_update(conversation_id, summary, summary_order, upto_order):
+        try:
+            await asyncio.sleep(0.05)
+            finished.append((conversation_id, upto_order))
+        finally:
+            conversation_memory._in_flight.discard(conversation_id)
+
+    monkeypatch.setattr(conversation_memory, "_update_summary", slow_update)
+    conversation = {"_id": ObjectId(), "summary": "", "summary_order": -1}
+    last_order = conversation_memory.settings.MEMORY_RECENT_MESSAGES + conversation_memory.settings.MEMORY_SUMMARY_EVERY_TURNS * 2
+
+    async def run():
+        conversation_memory.schedule_summary_update(conversation, last_order)
+        conversation_memory.schedule_summary_update(conversation, last_order)  # 진행 중이면 중복 예약 안 함
+        await conversation_memory.summary_queue.drain(timeout=5)
+
+    asyncio.run(run())
+    assert finished == [(str(conversation["_id"]), last_order - conversation_memory.settings.MEMORY_RECENT_MESSAGES)]
+    assert not conversation_memory._in_flight
+    print("✅ 대화 요약 큐 정리 확인 완료")
+
+
+def test_pinecone_async_http_query():
+    """Pinecone REST 비동기 검색의 필터 전달과 5xx 재시도 확인"""
+    import asyncio
+    import json
+    import httpx
+    from direct_pinecone_service import DirectPineconeVectorStoreService
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        if len(calls) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"matches": [
+            {"id": "doc_1", "score": 0.9, "metadata": {"text": "본문", "professor": "임석구"}}
+        ]})
+
+    service = object.__new__(DirectPineconeVectorStoreService)
+    service.index_host = "https://index.test"
+    service.http_retries = 0
+    service._http_client = httpx.AsyncClient(base_url=service.index_host, transport=httpx.MockTransport(handler))
+
+    documents = asyncio.run(service._search_vectors([0.1, 0.2], 3, {"professor": ["임석구"]}))
+    assert documents[0]["id"] == "doc_1" and documents[0]["page_content"] == "본문"
+    assert calls[-1]["filter"] == {"professor": {"$in": ["임석구"]}} and calls[-1]["topK"] == 3
+    assert service.http_retries == 1
+    print("✅ Pinecone 비동기 HTTP 검색 확인 완료")
+
+
+def test_single_flight_coalescing():
+    """동시에 들어온 같은 키 작업이 한 번만 실행되는지 확인"""
+    import asyncio
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight("테스트")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "답변"
+
+    async def run():
+        return await asyncio.gather(*(flight.do(("질문", 4), work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["답변"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4, "abandoned": 0}
+    print("✅ 동일 요청 단일 실행 확인 완료")
+
+
+def test_single_flight_cancels_abandoned_work():
+    """기다리던 요청이 모두 취소되면 공유 작업(백엔드 호출)도 취소되고, 일부만 취소되면 계속 진행되는지 확인"""
+    import asyncio
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight("테스트")
+    events = []
+
+    async def work():
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            events.append("backend_cancelled")
+            raise
+        events.append("backend_done")
+        return "검색 결과"
+
+    async def lone_waiter():
+        waiter = asyncio.create_task(flight.do("질문", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)  # 공유 작업 취소 전파 대기
+
+    asyncio.run(lone_waiter())
+    assert events == ["backend_cancelled"]
+    assert flight.stats()["in_flight"] == 0 and flight.stats()["abandoned"] == 1
+
+    async def one_of_two_waiters():
+        cancelled = asyncio.create_task(flight.do("질문", work))
+        kept = asyncio.create_task(flight.do("질문", work))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        return await kept
+
+    events.clear()
+    assert asyncio.run(one_of_two_waiters()) == "검색 결과"
+    assert events == ["backend_done"]
+    print("✅ 버려진 공유 작업 취소 확인 완료")
+
+
+def test_background_queue_retry_and_drain():
+    """백그라운드 큐의 재시도와 종료 시 남은 작업 처리 확인"""
+    import asyncio
+    from services.background_queue import BackgroundQueue
+
+    attempts = {"flaky": 0}
+    done = []
+
+    async def flaky():
+        attempts["flaky"] += 1
+        if attempts["flaky"] == 1:
+            raise RuntimeError("일시 오류")
+        done.append("flaky")
+
+    async def job(i):
+        done.append(i)
+
+    async def run():
+        queue = BackgroundQueue("테스트", concurrency=1, max_retries=1)
+        queue.enqueue("flaky", flaky)
+        for i in range(3):
+            queue.enqueue(f"job-{i}", lambda i=i: job(i))
+        await queue.drain(timeout=5)
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert done == ["flaky", 0, 1, 2]
+    assert stats["completed"] == 4 and stats["retries"] == 1 and stats["depth"] == 0
+    print("✅ 백그라운드 큐 재시도/정리 확인 완료")
+
+
+def test_title_generation_failure_fallback(monkeypatch):
+    """HyperCLOVA 호출 실패는 예외로 전파되고, 빈 응답/안내 문구는 제목으로 저장되지 않는지 확인"""
+    import asyncio
+    import pytest
+    from bson import ObjectId
+    from hyperclova_client import HyperCLOVAClient
+    from services import title_generator
+
+    conversation_id = str(ObjectId())
+    saved_titles = []
+    replies = []
+
+    class FakeCursor:
+        def sort(self, *args):
+            return self
+
+        async def to_list(self, length):
+            return [
+                {"role": "user", "content": "자료구조 과목의 중간고사 범위와 평가 비율이 궁금합니다"},
+                {"role": "assistant", "content": "중간고사는 1~7주차입니다."},
+            ]
+
+    class FakeCollection:
+        def find(self, *args):
+            return FakeCursor()
+
+        async def update_one(self, query, update):
+            saved_titles.append(update["$set"]["title"])
+
+    class FakeClient(HyperCLOVAClient):
+        def __init__(self):
+            pass
+
+        async def chat(self, messages, **kwargs):
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return {"result": {"message": {"role": "assistant", "content": reply}}}
+
+    async def no_flush(conv_object_id):
+        return None
+
+    monkeypatch.setattr(title_generator.db_instance, "get_collection", lambda name: FakeCollection())
+    monkeypatch.setattr(title_generator, "get_hyperclova_client", lambda: FakeClient())
+    monkeypatch.setattr(title_generator, "ensure_conversation_flushed", no_flush)
+
+    replies.append(RuntimeError("HyperCLOVA 장애"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(title_generator.auto_generate_title(conversation_id, 10, "다섯 번째 질문"))
+    assert saved_titles == []
+
+    replies.extend(["죄송합니다. 답변을 생성하는 중 오류가 발생했습니다.", "", "자료구조 시험 범위 문의"])
+    for _ in range(3):
+        asyncio.run(title_generator.auto_generate_title(conversation_id, 10, "다섯 번째 질문"))
+    assert saved_titles == [
+        "자료구조 과목의 중간고사 범위와 평가 비율이 궁금합니다",
+        "자료구조 과목의 중간고사 범위와 평가 비율이 궁금합니다",
+        "자료구조 시험 범위 문의",
+    ]
+    print("✅ 대화 제목 생성 실패 대체 확인 완료")
+
+
+def test_write_behind_journal_recovery(tmp_path, monkeypatch):
+    """쓰기 지연 버퍼가 반영 전 종료돼도 저널로 복구해 다시 반영하는지 확인"""
+    import asyncio
+    from bson import ObjectId
+    from services import write_behind
+    from services.write_behind import WriteBehindBuffer
+
+    written = {"messages": []}
+
+    class FakeCollection:
+        def __init__(self, name):
+            self.name = name
+
+        async def bulk_write(self, requests, ordered=True):
+            written[self.name].extend(requests)
+
+    monkeypatch.setattr(write_behind.db_instance, "get_collection", lambda name: FakeCollection(name))
+
+    conv_id = ObjectId()
+    message = {"_id": ObjectId(), "conversation_id": conv_id, "role": "assistant", "content": "답변", "order": 1}
+
+    async def crash_before_flush():
+        buffer = WriteBehindBuffer(tmp_path, flush_interval_ms=60_000)
+        await buffer.start()
+        buffer.add_message(message)
+        assert buffer.has_pending(conv_id)
+        buffer._flush_task.cancel()
+        buffer._segment.close()  # 반영 없이 프로세스 종료
+
+    async def restart():
+        buffer = WriteBehindBuffer(tmp_path, flush_interval_ms=60_000)
+        await buffer.start()
+        await buffer.stop()
+        return buffer.stats()
+
+    asyncio.run(crash_before_flush())
+    assert written["messages"] == []
+
+    stats = asyncio.run(restart())
+    assert stats["recovered_ops"] == 1 and stats["flushed_ops"] == 1
+    assert len(written["messages"]) == 1
+    assert list(tmp_path.iterdir()) == []
+    print("✅ 쓰기 지연 저널 복구 확인 완료")
+
+
+def test_write_behind_locked_segment_closes_file(tmp_path):
+    """다른 워커가 잠근 세그먼트를 열면 예외를 내고 파일 디스크립터를 남기지 않는지 확인"""
+    import gc
+    import os
+    import warnings
+    from services import write_behind
+    from services.write_behind import JournalSegment
+
+    if write_behind.fcntl is None or not os.path.isdir("/proc/self/fd"):
+        pytest.skip("파일 잠금 / 파일 디스크립터 목록을 지원하지 않는 환경")
+
+    path = tmp_path / "segment-1.jsonl"
+    owner = JournalSegment(path, fsync=False)
+    open_fds = len(os.listdir("/proc/self/fd"))
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        for _ in range(3):
+            with pytest.raises(BlockingIOError):
+                JournalSegment(path, fsync=False)
+        gc.collect()
+    assert len(os.listdir("/proc/self/fd")) == open_fds
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]  # GC가 아니라 직접 닫았는지
+
+    owner.close()
+    JournalSegment(path, fsync=False).close()
+    print("✅ 잠긴 저널 세그먼트 정리 확인 완료")
+
+
+def test_write_behind_segment_locked_until_removed(tmp_path, monkeypatch):
+    """반영 중이거나 반영에 실패한 세그먼트를 다른 워커가 복구(재반영)하지 않는지 확인"""
+    import asyncio
+    from bson import ObjectId
+    from services import write_behind
+    from services.write_behind import WriteBehindBuffer
+
+    if write_behind.fcntl is None:
+        pytest.skip("파일 잠금을 지원하지 않는 환경")
+
+    state = {"fail": True, "written": 0}
+
+    class FakeCollection:
+        async def bulk_write(self, requests, ordered=True):
+            await asyncio.sleep(0.01)
+            if state["fail"]:
+                raise RuntimeError("db down")
+            state["written"] += len(requests)
+
+    monkeypatch.setattr(write_behind.db_instance, "get_collection", lambda name: FakeCollection())
+
+    def other_worker_recovers():
+        other = WriteBehindBuffer(tmp_path)
+        other._recover()
+        for segment in other._unflushed_segments:
+            segment.close()
+        return other.recovered_ops
+
+    async def run():
+        buffer = WriteBehindBuffer(tmp_path, flush_interval_ms=60_000)
+        await buffer.start()
+        buffer.add_message({"_id": ObjectId(), "conversation_id": ObjectId(), "role": "assistant", "content": "답변", "order": 1})
+
+        flushing = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0.001)  # bulk_write 진행 중
+        assert other_worker_recovers() == 0
+        await flushing
+        assert buffer.stats()["flush_failures"] == 1
+        assert other_worker_recovers() == 0  # 실패한 세그먼트도 재시도 때까지 잠금 유지
+
+        state["fail"] = False
+        await buffer.flush()
+        assert state["written"] == 1
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert list(tmp_path.iterdir()) == []
+    print("✅ 쓰기 지연 세그먼트 잠금 유지 확인 완료")
+
+
+class _FakeConversations:
+    """message_count 예약 테스트용 대화방 컬렉션 (호출마다 이벤트 루프에 양보해 동시 요청을 끼워 넣음)"""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+
+    @staticmethod
+    def _matches(doc, query):
+        for field, cond in query.items():
+            if isinstance(cond, dict) and "$exists" in cond:
+                if (field in doc) != cond["$exists"]:
+                    return False
+            elif doc.get(field) != cond:
+                return False
+        return True
+
+    def _apply(self, doc, update):
+        for field, value in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + value
+        for field, value in update.get("$max", {}).items():
+            doc[field] = max(doc.get(field, value), value)
+        doc.update(update.get("$set", {}))
+
+    async def find_one(self, query, projection=None):
+        import asyncio
+        await asyncio.sleep(0)
+        return next((dict(doc) for doc in self.docs.values() if self._matches(doc, query)), None)
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        import asyncio
+        await asyncio.sleep(0)
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                before = dict(doc)
+                self._apply(doc, update)
+                return before
+        return None
+
+    async def update_one(self, query, update):
+        import asyncio
+        await asyncio.sleep(0)
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                self._apply(doc, update)
+                return
+
+    def find(self, query, projection=None):
+        async def iterate():
+            for doc in list(self.docs.values()):
+                if self._matches(doc, query):
+                    yield dict(doc)
+        return iterate()
+
+    async def bulk_write(self, operations, ordered=True):
+        from types import SimpleNamespace
+        modified = 0
+        for op in operations:
+            for doc in self.docs.values():
+                if self._matches(doc, op._filter):
+                    self._apply(doc, op._doc)
+                    modified += 1
+                    break
+        return SimpleNamespace(modified_count=modified)
+
+
+class _FakeMessages:
+    """message_count 예약 테스트용 메시지 컬렉션"""
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def aggregate(self, pipeline):
+        conversation_ids = pipeline[0]["$match"]["conversation_id"]["$in"]
+
+        async def iterate():
+            import asyncio
+            await asyncio.sleep(0)
+            for conv_id in conversation_ids:
+                orders = [msg["order"] for msg in self.docs if msg["conversation_id"] == conv_id]
+                if orders:
+                    yield {"_id": conv_id, "next_order": max(orders) + 1}
+        return iterate()
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+
+def test_message_order_reservation_concurrent(monkeypatch):
+    """카운터 백필 전 대화방에 동시 요청이 와도 메시지 순서가 겹치지 않고 백필과 같은 값에서 시작하는지 확인"""
+    import asyncio
+    from bson import ObjectId
+    from database import Collections
+    from routers import conversations
+
+    user_id = ObjectId()
+    legacy_id, counted_id = ObjectId(), ObjectId()
+    # 2, 3번 메시지가 삭제된 대화방: 메시지 수(4)가 아니라 최대 order + 1(6)부터 예약해야 함
+    messages = _FakeMessages([
+        {"conversation_id": legacy_id, "order": order} for order in (0, 1, 4, 5)
+    ])
+    convs = _FakeConversations([
+        {"_id": legacy_id, "user_id": user_id},
+        {"_id": counted_id, "user_id": user_id, "message_count": 2},
+    ])
+    collections = {Collections.CONVERSATIONS: convs, Collections.MESSAGES: messages}
+
+    async def no_history(conversation):
+        return []
+
+    async def no_flush(conv_object_id):
+        return None
+
+    monkeypatch.setattr(conversations.db_instance, "get_collection", lambda name: collections[name])
+    monkeypatch.setattr(conversations, "build_message_history", no_history)
+    monkeypatch.setattr(conversations, "ensure_conversation_flushed", no_flush)
+    monkeypatch.setattr(conversations, "record_message", lambda *args: None)
+
+    async def run(conv_id, turns):
+        return await asyncio.gather(*(
+            conversations._prepare_chat_turn(str(conv_id), f"질문 {i}", str(user_id)) for i in range(turns)
+        ))
+
+    legacy_turns = asyncio.run(run(legacy_id, 3))
+    assert sorted(turn["bot_message_order"] for turn in legacy_turns) == [7, 9, 11]
+    assert convs.docs[legacy_id]["message_count"] == 12
+
+    counted_turns = asyncio.run(run(counted_id, 2))
+    assert sorted(turn["bot_message_order"] for turn in counted_turns) == [3, 5]
+
+    user_orders = [msg["order"] for msg in messages.docs if msg["conversation_id"] == legacy_id][4:]
+    assert sorted(user_orders) == [6, 8, 10]
+    print("✅ 동시 요청 메시지 순서 예약 확인 완료")
+
+
+def test_backfill_message_count_migration():
+    """백필 마이그레이션이 최대 order + 1로 카운터를 채우고 기존 카운터는 건드리지 않는지 확인"""
+    import asyncio
+    from bson import ObjectId
+    from database import Collections
+    from migrations.backfill_message_count import migrate
+
+    with_messages, empty, counted = ObjectId(), ObjectId(), ObjectId()
+    convs = _FakeConversations([
+        {"_id": with_messages},
+        {"_id": empty},
+        {"_id": counted, "message_count": 10},
+    ])
+    messages = _FakeMessages([
+        {"conversation_id": with_messages, "order": order} for order in (0, 1, 4, 5)
+    ] + [{"conversation_id": counted, "order": 0}])
+    db = {Collections.CONVERSATIONS: convs, Collections.MESSAGES: messages}
+
+    assert asyncio.run(migrate(db)) == 2
+    assert convs.docs[with_messages]["message_count"] == 6
+    assert convs.docs[empty]["message_count"] == 0
+    assert convs.docs[counted]["message_count"] == 10
+
+    assert asyncio.run(migrate(db)) == 0
+    print("✅ message_count 백필 마이그레이션 확인 완료")
+
+
+def test_index_drift_report():
+    """선언된 인덱스와 실제 인덱스의 차이(누락, 옵션 불일치, 선언 외 인덱스)를 보고하는지 확인"""
+    from migrations.indexes import IndexSpec, diff_indexes
+
+    specs = [
+        IndexSpec("users", [("email", 1)], "email_unique", {"unique": True}),
+        IndexSpec("email_verifications", [("expires_at", 1)], "expires_at_ttl", {"expireAfterSeconds": 60}),
+        IndexSpec("messages", [("conversation_id", 1), ("order", 1)], "conversation_order"),
+    ]
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "email_1": {"key": [("email", 1)], "unique": True},  # 이름만 다름 -> 만족
+        "expires_at_1": {"key": [("expires_at", 1)], "expireAfterSeconds": 3600},
+        "legacy_title_1": {"key": [("title", 1)]},
+    }
+
+    diff = diff_indexes(specs, existing)
+    assert [item["name"] for item in diff["missing"]] == ["conversation_order"]
+    assert diff["mismatched"] == [{
+        "name": "expires_at_ttl",
+        "actual_name": "expires_at_1",
+        "options": {"expireAfterSeconds": (60, 3600)}
+    }]
+    assert diff["unexpected"] == [{"name": "legacy_title_1", "keys": [("title", 1)]}]
+    print("✅ 인덱스 drift 보고 확인 완료")
+
+
+def test_conversation_cursor_roundtrip():
+    """대화 목록 커서가 (updated_at, _id)를 밀리초 단위로 보존하고 잘못된 커서는 400인지 확인"""
+    from datetime import datetime
+    from bson import ObjectId
+    from fastapi import HTTPException
+    from routers.conversations import (
+        _encode_conversation_cursor, _decode_conversation_cursor, _conversation_keyset_filter
+    )
+
+    conversation = {"_id": ObjectId(), "updated_at": datetime(2025, 3, 2, 9, 30, 15, 123000)}
+    cursor = _encode_conversation_cursor(conversation)
+    assert _decode_conversation_cursor(cursor) == (conversation["updated_at"], conversation["_id"])
+
+    older = _conversation_keyset_filter(cursor, newer=False)
+    assert older["$or"][0] == {"updated_at": {"$lt": conversation["updated_at"]}}
+    assert older["$or"][1] == {"updated_at": conversation["updated_at"], "_id": {"$lt": conversation["_id"]}}
+
+    try:
+        _decode_conversation_cursor("not-a-cursor")
+        assert False, "잘못된 커서가 허용됨"
+    except HTTPException as e:
+        assert e.status_code == 400
+    print("✅ 대화 목록 커서 확인 완료")
+
+
+def test_message_summary_view():
+    """summary 보기가 sources를 읽지 않고 잘린 content에 truncated를 표시하는지 확인"""
+    from datetime import datetime
+    from bson import ObjectId
+    from routers.conversations import _message_projection, _serialize_message
+
+    projection = _message_projection("summary")
+    assert "sources" not in projection
+    assert projection["content"]["$substrCP"][0] == "$content"
+    assert "sources" in _message_projection("full")
+
+    msg = {"_id": ObjectId(), "role": "assistant", "content": "미리보기", "content_length": 300,
+           "order": 3, "created_at": datetime(2025, 1, 1)}
+    item = _serialize_message(msg, "conv", "summary")
+    assert item["truncated"] is True and "sources" not in item
+
+    full = _serialize_message({**msg, "sources": [{"course": "A"}]}, "conv", "full")
+    assert full["sources"] == [{"course": "A"}] and "truncated" not in full
+    print("✅ 메시지 요약 보기 확인 완료")
+
+
+def test_history_cache_write_through():
+    """최근 메시지 캐시가 이어지는 기록만 사용하고, 다른 워커의 쓰기(카운터 불일치)에는 Mongo로 대체하는지 확인"""
+    from services.history_cache import HistoryCache
+
+    cache = HistoryCache(max_conversations=2, messages_per_conversation=4)
+    conv = "conv-1"
+
+    # 새 대화: Mongo 조회 결과(없음)로 채운 뒤 턴마다 기록
+    assert cache.get(conv, next_order=0, after_order=-1, limit=4) is None
+    cache.seed(conv, [], after_order=-1, complete=True)
+    cache.append(conv, 0, "user", "질문1")
+    cache.append(conv, 1, "assistant", "답변1")
+    assert cache.get(conv, next_order=2, after_order=-1, limit=4) == [
+        {"role": "user", "content": "질문1"}, {"role": "assistant", "content": "답변1"}
+    ]
+
+    # 다른 워커가 2, 3번 메시지를 저장함 -> 예약 카운터와 불일치하므로 사용하지 않음
+    assert cache.get(conv, next_order=4, after_order=-1, limit=4) is None
+
+    # 링 버퍼에서 밀려난 구간이 필요하면 사용하지 않음
+    for order in range(2, 7):
+        cache.append(conv, order, "user", f"메시지{order}")
+    assert len(cache.get(conv, next_order=7, after_order=-1, limit=4)) == 4
+    assert cache.get(conv, next_order=7, after_order=-1, limit=5) is None
+
+    # 순서가 건너뛰면 항목 제거, 삭제 시 제거
+    cache.append(conv, 9, "user", "건너뜀")
+    assert cache.get(conv, next_order=10, after_order=-1, limit=4) is None
+    cache.seed(conv, [{"order": 9, "role": "user", "content": "x"}], after_order=8, complete=True)
+    cache.invalidate(conv)
+    assert cache.stats()["conversations"] == 0
+    print("✅ 최근 메시지 캐시 확인 완료")
+
+
+def test_jwt_cache_and_revocation(monkeypatch):
+    """검증된 토큰은 두 번째 요청부터 jwt.decode 없이 처리되고, 사용자 폐기 후에는 (다른 워커 포함) 거부되는지 확인"""
+    import asyncio
+    import time
+    import auth_utils
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+    from services.token_cache import VerifiedTokenCache
+
+    cache = VerifiedTokenCache(max_entries=10, revocation_check_seconds=60)
+    monkeypatch.setattr(auth_utils, "get_token_cache", lambda: cache)
+
+    persisted = {}  # 사용자 문서의 tokens_valid_after (워커 간 공유)
+    revocation_reads = []
+
+    async def fake_load_tokens_valid_after(user_id):
+        revocation_reads.append(user_id)
+        return persisted.get(user_id)
+
+    monkeypatch.setattr(auth_utils, "_load_tokens_valid_after", fake_load_tokens_valid_after)
+
+    decode_calls = []
+    original_decode = auth_utils.decode_access_token
+    monkeypatch.setattr(auth_utils, "decode_access_token", lambda token: decode_calls.append(token) or original_decode(token))
+
+    token = auth_utils.create_access_token({"sub": "user-1"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    assert asyncio.run(auth_utils.get_current_user(credentials)) == "user-1"
+    assert asyncio.run(auth_utils.get_current_user(credentials)) == "user-1"
+    assert len(decode_calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert revocation_reads == ["user-1"]  # 확인 주기 안에서는 다시 읽지 않음
+
+    # 다른 워커에서 폐기: 확인 주기가 지나면 영구 기록을 읽어 캐시 적중 토큰도 거부
+    persisted["user-1"] = int(time.time()) + 1
+    assert asyncio.run(auth_utils.get_current_user(credentials)) == "user-1"
+    cache._revocation_checked["user-1"] -= 60
+    try:
+        asyncio.run(auth_utils.get_current_user(credentials))
+        assert False, "다른 워커에서 폐기된 토큰이 허용됨"
+    except HTTPException as e:
+        assert e.status_code == 401
+    assert revocation_reads == ["user-1", "user-1"]
+
+    # 이 워커에서 폐기 (새 캐시로 다시 시작, get_token_cache가 새 캐시를 반환)
+    cache = VerifiedTokenCache(max_entries=10, revocation_check_seconds=60)
+    persisted.clear()
+    assert asyncio.run(auth_utils.get_current_user(credentials)) == "user-1"
+
+    # 폐기 기준 시각보다 이전에 발급된 토큰으로 가정
+    cache.revoke_user("user-1")
+    cache._revoked_before["user-1"] += 1
+    try:
+        asyncio.run(auth_utils.get_current_user(credentials))
+        assert False, "폐기된 토큰이 허용됨"
+    except HTTPException as e:
+        assert e.status_code == 401
+    print("✅ JWT 캐시 / 폐기 확인 완료")
+
+
+def test_password_hasher_pool_and_rehash(monkeypatch):
+    """bcrypt가 전용 스레드 풀에서 실행되고, 비용 변경 시 재해싱 대상으로 판단되는지 확인"""
+    import asyncio
+    import threading
+    import auth_utils
+    from services.password_hasher import PasswordHasher
+
+    monkeypatch.setattr(auth_utils.settings, "BCRYPT_ROUNDS", 4)
+    hasher = PasswordHasher(workers=1)
+    threads = []
+    original_verify = auth_utils.bcrypt.checkpw
+    monkeypatch.setattr(auth_utils.bcrypt, "checkpw", lambda *args: threads.append(threading.current_thread().name) or original_verify(*args))
+
+    async def scenario():
+        hashed = await hasher.hash("password1!")
+        results = await asyncio.gather(*[hasher.verify("password1!", hashed) for _ in range(3)])
+        return hashed, results
+
+    hashed, results = asyncio.run(scenario())
+    assert hashed.startswith("$2b$04$") and all(results)
+    assert all(name.startswith("bcrypt") for name in threads)
+    stats = hasher.stats()
+    assert stats["completed"] == 4 and stats["max_queue_depth"] >= 1
+
+    assert not auth_utils.password_needs_rehash(hashed)
+    monkeypatch.setattr(auth_utils.settings, "BCRYPT_ROUNDS", 12)
+    assert auth_utils.password_needs_rehash(hashed)
+    print("✅ bcrypt 스레드 풀 / 재해싱 확인 완료")
+
+
+def test_login_rate_limit_retry_after(monkeypatch):
+    """로그인 요청이 이메일별 버킷을 넘으면 DB 조회 / bcrypt 전에 429 + Retry-After로 거절되는지 확인"""
+    from fastapi.testclient import TestClient
+    from config import settings
+    from main import app
+    from services import rate_limiter
+    from services.rate_limiter import InMemoryRateLimitStore, RateLimiter
+
+    limiter = RateLimiter(InMemoryRateLimitStore(), {"login": {"ip": "100/60", "email": "2/60"}})
+    monkeypatch.setattr(rate_limiter, "get_rate_limiter", lambda: limiter)
+
+    db_calls = []
+
+    def get_collection(name):
+        db_calls.append(name)
+        raise RuntimeError("DB 없음")
+
+    monkeypatch.setattr("routers.auth.db_instance.get_collection", get_collection)
+
+    client = TestClient(app)
+    url = f"{settings.API_PREFIX}/auth/login"
+    body = {"email": "student@bu.ac.kr", "password": "wrong-password"}
+
+    statuses = [client.post(url, json=body).status_code for _ in range(2)]
+    assert statuses == [500, 500]  # 제한 안쪽: 엔드포인트 실행 (테스트에서는 DB 없음)
+
+    response = client.post(url, json=body)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    assert len(db_calls) == 2
+
+    # 다른 이메일은 영향 없음
+    assert client.post(url, json={**body, "email": "other@bu.ac.kr"}).status_code == 500
+    assert limiter.stats()["rejected"] == {"login:email": 1}
+
+    # 동시 요청에서도 버킷과 통계가 어긋나지 않음
+    import asyncio
+    limiter = RateLimiter(InMemoryRateLimitStore(), {"login": {"email": "2/60"}})
+
+    async def burst():
+        return await asyncio.gather(*(limiter.check("login", "1.2.3.4", "burst@bu.ac.kr") for _ in range(10)))
+
+    results = asyncio.run(burst())
+    assert sum(1 for retry_after in results if retry_after == 0) == 2
+    assert limiter.stats()["allowed"] == 2 and limiter.stats()["rejected"] == {"login:email": 8}
+    print("✅ 로그인 요청 제한 확인 완료")
+
+
+def test_client_ip_ignores_spoofed_forwarded_for(monkeypatch):
+    """X-Forwarded-For는 신뢰하는 프록시 수만큼 오른쪽에서 읽고, 저장소 인터페이스는 추상 클래스인지 확인"""
+    from starlette.requests import Request
+    from services import rate_limiter
+
+    def make_request(forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "headers": headers, "client": ("10.0.0.5", 12345)})
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_PROXY_HOPS", 0)
+    assert rate_limiter.client_ip(make_request("1.2.3.4")) == "10.0.0.5"
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_PROXY_HOPS", 1)
+    assert rate_limiter.client_ip(make_request("6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+    assert rate_limiter.client_ip(make_request()) == "10.0.0.5"
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_PROXY_HOPS", 2)
+    assert rate_limiter.client_ip(make_request("6.6.6.6, 203.0.113.7, 172.16.0.2")) == "203.0.113.7"
+    assert rate_limiter.client_ip(make_request("203.0.113.7")) == "10.0.0.5"
+
+    import pytest
+    with pytest.raises(TypeError):
+        rate_limiter.RateLimitStore()
+    print("✅ 클라이언트 IP 판별 확인 완료")
+
+
+def test_mail_queue_reuses_smtp_connection(monkeypatch):
+    """메일 큐 워커가 SMTP 연결을 재사용하고, 연결이 끊기면 다시 연결해 재시도하는지 확인"""
+    import asyncio
+    import aiosmtplib
+    from email.message import EmailMessage
+    from services.background_queue import BackgroundQueue
+    from services.mail_dispatcher import SmtpMailer
+
+    events = []
+
+    class FakeSMTP:
+        def __init__(self, **kwargs):
+            self.is_connected = False
+
+        async def connect(self):
+            self.is_connected = True
+            events.append("connect")
+
+        async def login(self, username, password):
+            events.append("login")
+
+        async def send_message(self, message):
+            if message["Subject"] == "끊김" and "dropped" not in events:
+                events.append("dropped")
+                self.is_connected = False
+                raise aiosmtplib.SMTPServerDisconnected("연결 끊김")
+            events.append(f"send:{message['Subject']}")
+
+        async def quit(self):
+            self.is_connected = False
+
+    monkeypatch.setattr(aiosmtplib, "SMTP", FakeSMTP)
+    mailer = SmtpMailer("smtp.test", 587, "bot@bu.ac.kr", "secret")
+    queue = BackgroundQueue(name="메일 테스트", concurrency=1, max_retries=2)
+
+    def message(subject):
+        msg = EmailMessage()
+        msg["To"], msg["Subject"] = "student@bu.ac.kr", subject
+        return msg
+
+    async def scenario():
+        for subject in ["a", "b", "끊김", "c"]:
+            msg = message(subject)
+            queue.enqueue(subject, lambda msg=msg: mailer.send(msg))
+        await queue.drain(timeout=10)
+
+    asyncio.run(scenario())
+    assert events == ["connect", "login", "send:a", "send:b", "dropped", "connect", "login", "send:끊김", "send:c"]
+    assert mailer.stats()["connects"] == 2 and queue.stats()["retries"] == 1
+    print("✅ 메일 큐 SMTP 연결 재사용 확인 완료")
+
+
 if __name__ == "__main__":
     """직접 실행 시 모든 테스트 실행"""
     print("=" * 50)
@@ -155,6 +1609,15 @@ if __name__ == "__main__":
         test_health_endpoint_structure,
         test_chat_request_model,
         test_chat_response_model,
+        test_hyperclova_chat_stream,
+        test_hybrid_lexical_fusion,
+        test_gazetteer_metadata_filter,
+        test_reranker_budget_fallback,
+        test_context_packer,
+        test_memory_summary_in_system_prompt,
+        test_pinecone_async_http_query,
+        test_single_flight_coalescing,
+        test_background_queue_retry_and_drain,
     ]
     
     passed = 0
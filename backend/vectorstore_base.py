@@ -0,0 +1,394 @@
+"""
+벡터 스토어 서비스 공통 인터페이스 (비동기)
+
+임베딩 모델 로딩, 쿼리 임베딩 캐시, 마이크로 배칭, similarity_search 흐름은 여기서 공통으로 처리하고,
+백엔드(Pinecone, FAISS 등)는 _initialize_backend / _search_vectors / is_ready만 구현합니다.
+"""
+
+import re
+import logging
+import asyncio
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+# HuggingFace 임베딩 모델 사용 (한국어 특화)
+try:
+    from langchain_huggingface import HuggingFaceEmbeddings
+except ImportError:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from pathlib import Path
+
+from config import settings
+from services.lexical_index import BM25Index, load_lexical_index, reciprocal_rank_fusion
+from services.gazetteer import Gazetteer, MetadataFilter, load_gazetteer
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """임베딩 캐시 키용 쿼리 정규화 (유니코드 NFC, 공백 정리)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", query)).strip()
+
+
+class EmbeddingCache:
+    """쿼리 임베딩 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_size: int = 2048):
+        """
+        Args:
+            max_size: 최대 항목 수 (0이면 캐시 비활성화)
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """캐시 조회 (적중 시 최근 사용으로 갱신)"""
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        """캐시 저장 (용량 초과 시 가장 오래된 항목 제거)"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 통계"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+class EmbeddingBatcher:
+    """
+    동시 임베딩 요청 마이크로 배칭
+
+    요청을 큐에 모아 최대 max_wait_ms 동안 (또는 max_batch_size까지) 기다린 뒤
+    embed_documents 한 번으로 처리하고 각 호출자에게 자신의 벡터를 돌려줍니다.
+    배치는 한 번에 하나씩 실행되므로 트랜스포머가 torch 스레드를 두고 경쟁하지 않으며,
+    배치가 도는 동안 들어온 요청은 다음 배치로 자연스럽게 모입니다.
+    """
+
+    def __init__(self, embed_documents, executor: ThreadPoolExecutor, max_batch_size: int = 16, max_wait_ms: float = 5):
+        """
+        Args:
+            embed_documents: 텍스트 리스트를 임베딩 리스트로 변환하는 동기 함수
+            executor: 배치를 실행할 스레드 풀
+            max_batch_size: 최대 배치 크기
+            max_wait_ms: 첫 요청 후 배치를 모으는 최대 대기 시간 (밀리초)
+        """
+        self._embed_documents = embed_documents
+        self._executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """현재 이벤트 루프에서 배치 워커 시작 (최초 1회 또는 루프 변경 시)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def embed(self, text: str) -> List[float]:
+        """단일 텍스트 임베딩 (배치에 합류)"""
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((text, future))
+        return await future
+
+    async def _run(self):
+        """배치 워커 루프"""
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            if self.max_wait > 0 and queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            # 취소된 요청 제외, 동일 텍스트는 한 번만 계산
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._embed_documents, unique_texts)
+            except Exception as e:
+                logger.error(f"배치 임베딩 실패 (배치 크기: {len(unique_texts)}): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            by_text = dict(zip(unique_texts, vectors))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_observed_batch = max(self.max_observed_batch, len(unique_texts))
+
+    def stats(self) -> Dict[str, Any]:
+        """배칭 통계"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_observed_batch,
+            "queued": self._queue.qsize() if self._queue else 0
+        }
+
+
+class BaseVectorStoreService(ABC):
+    """벡터 스토어 서비스 인터페이스 (비동기)"""
+
+    # 백엔드 이름 (헬스 체크/메트릭 표시용)
+    backend_name: str = ""
+
+    def __init__(self):
+        """서비스 초기화"""
+        self.embeddings = None
+        self._executor = ThreadPoolExecutor(max_workers=4)  # I/O 및 CPU 바운드 작업을 위한 스레드 풀
+        self.embedding_cache = EmbeddingCache(max_size=settings.EMBEDDING_CACHE_SIZE)
+        self._batcher: Optional[EmbeddingBatcher] = None
+        self.lexical_index: Optional[BM25Index] = None
+        self.gazetteer: Optional[Gazetteer] = None
+        self.filtered_searches = 0
+        self.filter_fallbacks = 0
+        self._search_flight = SingleFlight("벡터 검색")
+        self._initialize()
+
+    def _initialize(self):
+        """벡터 스토어 초기화"""
+        try:
+            # 임베딩 모델 초기화
+            self.embeddings = HuggingFaceEmbeddings(
+                model_name="jhgan/ko-sroberta-multitask",
+                model_kwargs={'device': 'cpu'},
+                encode_kwargs={'normalize_embeddings': True}
+            )
+            logger.info("임베딩 모델 초기화 완료")
+
+            # 동시 임베딩 요청 마이크로 배칭
+            if settings.EMBEDDING_BATCH_ENABLED:
+                self._batcher = EmbeddingBatcher(
+                    self.embeddings.embed_documents,
+                    self._executor,
+                    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+                )
+
+            self._initialize_backend()
+
+            # 하이브리드 검색용 BM25 어휘 색인 (벡터화 스크립트가 저장한 청크 사용)
+            if settings.HYBRID_SEARCH_ENABLED:
+                self.lexical_index = load_lexical_index(Path(settings.LEXICAL_CORPUS_PATH))
+
+            # 교수명/과목명 메타데이터 필터용 사전
+            if settings.GAZETTEER_ENABLED:
+                self.gazetteer = load_gazetteer(Path(settings.VECTORSTORE_STATS_PATH))
+
+        except Exception as e:
+            logger.error(f"벡터 스토어 초기화 실패: {e}")
+            raise
+
+    @abstractmethod
+    def _initialize_backend(self):
+        """백엔드별 인덱스/클라이언트 초기화"""
+
+    @abstractmethod
+    def is_ready(self) -> bool:
+        """검색 가능한 상태인지 여부"""
+
+    @abstractmethod
+    async def _search_vectors(
+        self,
+        query_embedding: List[float],
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        임베딩으로 상위 k개 문서 검색
+
+        Args:
+            query_embedding: 쿼리 임베딩
+            k: 반환할 결과 수
+            metadata_filter: 메타데이터 필터 (필드 간 AND, 값 목록 안에서는 OR)
+
+        Returns:
+            [{"id": str, "page_content": str, "metadata": dict}, ...]
+        """
+
+    def describe(self) -> Dict[str, Any]:
+        """헬스 체크용 백엔드 정보"""
+        return {}
+
+    async def _embed_query_async(self, query: str) -> List[float]:
+        """임베딩 생성 (캐시 적중 시 즉시 반환, 미스 시 CPU 바운드 작업을 스레드 풀에서 실행)"""
+        key = normalize_query(query)
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self._batcher is not None:
+            embedding = await self._batcher.embed(key)
+        else:
+            loop = asyncio.get_event_loop()
+            embedding = await loop.run_in_executor(
+                self._executor,
+                self.embeddings.embed_query,
+                key
+            )
+        self.embedding_cache.put(key, embedding)
+        return embedding
+
+    async def embed_query(self, query: str) -> List[float]:
+        """쿼리 임베딩 생성 (검색/의도 분류에서 재사용)"""
+        return await self._embed_query_async(query)
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트 임베딩을 한 번에 생성 (스레드 풀에서 실행)"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            self.embeddings.embed_documents,
+            texts
+        )
+
+    async def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        유사도 검색 수행 (비동기)
+
+        Args:
+            query: 검색 쿼리
+            k: 반환할 결과 수
+            query_embedding: 미리 계산한 쿼리 임베딩 (선택, 있으면 임베딩 생략)
+
+        Returns:
+            검색 결과 리스트
+
+        같은 (정규화 쿼리, k) 검색이 진행 중이면 새로 검색하지 않고 그 결과를 공유합니다.
+        기다리던 요청이 모두 취소되면 (추측 실행 검색 취소 등) 진행 중인 검색도 취소됩니다.
+        """
+        documents = await self._search_flight.do(
+            (normalize_query(query), k),
+            lambda: self._similarity_search(query, k, query_embedding)
+        )
+        return list(documents)
+
+    async def _similarity_search(
+        self,
+        query: str,
+        k: int,
+        query_embedding: Optional[List[float]]
+    ) -> List[Dict[str, Any]]:
+        """임베딩 → (메타데이터 필터) → 검색 (실패 시 빈 리스트)"""
+        try:
+            if not self.is_ready():
+                raise ValueError(f"{self.backend_name} 벡터 스토어가 초기화되지 않았습니다.")
+
+            # 쿼리를 벡터로 변환 (비동기 - 스레드 풀 사용)
+            if query_embedding is None:
+                query_embedding = await self._embed_query_async(query)
+
+            # 질문에 교수명/과목명이 있으면 해당 문서로 검색 범위 제한
+            metadata_filter = self.gazetteer.match(query) if self.gazetteer else None
+            if metadata_filter:
+                self.filtered_searches += 1
+                logger.info(f"메타데이터 필터 적용: {metadata_filter}")
+
+            documents = await self._retrieve(query, query_embedding, k, metadata_filter)
+            if not documents and metadata_filter:
+                # 사전 매칭이 잘못된 경우를 대비해 필터 없이 재검색
+                self.filter_fallbacks += 1
+                documents = await self._retrieve(query, query_embedding, k, None)
+
+            logger.info(f"검색 완료: {len(documents)}개 결과")
+            return documents
+
+        except Exception as e:
+            logger.error(f"검색 실패: {e}")
+            return []
+
+    async def _retrieve(
+        self,
+        query: str,
+        query_embedding: List[float],
+        k: int,
+        metadata_filter: Optional[MetadataFilter]
+    ) -> List[Dict[str, Any]]:
+        """밀집 검색 (어휘 색인이 있으면 BM25와 RRF 융합)"""
+        if self.lexical_index is None:
+            return await self._search_vectors(query_embedding, k, metadata_filter)
+
+        # 하이브리드: 밀집/BM25 후보를 넓게 가져와 RRF로 융합 후 상위 k개
+        candidates = max(k, settings.HYBRID_CANDIDATES)
+        dense_results = await self._search_vectors(query_embedding, candidates, metadata_filter)
+        lexical_results = self.lexical_index.search_documents(query, candidates, metadata_filter)
+        return reciprocal_rank_fusion(
+            [dense_results, lexical_results],
+            k=k,
+            rrf_k=settings.HYBRID_RRF_K
+        )
+
+    async def get_relevant_documents(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
+        """LangChain 호환 메서드 (비동기)"""
+        return await self.similarity_search(query, k)
+
+    async def close(self):
+        """백엔드 리소스 정리 (앱 종료 시)"""
+
+    def metrics(self) -> Dict[str, Any]:
+        """서비스 통계"""
+        return {
+            "backend": self.backend_name,
+            "embedding_cache": self.embedding_cache.stats(),
+            "embedding_batcher": self._batcher.stats() if self._batcher else None,
+            "lexical_documents": len(self.lexical_index) if self.lexical_index else 0,
+            "gazetteer_patterns": self.gazetteer.size if self.gazetteer else 0,
+            "filtered_searches": self.filtered_searches,
+            "filter_fallbacks": self.filter_fallbacks,
+            "search_single_flight": self._search_flight.stats()
+        }
@@ -20,6 +20,26 @@ function generateMessageId() {
   return `msg_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
 }
 
+// 선택한 채팅방의 새 메시지 확인 주기 (since_order 증분 조회)
+const MESSAGE_POLL_INTERVAL_MS = 10000;
+
+// 백엔드 메시지 형식을 프론트엔드 형식으로 변환
+function formatMessage(msg, index) {
+  return {
+    id: msg.id || `msg_${index}`,
+    order: msg.order,
+    from: msg.role === 'user' ? 'user' : 'bot',
+    text: msg.content || '',
+    sources: msg.sources || [],
+    ts: new Date(msg.created_at).getTime() || Date.now()
+  };
+}
+
+// 불러온 메시지 중 마지막 order (없으면 -1)
+function lastOrderOf(messages) {
+  return messages.reduce((max, m) => (typeof m.order === 'number' && m.order > max ? m.order : max), -1);
+}
+
 function makeDefaultSession() {
   return {
     id: Date.now(),
@@ -32,14 +52,19 @@ function makeDefaultSession() {
 
 function MainApp() {
   const navigate = useNavigate();
-  // 채팅방 목록 상태
+  // 채팅방 목록 상태 (첫 페이지만 불러오고 나머지는 "더 보기"로 이어서 조회)
   const [conversations, setConversations] = useState([]);
+  const [conversationsCursor, setConversationsCursor] = useState(null);
+  const [hasMoreConversations, setHasMoreConversations] = useState(false);
+  const [loadingMoreConversations, setLoadingMoreConversations] = useState(false);
+  const olderConversationsLoadedRef = useRef(false);
   // 현재 선택된 채팅방 ID
   const [currentConversationId, setCurrentConversationId] = useState(null);
   // 상태 관리 - 채팅방별 메시지 저장
   const [sessions, setSessions] = useState(() => {
     return [];
   });
+  const sessionsRef = useRef(sessions);
   const [currentSessionIdx, setCurrentSessionIdx] = useState(0);
   const currentSessionIdxRef = useRef(currentSessionIdx);
   const [sidebarOpen, setSidebarOpen] = useState(false);
@@ -54,6 +79,10 @@ function MainApp() {
   const [loadingMessage, setLoadingMessage] = useState('');
   const [showFindPassword, setShowFindPassword] = useState(false);
 
+  useEffect(() => {
+    sessionsRef.current = sessions;
+  }, [sessions]);
+
   // 로그인 시 채팅방 목록 로드
   useEffect(() => {
     const isLoggedIn = (!!localStorage.getItem('authToken') && !!localStorage.getItem('access_token')) || !!user;
@@ -62,14 +91,22 @@ function MainApp() {
     }
   }, [user]);
 
-  // 채팅방 목록 로드 함수
+  // 채팅방 목록 로드 함수 (첫 페이지만, 이미 불러온 이전 페이지는 유지)
   const loadConversations = async () => {
     try {
-      const convs = await getConversations();
-      setConversations(convs || []);
+      const page = await getConversations();
+      const convs = page.conversations;
+      setConversations(prev => {
+        const firstPageIds = new Set(convs.map(c => c.id));
+        return [...convs, ...prev.filter(c => !firstPageIds.has(c.id))];
+      });
+      if (!olderConversationsLoadedRef.current) {
+        setConversationsCursor(page.cursors.before || null);
+        setHasMoreConversations(page.hasMore);
+      }
       
       // 첫 번째 채팅방이 있으면 자동으로 로드
-      if (convs && convs.length > 0 && !currentConversationId) {
+      if (convs.length > 0 && !currentConversationId) {
         await loadConversationMessages(convs[0].id);
       }
     } catch (error) {
@@ -77,23 +114,104 @@ function MainApp() {
     }
   };
 
-  // 특정 채팅방의 메시지 로드
+  // 채팅방 목록 다음(더 오래된) 페이지 로드
+  const loadMoreConversations = async () => {
+    if (!hasMoreConversations || loadingMoreConversations || !conversationsCursor) return;
+    try {
+      setLoadingMoreConversations(true);
+      const page = await getConversations({ before: conversationsCursor });
+      olderConversationsLoadedRef.current = true;
+      setConversations(prev => {
+        const loadedIds = new Set(prev.map(c => c.id));
+        return [...prev, ...page.conversations.filter(c => !loadedIds.has(c.id))];
+      });
+      setConversationsCursor(page.cursors.before || conversationsCursor);
+      setHasMoreConversations(page.hasMore);
+    } catch (error) {
+      console.error('채팅방 목록 추가 로드 실패:', error);
+    } finally {
+      setLoadingMoreConversations(false);
+    }
+  };
+
+  // 특정 채팅방 세션 상태 갱신
+  const updateSession = (conversationId, update) => {
+    setSessions(prev => prev.map(s => (s.conversationId === conversationId ? { ...s, ...update(s) } : s)));
+  };
+
+  // 이전 메시지 페이지 로드 (메시지 목록을 위로 스크롤하거나 "이전 메시지 더 보기" 클릭 시)
+  const loadOlderMessages = async (conversationId) => {
+    const session = sessionsRef.current.find(s => s.conversationId === conversationId);
+    if (!session || !session.hasMore || session.loadingOlder || session.oldestOrder === null) return;
+    try {
+      updateSession(conversationId, () => ({ loadingOlder: true }));
+      const data = await getMessages(conversationId, { before: session.oldestOrder });
+      const older = (data.messages || []).map(formatMessage);
+      updateSession(conversationId, s => ({
+        messages: [...older, ...s.messages],
+        oldestOrder: older.length > 0 ? older[0].order : s.oldestOrder,
+        hasMore: !!data.has_more && older.length > 0,
+        loadingOlder: false
+      }));
+    } catch (error) {
+      console.error('이전 메시지 로드 실패:', error);
+      updateSession(conversationId, () => ({ loadingOlder: false }));
+    }
+  };
+
+  // 새 메시지만 조회해 붙이기 (since_order 증분 조회)
+  // 전송 중 임시로 추가한 메시지(pending)는 서버에 저장된 메시지가 오면 그것으로 교체 (전송 중에는 주기적 확인을 건너뜀)
+  const syncNewMessages = async (conversationId) => {
+    const session = sessionsRef.current.find(s => s.conversationId === conversationId);
+    if (!session) return;
+    try {
+      const data = await getMessages(conversationId, { sinceOrder: session.lastOrder });
+      const fetched = (data.messages || []).map(formatMessage);
+      if (fetched.length === 0) return;
+      updateSession(conversationId, s => {
+        const known = s.messages.filter(m => !m.pending);
+        const lastOrder = lastOrderOf(known);
+        const merged = [...known, ...fetched.filter(m => m.order > lastOrder)];
+        return { messages: merged, lastOrder: lastOrderOf(merged) };
+      });
+    } catch (error) {
+      console.error('새 메시지 확인 실패:', error);
+    }
+  };
+
+  // 선택한 채팅방의 새 메시지 주기적 확인 (다른 탭/기기에서 보낸 메시지 반영, 전송 중에는 건너뜀)
+  useEffect(() => {
+    if (!currentConversationId) return undefined;
+    const timer = setInterval(() => {
+      if (document.visibilityState === 'visible' && !isLoading) {
+        syncNewMessages(currentConversationId);
+      }
+    }, MESSAGE_POLL_INTERVAL_MS);
+    return () => clearInterval(timer);
+  }, [currentConversationId, isLoading]);
+
+  // 특정 채팅방의 메시지 로드 (최근 페이지만, 이미 불러온 채팅방은 새 메시지만 확인)
   const loadConversationMessages = async (conversationId) => {
+    const existing = sessionsRef.current.find(s => s.conversationId === conversationId);
+    if (existing) {
+      const sessionIdx = sessionsRef.current.indexOf(existing);
+      setCurrentSessionIdx(sessionIdx >= 0 ? sessionIdx : 0);
+      setCurrentConversationId(conversationId);
+      await syncNewMessages(conversationId);
+      return;
+    }
+
     try {
       setIsLoading(true);
       setLoadingMessage('메시지를 불러오는 중...');
       
       const messagesData = await getMessages(conversationId);
-      const messages = messagesData.messages || messagesData || [];
+      const messages = messagesData.messages || [];
       
       // 백엔드 메시지 형식을 프론트엔드 형식으로 변환
-      const formattedMessages = messages.map((msg, index) => ({
-        id: msg.id || `msg_${index}`,
-        from: msg.role === 'user' ? 'user' : 'bot',
-        text: msg.content || '',
-        sources: msg.sources || [],
-        ts: new Date(msg.created_at).getTime() || Date.now()
-      }));
+      const formattedMessages = messages.map(formatMessage);
+      const oldestOrder = formattedMessages.length > 0 ? formattedMessages[0].order : null;
+      const lastOrder = lastOrderOf(formattedMessages);
       
       // 환영 메시지가 없으면 추가
       if (formattedMessages.length === 0) {
@@ -112,7 +230,11 @@ function MainApp() {
           id: conversationId,
           conversationId: conversationId,
           messages: formattedMessages,
-          created: Date.now()
+          created: Date.now(),
+          hasMore: !!messagesData.has_more,
+          oldestOrder,
+          lastOrder,
+          loadingOlder: false
         };
         
         let newSessions;
@@ -244,7 +366,8 @@ function MainApp() {
         id: generateMessageId(),
         from: 'user',
         text: text.trim(),
-        ts: Date.now()
+        ts: Date.now(),
+        pending: true
       };
 
       const currentSession = sessions.find(s => s.conversationId === conversationId);
@@ -255,6 +378,11 @@ function MainApp() {
       setSessions(prev => {
         const existingIdx = prev.findIndex(s => s.conversationId === conversationId);
         const updatedSession = {
+          hasMore: false,
+          oldestOrder: null,
+          lastOrder: -1,
+          loadingOlder: false,
+          ...currentSession,
           id: conversationId,
           conversationId: conversationId,
           messages: updatedMessages,
@@ -279,7 +407,8 @@ function MainApp() {
         from: 'bot',
         text: response.answer || response.data?.answer || '응답을 받지 못했습니다.',
         sources: response.sources || response.data?.sources || [],
-        ts: Date.now()
+        ts: Date.now(),
+        pending: true
       };
 
       // 세션에 봇 메시지 추가
@@ -296,7 +425,10 @@ function MainApp() {
         return prev;
       });
 
-      // 채팅방 목록 새로고침 (updated_at 업데이트 반영)
+      // 임시 메시지를 서버에 저장된 메시지(order 포함)로 교체
+      await syncNewMessages(conversationId);
+
+      // 채팅방 목록 첫 페이지 새로고침 (updated_at 업데이트 반영)
       await loadConversations();
 
     } catch (error) {
@@ -308,13 +440,18 @@ function MainApp() {
     }
   };
 
+  const activeSession = sessions.find(s => s.conversationId === currentConversationId);
+
   // 챗봇 UI
   return (
     <div className="app-bg">
       <div className="app-center-box" style={sidebarOpen ? { paddingRight: 360 } : {}}>
         <Header title="수업 플래너 챗봇" />
         <ChatWindow
-          messages={pendingSession ? pendingSession.messages : (sessions.find(s => s.conversationId === currentConversationId)?.messages || [])}
+          messages={pendingSession ? pendingSession.messages : (activeSession?.messages || [])}
+          hasOlderMessages={!pendingSession && !!activeSession?.hasMore}
+          loadingOlderMessages={!!activeSession?.loadingOlder}
+          onLoadOlderMessages={() => loadOlderMessages(currentConversationId)}
           onSend={handleSendMessage}
           sidebarOpen={sidebarOpen}
         />
@@ -324,10 +461,16 @@ function MainApp() {
         conversations={conversations}
         currentConversationId={currentConversationId}
         onSelectConversation={loadConversationMessages}
+        hasMore={hasMoreConversations}
+        loadingMore={loadingMoreConversations}
+        onLoadMore={loadMoreConversations}
         onNewChat={handleNewChat}
         onLogout={() => {
           setUser(null);
           setConversations([]);
+          setConversationsCursor(null);
+          setHasMoreConversations(false);
+          olderConversationsLoadedRef.current = false;
           setCurrentConversationId(null);
           setSessions([]);
           localStorage.removeItem('authToken');
@@ -3,12 +3,17 @@ import './ChatWindow.css';
 import MessageList from '../MessageList/MessageList';
 import MessageInput from '../MessageInput/MessageInput';
 
-export default function ChatWindow({ messages, onSend, sidebarOpen }) {
+export default function ChatWindow({ messages, hasOlderMessages, loadingOlderMessages, onLoadOlderMessages, onSend, sidebarOpen }) {
   const chatWindowClass = sidebarOpen ? 'cb-chat-window sidebar-open' : 'cb-chat-window';
   
   return (
     <div className={chatWindowClass}>
-      <MessageList messages={messages} />
+      <MessageList
+        messages={messages}
+        hasMore={hasOlderMessages}
+        loadingOlder={loadingOlderMessages}
+        onLoadOlder={onLoadOlderMessages}
+      />
       <MessageInput onSend={onSend} sidebarOpen={sidebarOpen} />
     </div>
   );
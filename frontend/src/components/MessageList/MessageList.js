@@ -1,15 +1,49 @@
-import React, { useEffect, useRef } from 'react';
+import React, { useLayoutEffect, useRef } from 'react';
 import './MessageList.css';
 import MessageItem from '../MessageItem/MessageItem';
 
-export default function MessageList({ messages }) {
+// 맨 위에서 이 거리(px) 안으로 스크롤하면 이전 메시지를 불러옴
+const LOAD_OLDER_THRESHOLD_PX = 40;
+
+export default function MessageList({ messages, hasMore = false, loadingOlder = false, onLoadOlder }) {
   const ref = useRef();
-  useEffect(() => {
-    if (ref.current) ref.current.scrollTop = ref.current.scrollHeight;
+  const lastIdRef = useRef(null);
+  // 이전 메시지를 불러오기 직전의 "맨 아래로부터의 거리" (불러온 뒤 보던 위치 유지용)
+  const distanceFromBottomRef = useRef(null);
+
+  useLayoutEffect(() => {
+    const el = ref.current;
+    if (!el) return;
+    const lastId = messages.length > 0 ? messages[messages.length - 1].id : null;
+    if (distanceFromBottomRef.current !== null && lastId === lastIdRef.current) {
+      // 위에 이전 메시지가 붙은 경우: 보던 위치 유지
+      el.scrollTop = el.scrollHeight - distanceFromBottomRef.current;
+    } else {
+      el.scrollTop = el.scrollHeight;
+    }
+    distanceFromBottomRef.current = null;
+    lastIdRef.current = lastId;
   }, [messages]);
 
+  const loadOlder = () => {
+    if (!hasMore || loadingOlder || !onLoadOlder || !ref.current) return;
+    distanceFromBottomRef.current = ref.current.scrollHeight - ref.current.scrollTop;
+    onLoadOlder();
+  };
+
+  const handleScroll = () => {
+    if (ref.current && ref.current.scrollTop <= LOAD_OLDER_THRESHOLD_PX) {
+      loadOlder();
+    }
+  };
+
   return (
-    <div className="cb-message-list" ref={ref}>
+    <div className="cb-message-list" ref={ref} onScroll={handleScroll}>
+      {hasMore && (
+        <button className="cb-message-list__more" onClick={loadOlder} disabled={loadingOlder}>
+          {loadingOlder ? '불러오는 중...' : '이전 메시지 더 보기'}
+        </button>
+      )}
       {messages.map((m) => (
         <MessageItem key={m.id} message={m} />
       ))}
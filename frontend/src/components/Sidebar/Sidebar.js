@@ -1,7 +1,7 @@
 import React from 'react';
 import './Sidebar.css';
 
-export default function Sidebar({ open, conversations = [], currentConversationId, onSelectConversation, onNewChat, onLogout }) {
+export default function Sidebar({ open, conversations = [], currentConversationId, onSelectConversation, hasMore = false, loadingMore = false, onLoadMore, onNewChat, onLogout }) {
   return (
     <div className={`sidebar${open ? ' sidebar--open' : ''}`}> 
       <div className="sidebar__menu">
@@ -58,6 +58,11 @@ export default function Sidebar({ open, conversations = [], currentConversationI
               );
             })
           )}
+          {hasMore && (
+            <button className="sidebar__more-btn" onClick={onLoadMore} disabled={loadingMore}>
+              {loadingMore ? '불러오는 중...' : '이전 채팅 더 보기'}
+            </button>
+          )}
         </div>
       </div>
       
@@ -156,17 +156,23 @@ export const authAPI = {
   },
 };
 
-// 대화방 목록 조회
-export const getConversations = async () => {
+// 대화방 목록 한 페이지 조회 (최신순, before 커서를 주면 그보다 오래된 페이지)
+export const getConversations = async ({ before = null } = {}) => {
   const token = localStorage.getItem('access_token');
-  const response = await apiCall('/conversations', {
+  const query = before ? `?before=${encodeURIComponent(before)}` : '';
+  const response = await apiCall(`/conversations${query}`, {
     method: 'GET',
     headers: {
       Authorization: `Bearer ${token}`,
     },
   });
-  // 백엔드 응답 구조: { success: true, data: { conversations: [...], total: N } }
-  return response.data?.conversations || response.conversations || [];
+  // 백엔드 응답 구조: { success: true, data: { conversations: [...], total: N, has_more, cursors: { before, after } } }
+  const data = response.data || response;
+  return {
+    conversations: data.conversations || [],
+    hasMore: !!data.has_more,
+    cursors: data.cursors || {},
+  };
 };
 
 // 새 대화방 생성
@@ -184,16 +190,25 @@ export const createConversation = async (title) => {
   return response.data || response;
 };
 
-// 특정 대화방 메시지 조회
-export const getMessages = async (conversationId) => {
+// 특정 대화방 메시지 한 페이지 조회
+// - 기본: 가장 최근 페이지
+// - before: 이 order보다 이전 메시지 (위로 스크롤 시 더 보기)
+// - sinceOrder: 이 order 이후의 새 메시지만 (새 메시지가 없으면 서버가 메시지 조회를 생략)
+export const getMessages = async (conversationId, { before = null, sinceOrder = null } = {}) => {
   const token = localStorage.getItem('access_token');
-  const response = await apiCall(`/conversations/${conversationId}/messages`, {
+  let query = '';
+  if (before !== null) {
+    query = `?before=${before}`;
+  } else if (sinceOrder !== null) {
+    query = `?since_order=${sinceOrder}`;
+  }
+  const response = await apiCall(`/conversations/${conversationId}/messages${query}`, {
     method: 'GET',
     headers: {
       Authorization: `Bearer ${token}`,
     },
   });
-  // 백엔드 응답 구조: { success: true, data: { messages: [...], total: N } }
+  // 백엔드 응답 구조: { success: true, data: { messages: [...], total: N, has_more, latest_order } }
   return response.data || response;
 };
 
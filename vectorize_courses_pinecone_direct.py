@@ -3,10 +3,11 @@ PINECONE API 직접 사용을 위한 벡터화 스크립트
 LangChain 호환성 문제를 우회하여 PINECONE API v5를 직접 사용
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import numpy as np
 from tqdm import tqdm
 from dotenv import load_dotenv
@@ -29,10 +30,11 @@ import time
 class DirectPineconeVectorizer:
     """PINECONE API 직접 사용 벡터화 클래스"""
     
-    def __init__(self, json_path: str = "utils/output.json"):
+    def __init__(self, json_path: str = "utils/output.json", use_pinecone: bool = True):
         """
         Args:
             json_path: 수업계획서 JSON 파일 경로
+            use_pinecone: PINECONE 클라이언트 초기화 여부 (FAISS 인덱스만 만들 때는 False)
         """
         self.json_path = json_path
         self.courses_data = self._load_json()
@@ -47,7 +49,9 @@ class DirectPineconeVectorizer:
         print("[임베딩 모델 로딩 완료!]")
         
         # PINECONE 초기화
-        self._init_pinecone()
+        self.pc = None
+        if use_pinecone:
+            self._init_pinecone()
     
     def _init_pinecone(self):
         """PINECONE 초기화"""
@@ -274,13 +278,19 @@ class DirectPineconeVectorizer:
         print(f"[총 {len(documents)}개 문서 생성 완료]")
         return documents
     
-    def create_and_save_vectorstore(self, index_name: str = "chatbot-courses", reset: bool = True):
+    def create_and_save_vectorstore(
+        self,
+        index_name: str = "chatbot-courses",
+        reset: bool = True,
+        faiss_dir: Optional[str] = None
+    ):
         """
         PINECONE에 벡터 저장
         
         Args:
             index_name: Pinecone 인덱스 이름
             reset: True이면 기존 데이터 삭제 후 재생성 (기본값: True)
+            faiss_dir: 지정하면 같은 벡터로 로컬 FAISS 인덱스도 함께 저장
         """
         # 문서 생성
         documents = self._create_course_documents()
@@ -317,6 +327,8 @@ class DirectPineconeVectorizer:
         vectors = []
         
         print(f"[벡터 생성 및 업로드 중...]")
+        all_ids = []
+        all_embeddings = []
         
         def upsert_with_retry(index, vectors, max_retries=3):
             """지수 백오프로 재시도"""
@@ -337,6 +349,9 @@ class DirectPineconeVectorizer:
             
             # 벡터 추가
             vector_id = f"doc_{i}_{uuid.uuid4().hex[:8]}"
+            all_ids.append(vector_id)
+            if faiss_dir:
+                all_embeddings.append(embedding)
             vectors.append({
                 "id": vector_id,
                 "values": embedding,
@@ -358,15 +373,107 @@ class DirectPineconeVectorizer:
         
         print(f"[PINECONE 벡터 스토어 저장 완료: {index_name}]")
         
-        # 메타데이터 통계 저장
+        if faiss_dir:
+            self._write_faiss_index(faiss_dir, documents, all_ids, all_embeddings)
+        
+        self._write_documents_jsonl(Path("vectorstore") / "documents.jsonl", documents, all_ids)
+        self._save_metadata_stats(documents, index_name)
+        
+        return index
+    
+    def create_and_save_faiss_index(self, faiss_dir: str = "vectorstore/faiss", batch_size: int = 64):
+        """
+        로컬 FAISS 인덱스만 생성 (PINECONE 없이 백엔드를 실행할 때 사용)
+        
+        Args:
+            faiss_dir: 인덱스 저장 디렉터리 (백엔드 FAISS_INDEX_DIR와 동일해야 함)
+            batch_size: 임베딩 배치 크기
+        """
+        documents = self._create_course_documents()
+        
+        print(f"\n[FAISS 인덱스 생성 중: {faiss_dir}]")
+        embeddings = []
+        for start in tqdm(range(0, len(documents), batch_size), desc="벡터 생성"):
+            batch = documents[start:start + batch_size]
+            embeddings.extend(self.embeddings.embed_documents([doc["text"] for doc in batch]))
+        
+        ids = [f"doc_{i}_{uuid.uuid4().hex[:8]}" for i in range(len(documents))]
+        self._write_faiss_index(faiss_dir, documents, ids, embeddings)
+        self._write_documents_jsonl(Path("vectorstore") / "documents.jsonl", documents, ids)
+        self._save_metadata_stats(documents, "faiss")
+    
+    def _write_faiss_index(
+        self,
+        faiss_dir: str,
+        documents: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: List[List[float]]
+    ):
+        """FAISS 인덱스(index.faiss)와 문서 메타데이터(documents.jsonl) 저장"""
+        import faiss
+        
+        output_dir = Path(faiss_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+        faiss.write_index(index, str(output_dir / "index.faiss"))
+        self._write_documents_jsonl(output_dir / "documents.jsonl", documents, ids)
+        
+        print(f"[FAISS 인덱스 저장 완료: {output_dir} ({index.ntotal}개 벡터)]")
+    
+    def _write_documents_jsonl(self, path: Path, documents: List[Dict[str, Any]], ids: List[str]):
+        """
+        벡터 id와 같은 id로 청크 저장
+        
+        FAISS 인덱스의 문서 메타데이터이자 백엔드 하이브리드 검색(BM25)의 어휘 색인 원본
+        (백엔드 LEXICAL_CORPUS_PATH 기본값: vectorstore/documents.jsonl)
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for vector_id, doc in zip(ids, documents):
+                f.write(json.dumps({
+                    "id": vector_id,
+                    "text": doc["text"][:1000],  # PINECONE 메타데이터와 동일한 길이
+                    "metadata": doc["metadata"]
+                }, ensure_ascii=False) + "\n")
+    
+    def _save_metadata_stats(self, documents: List[Dict[str, Any]], index_name: str):
+        """메타데이터 통계 저장 (index_version이 바뀌면 백엔드의 답변 캐시가 전체 무효화됨)"""
         metadata_stats = self._get_metadata_stats(documents)
+        metadata_stats["index_name"] = index_name
+        metadata_stats["index_version"] = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
         stats_path = Path("vectorstore") / "metadata_stats.json"
         stats_path.parent.mkdir(exist_ok=True)
         with open(stats_path, 'w', encoding='utf-8') as f:
             json.dump(metadata_stats, indent=2, ensure_ascii=False, fp=f)
         print(f"[메타데이터 통계 저장 완료: {stats_path}]")
+        self._publish_index_version(metadata_stats["index_version"], index_name)
+    
+    def _publish_index_version(self, index_version: str, index_name: str):
+        """
+        새 index_version을 MongoDB에 기록 (다른 호스트/컨테이너의 백엔드도 답변 캐시를 무효화하도록)
         
-        return index
+        백엔드는 index_versions 컬렉션을 ANSWER_CACHE_INDEX_POLL_SECONDS마다 확인합니다.
+        """
+        mongodb_uri = os.getenv("MONGODB_URI")
+        if not mongodb_uri:
+            print("[경고] MONGODB_URI가 없어 인덱스 버전을 MongoDB에 기록하지 않습니다 (로컬 metadata_stats.json만 갱신)")
+            return
+        
+        try:
+            from pymongo import MongoClient
+            with MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000) as client:
+                client[os.getenv("MONGODB_DATABASE", "chatbot_db")]["index_versions"].update_one(
+                    {"_id": "vectorstore"},
+                    {"$set": {"version": index_version, "index_name": index_name, "updated_at": time.time()}},
+                    upsert=True
+                )
+            print(f"[인덱스 버전 기록 완료: {index_version}]")
+        except Exception as e:
+            print(f"[경고] 인덱스 버전 기록 실패 - 다른 호스트의 답변 캐시는 TTL 만료까지 유지됩니다: {e}")
     
     def chunk_text(self, text: str, chunk_size: int = 400, overlap: int = 50) -> List[str]:
         """텍스트를 청크로 분할"""
@@ -395,7 +502,7 @@ class DirectPineconeVectorizer:
             meta = doc["metadata"]
             if meta.get('professor'):
                 professors.add(meta['professor'])
-            if meta.get('course_name'):
+            if meta.get('course_name') and meta.get('course_code') != "PROFESSOR_LIST":
                 courses.add(meta['course_name'])
             
             section = meta.get('section', 'unknown')
@@ -406,21 +513,46 @@ class DirectPineconeVectorizer:
             "total_professors": len(professors),
             "total_courses": len(courses),
             "professors": sorted(list(professors)),
+            "courses": sorted(list(courses)),  # 백엔드 교수명/과목명 사전(gazetteer)에서 사용
             "sections": sections
         }
 
 
 def main():
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="수업계획서 벡터화")
+    parser.add_argument(
+        "--backend",
+        choices=["pinecone", "faiss", "both"],
+        default="pinecone",
+        help="저장 대상 (pinecone: PINECONE 업로드, faiss: 로컬 FAISS 인덱스만, both: 둘 다)"
+    )
+    parser.add_argument("--faiss-dir", default="vectorstore/faiss", help="FAISS 인덱스 저장 디렉터리")
+    args = parser.parse_args()
+    
     print("=" * 60)
-    print("[수업계획서 벡터화 시작 - PINECONE 직접 사용]")
+    print(f"[수업계획서 벡터화 시작 - {args.backend}]")
     print("=" * 60)
     
     # 벡터라이저 생성
-    vectorizer = DirectPineconeVectorizer(json_path="utils/output.json")
+    vectorizer = DirectPineconeVectorizer(
+        json_path="utils/output.json",
+        use_pinecone=args.backend != "faiss"
+    )
+    
+    if args.backend == "faiss":
+        vectorizer.create_and_save_faiss_index(faiss_dir=args.faiss_dir)
+        print("\n" + "=" * 60)
+        print("[FAISS 벡터화 완료!]")
+        print("=" * 60)
+        return
     
     # 벡터 스토어 생성 및 저장 (기존 데이터 삭제 후 재생성)
-    index = vectorizer.create_and_save_vectorstore(index_name="chatbot-courses", reset=True)
+    index = vectorizer.create_and_save_vectorstore(
+        index_name="chatbot-courses",
+        reset=True,
+        faiss_dir=args.faiss_dir if args.backend == "both" else None
+    )
     
     print("\n" + "=" * 60)
     print("[PINECONE 벡터화 완료!]")